@@ -0,0 +1,251 @@
+import json
+import os
+import threading
+import time
+
+from aussieaddonscommon import paths
+from aussieaddonscommon import session
+from aussieaddonscommon import utils
+
+from requests.auth import AuthBase
+from requests.cookies import extract_cookies_to_jar
+
+TOKEN_FILE = 'tokens.json'
+
+# Tokens are refreshed in the background once they are this close to
+# expiring, and treated as expired this long before the server does
+REFRESH_MARGIN = 5 * 60
+EXPIRY_SKEW = 30
+
+
+class Token(object):
+    """An access token and when it expires
+
+    expires is a unix timestamp, or None if the token doesn't expire.
+    refresh_token and extra are for the fetch function's own use.
+    """
+    def __init__(self, value, expires=None, token_type='Bearer',
+                 refresh_token=None, extra=None):
+        self.value = value
+        self.expires = expires
+        self.token_type = token_type
+        self.refresh_token = refresh_token
+        self.extra = extra or {}
+
+    def expires_within(self, seconds, now=None):
+        if self.expires is None:
+            return False
+        if now is None:
+            now = time.time()
+        return self.expires - now <= seconds
+
+    @property
+    def header(self):
+        if not self.token_type:
+            return self.value
+        return '{0} {1}'.format(self.token_type, self.value)
+
+    def to_dict(self):
+        return {'value': self.value, 'expires': self.expires,
+                'token_type': self.token_type,
+                'refresh_token': self.refresh_token, 'extra': self.extra}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['value'], data.get('expires'),
+                   data.get('token_type', 'Bearer'),
+                   data.get('refresh_token'), data.get('extra'))
+
+
+class TokenStore(object):
+    """Tokens saved by name in a JSON file, shared between invocations
+
+    Saves hold a file lock beside it, so invocations saving different
+    tokens at the same time don't lose each other's.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, 'rb') as f:
+                return json.loads(f.read().decode('utf-8'))
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def load(self, name):
+        data = self._read().get(name)
+        if not data:
+            return None
+        try:
+            return Token.from_dict(data)
+        except (KeyError, TypeError):
+            return None
+
+    def save(self, name, token):
+        with self._lock, paths.file_lock(self.path + '.lock'):
+            data = self._read()
+            if token is None:
+                data.pop(name, None)
+            else:
+                data[name] = token.to_dict()
+            paths.atomic_write(self.path, json.dumps(data).encode('utf-8'))
+
+
+def get_token_store():
+    return TokenStore(os.path.join(utils.get_file_dir(), TOKEN_FILE))
+
+
+class TokenManager(object):
+    """Fetch, cache and refresh an auth token
+
+    fetch_token is called as fetch_token(session, token) and must return a
+    new Token. token is the previous token (None when logging in from
+    scratch), so its refresh_token can be used where the API has one.
+
+    Tokens are kept in memory and in the token store, so later add-on
+    invocations reuse them rather than logging in again. Only one refresh
+    runs at a time; concurrent callers wait for it and share the result.
+    """
+    def __init__(self, fetch_token, name=None, store=None,
+                 refresh_margin=REFRESH_MARGIN, http_session=None):
+        self.fetch_token = fetch_token
+        self.name = name or 'default'
+        self._store = store
+        self.refresh_margin = refresh_margin
+        self._session = http_session
+        self._token = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = get_token_store()
+        return self._store
+
+    @property
+    def session(self):
+        """Session used to fetch tokens, without our auth attached"""
+        if self._session is None:
+            self._session = session.Session()
+        return self._session
+
+    def _current(self):
+        if not self._loaded:
+            self._token = self.store.load(self.name)
+            self._loaded = True
+        return self._token
+
+    def get_token(self, now=None):
+        """Return a valid token, fetching one if needed
+
+        If the token is close to expiring, a background refresh is started
+        and the current token is returned straight away.
+        """
+        with self._lock:
+            token = self._current()
+        if token is None or token.expires_within(EXPIRY_SKEW, now):
+            return self.refresh(token)
+        if token.expires_within(self.refresh_margin, now):
+            self.refresh_in_background()
+        return token
+
+    def refresh(self, stale=None):
+        """Fetch a new token to replace stale
+
+        If the token has already been replaced by another caller since
+        stale was handed out, the replacement is returned instead of
+        fetching again.
+        """
+        with self._lock:
+            token = self._current()
+            if token is not None and token is not stale:
+                if not token.expires_within(EXPIRY_SKEW):
+                    return token
+            utils.log('Refreshing auth token: {0}'.format(self.name))
+            token = self.fetch_token(self.session, token)
+            self._token = token
+            self.store.save(self.name, token)
+            return token
+
+    def refresh_in_background(self):
+        """Start a refresh in a daemon thread unless one is running"""
+        with self._lock:
+            thread = self._refresh_thread
+            if thread is not None and thread.is_alive():
+                return thread
+            stale = self._token
+            thread = threading.Thread(target=self._background_refresh,
+                                      args=(stale,))
+            thread.daemon = True
+            self._refresh_thread = thread
+        thread.start()
+        return thread
+
+    def _background_refresh(self, stale):
+        try:
+            self.refresh(stale)
+        except Exception as e:
+            # The current token is still valid for now, so try again later
+            utils.log('Background token refresh failed: {0}'.format(e))
+
+    def invalidate(self):
+        """Forget the token, e.g. when the user logs out"""
+        with self._lock:
+            self._token = None
+            self._loaded = True
+            self.store.save(self.name, None)
+
+    def attach(self, http_session):
+        """Authenticate all requests made with a session"""
+        http_session.auth = TokenAuth(self, http_session=http_session)
+        return http_session
+
+
+class TokenAuth(AuthBase):
+    """Attach a TokenManager's token to requests
+
+    A 401 response triggers a single retry with a fresh token. Given the
+    Session, the retry goes through its rate limiter, circuit breaker and
+    hooks like any other request.
+    """
+    def __init__(self, manager, header='Authorization', http_session=None):
+        self.manager = manager
+        self.header = header
+        self.http_session = http_session
+
+    def __call__(self, request):
+        token = self.manager.get_token()
+        request.headers[self.header] = token.header
+        request._auth_token = token
+        request.register_hook('response', self.handle_401)
+        return request
+
+    def handle_401(self, response, **kwargs):
+        request = response.request
+        if response.status_code != 401 or getattr(request, '_auth_retried',
+                                                  False):
+            return response
+
+        # Release the connection back to the pool before retrying
+        response.content
+        response.close()
+
+        token = self.manager.refresh(getattr(request, '_auth_token', None))
+        retry = request.copy()
+        # Keep any cookies set with the 401, as HTTPDigestAuth does
+        extract_cookies_to_jar(retry._cookies, request, response.raw)
+        retry.prepare_cookies(retry._cookies)
+        retry.headers[self.header] = token.header
+        retry._auth_token = token
+        retry._auth_retried = True
+        if self.http_session is not None:
+            new_response = self.http_session.resend(retry, **kwargs)
+        else:
+            new_response = response.connection.send(retry, **kwargs)
+        new_response.history.append(response)
+        new_response.request = retry
+        return new_response
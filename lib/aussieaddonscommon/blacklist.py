@@ -0,0 +1,134 @@
+import io
+import os
+import re
+
+BLACKLIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'data', 'vpn_blacklist.txt')
+
+# ipinfo.io reports the org as 'AS4739 Internode Pty Ltd'
+ASN_PATTERN = re.compile(r'^\s*(AS\d+)\b', re.IGNORECASE)
+
+
+class SubstringMatcher(object):
+    """Aho-Corasick automaton for matching many substrings at once
+
+    Building the automaton is linear in the total length of the patterns,
+    and each search is linear in the length of the text no matter how many
+    patterns there are.
+    """
+    def __init__(self, patterns=()):
+        # Each node is a dict of transitions, with matching failure links
+        # and a flag for whether any pattern ends at (or via a failure link
+        # passes through) that node
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [False]
+        self.size = 0
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern):
+        if not pattern:
+            return
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(False)
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._out[node] = True
+        self.size += 1
+
+    def _build(self):
+        goto, fail, out = self._goto, self._fail, self._out
+        # Breadth first, so failure links always point at shallower nodes
+        # that have already been resolved. Children of the root fail back
+        # to the root.
+        queue = list(goto[0].values())
+        i = 0
+        while i < len(queue):
+            node = queue[i]
+            i += 1
+            for ch, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(ch, 0)
+                out[child] = out[child] or out[fail[child]]
+
+    def search(self, text):
+        """Return True if any pattern occurs in text"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                return True
+        return False
+
+
+class Blacklist(object):
+    """Compiled VPN/proxy blacklist
+
+    ASNs are checked with an exact set lookup, while org and hostname
+    fragments are each compiled into a SubstringMatcher.
+    """
+    def __init__(self, asns=(), orgs=(), hostnames=()):
+        self.asns = frozenset(asn.upper() for asn in asns)
+        self.org_matcher = SubstringMatcher(o.lower() for o in orgs)
+        self.hostname_matcher = SubstringMatcher(h.lower() for h in hostnames)
+
+    @classmethod
+    def from_file(cls, path=BLACKLIST_PATH):
+        entries = {'asn': [], 'org': [], 'hostname': []}
+        with io.open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                kind, _, value = line.partition(' ')
+                if kind not in entries:
+                    raise ValueError('Unknown blacklist entry: %s' % line)
+                entries[kind].append(value.strip())
+        return cls(asns=entries['asn'], orgs=entries['org'],
+                   hostnames=entries['hostname'])
+
+    def is_blacklisted_org(self, org):
+        match = ASN_PATTERN.match(org)
+        if match and match.group(1).upper() in self.asns:
+            return True
+        return self.org_matcher.search(org.lower())
+
+    def is_blacklisted_hostname(self, hostname):
+        return self.hostname_matcher.search(hostname.lower())
+
+    def is_blacklisted(self, connection_info):
+        """Check the org and hostname from ipinfo.io connection info"""
+        if not connection_info:
+            return False
+        org = connection_info.get('org')
+        if org and self.is_blacklisted_org(org):
+            return True
+        hostname = connection_info.get('hostname')
+        if hostname and self.is_blacklisted_hostname(hostname):
+            return True
+        return False
+
+
+_blacklist = None
+
+
+def get_blacklist():
+    """Return the blacklist, loading and compiling it on first use"""
+    global _blacklist
+    if _blacklist is None:
+        _blacklist = Blacklist.from_file()
+    return _blacklist
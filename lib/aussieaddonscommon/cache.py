@@ -0,0 +1,202 @@
+import functools
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from aussieaddonscommon import utils
+
+CACHE_FILE = 'cache.db'
+
+# Default limits, per namespace
+DEFAULT_TTL = 60 * 60
+MAX_ENTRIES = 1000
+
+# Reads only record the access time when the stored one is this many
+# seconds old, so most cache hits don't write to the database
+ACCESS_RESOLUTION = 60
+
+# Protocol 2 can be read by both Python 2 and 3
+PICKLE_PROTOCOL = 2
+
+_MISSING = object()
+
+
+class CacheStore(object):
+    """Persistent key/value store with TTLs and LRU eviction
+
+    Values are pickled into a SQLite database, which handles locking
+    between concurrent add-on invocations. Each write is a single
+    transaction, so readers never see partially written values.
+
+    Entries are grouped by namespace (the add-on id by default), and each
+    namespace keeps at most max_entries, evicting the least recently used
+    to within ACCESS_RESOLUTION seconds. The database is in WAL mode, so
+    readers don't wait on a writer and commits needn't sync every time.
+    """
+    def __init__(self, path, namespace=None, default_ttl=DEFAULT_TTL,
+                 max_entries=MAX_ENTRIES):
+        self.path = path
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    @property
+    def conn(self):
+        # sqlite3 connections can't be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS cache ('
+                    'namespace TEXT NOT NULL, '
+                    'key TEXT NOT NULL, '
+                    'value BLOB, '
+                    'expires REAL, '
+                    'accessed REAL, '
+                    'PRIMARY KEY (namespace, key))')
+                conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed '
+                             'ON cache (namespace, accessed)')
+            self._local.conn = conn
+        return conn
+
+    @property
+    def ns(self):
+        if self.namespace is None:
+            self.namespace = utils.get_addon_id()
+        return self.namespace
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def get(self, key, default=None, now=None):
+        """Return a cached value, or default if missing or expired"""
+        if now is None:
+            now = time.time()
+        row = self.conn.execute(
+            'SELECT value, expires, accessed FROM cache '
+            'WHERE namespace = ? AND key = ?', (self.ns, key)).fetchone()
+        if row is None:
+            return default
+        value, expires, accessed = row
+        if expires is not None and expires <= now:
+            self.delete(key)
+            return default
+        if accessed is None or now - accessed >= ACCESS_RESOLUTION:
+            with self.conn as conn:
+                conn.execute('UPDATE cache SET accessed = ? '
+                             'WHERE namespace = ? AND key = ?',
+                             (now, self.ns, key))
+        return pickle.loads(bytes(value))
+
+    def set(self, key, value, ttl=_MISSING, now=None):
+        """Store a value, expiring after ttl seconds (None never expires)"""
+        if now is None:
+            now = time.time()
+        if ttl is _MISSING:
+            ttl = self.default_ttl
+        expires = None if ttl is None else now + ttl
+        data = sqlite3.Binary(pickle.dumps(value, PICKLE_PROTOCOL))
+        with self.conn as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO cache '
+                '(namespace, key, value, expires, accessed) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (self.ns, key, data, expires, now))
+            self._evict(conn)
+
+    def delete(self, key):
+        with self.conn as conn:
+            conn.execute('DELETE FROM cache WHERE namespace = ? AND key = ?',
+                         (self.ns, key))
+
+    def clear(self):
+        """Remove every entry in this namespace"""
+        with self.conn as conn:
+            conn.execute('DELETE FROM cache WHERE namespace = ?', (self.ns,))
+
+    def purge_expired(self, now=None):
+        if now is None:
+            now = time.time()
+        with self.conn as conn:
+            conn.execute('DELETE FROM cache WHERE namespace = ? AND '
+                         'expires IS NOT NULL AND expires <= ?',
+                         (self.ns, now))
+
+    def _evict(self, conn):
+        count = conn.execute('SELECT COUNT(*) FROM cache WHERE namespace = ?',
+                             (self.ns,)).fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(
+                'DELETE FROM cache WHERE namespace = ? AND key IN ('
+                'SELECT key FROM cache WHERE namespace = ? '
+                'ORDER BY accessed ASC LIMIT ?)',
+                (self.ns, self.ns, count - self.max_entries))
+
+    def __len__(self):
+        return self.conn.execute(
+            'SELECT COUNT(*) FROM cache WHERE namespace = ?',
+            (self.ns,)).fetchone()[0]
+
+    def memoize(self, ttl=_MISSING, key_prefix=None):
+        """Decorator caching a function's return value by its arguments
+
+        Arguments must be picklable. The function's module and name are used
+        as part of the key, unless key_prefix is given.
+        """
+        def decorator(func):
+            prefix = key_prefix or '%s.%s' % (func.__module__, func.__name__)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = make_key(prefix, args, kwargs)
+                value = self.get(key, _MISSING)
+                if value is _MISSING:
+                    value = func(*args, **kwargs)
+                    self.set(key, value, ttl)
+                return value
+            return wrapper
+        return decorator
+
+
+def make_key(prefix, args, kwargs):
+    """Hash function arguments into a cache key"""
+    data = pickle.dumps((args, sorted(kwargs.items())), PICKLE_PROTOCOL)
+    return '%s:%s' % (prefix, hashlib.sha1(data).hexdigest())
+
+
+_store = None
+
+
+def get_store():
+    """Return the cache store in the add-on working directory"""
+    global _store
+    if _store is None:
+        _store = CacheStore(os.path.join(utils.get_file_dir(), CACHE_FILE))
+    return _store
+
+
+def memoize(ttl=_MISSING, key_prefix=None):
+    """Memoize a function in the shared cache store
+
+    The store is only opened on the first call of the decorated function.
+    """
+    def decorator(func):
+        wrapped = []
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not wrapped:
+                wrapped.append(get_store().memoize(ttl, key_prefix)(func))
+            return wrapped[0](*args, **kwargs)
+        return wrapper
+    return decorator
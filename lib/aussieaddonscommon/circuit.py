@@ -0,0 +1,185 @@
+import threading
+import time
+
+from aussieaddonscommon import cache
+from aussieaddonscommon.exceptions import AussieAddonsException
+
+import requests
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+# Consecutive failures before a host's circuit opens, and how long it
+# stays open before a trial request is let through
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 60
+
+# How long persisted state is kept for hosts that haven't been seen
+STATE_TTL = 24 * 60 * 60
+
+
+class CircuitOpenError(AussieAddonsException):
+    """Raised instead of making a request to a host that is failing"""
+    def __init__(self, host, retry_at):
+        super(CircuitOpenError, self).__init__(
+            '{0} is not responding, not trying again for {1:.0f} '
+            'seconds'.format(host, max(0, retry_at - time.time())))
+        self.host = host
+        self.retry_at = retry_at
+
+
+def is_failure(error):
+    """Whether an error from Session.request means the host is failing
+
+    Connection problems, timeouts and server errors count. Client errors,
+    such as a 404, mean the host is up.
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        return response is None or response.status_code >= 500
+    return isinstance(error, AussieAddonsException)
+
+
+class CircuitBreaker(object):
+    """Closed, open and half-open state for one host
+
+    The circuit opens after failure_threshold consecutive failures, and
+    requests are refused until reset_timeout seconds have passed. Then it
+    is half-open and a single trial request is allowed: if that succeeds
+    the circuit closes, otherwise it opens again.
+    """
+    def __init__(self, host, failure_threshold=FAILURE_THRESHOLD,
+                 reset_timeout=RESET_TIMEOUT, on_change=None):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def to_dict(self):
+        return {'state': self.state, 'failures': self.failures,
+                'opened_at': self.opened_at}
+
+    def load(self, data):
+        self.state = data.get('state', CLOSED)
+        self.failures = data.get('failures', 0)
+        self.opened_at = data.get('opened_at')
+
+    @property
+    def retry_at(self):
+        return (self.opened_at or 0) + self.reset_timeout
+
+    def before_request(self, now=None):
+        """Raise CircuitOpenError unless a request may be made"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and now >= self.retry_at:
+                self.state = HALF_OPEN
+                self._trial = False
+            if self.state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return
+            raise CircuitOpenError(self.host, self.retry_at)
+
+    def record_success(self):
+        with self._lock:
+            changed = self.state != CLOSED or self.failures
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+        if changed and self.on_change:
+            self.on_change(self)
+
+    def record_failure(self, now=None):
+        if now is None:
+            now = time.time()
+        with self._lock:
+            self.failures += 1
+            if (self.state == HALF_OPEN or
+                    self.failures >= self.failure_threshold):
+                self.state = OPEN
+                self.opened_at = now
+            self._trial = False
+        if self.on_change:
+            self.on_change(self)
+
+    def record(self, error=None):
+        """Record the outcome of a request, given the error it raised"""
+        if error is None or not is_failure(error):
+            self.record_success()
+        else:
+            self.record_failure()
+
+
+class CircuitRegistry(object):
+    """Circuit breakers by host, shared by every Session in the process
+
+    With a CacheStore, breaker state is saved whenever it changes and
+    loaded the first time a host is seen, so a later add-on invocation
+    doesn't have to rediscover that a host is down.
+    """
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD,
+                 reset_timeout=RESET_TIMEOUT, store=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.store = store
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, host):
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(host)
+                if breaker is None:
+                    breaker = CircuitBreaker(host, self.failure_threshold,
+                                             self.reset_timeout,
+                                             on_change=self._save)
+                    if self.store is not None:
+                        data = self.store.get(self._key(host))
+                        if data:
+                            breaker.load(data)
+                    self._breakers[host] = breaker
+        return breaker
+
+    @staticmethod
+    def _key(host):
+        return 'circuit:' + host
+
+    def _save(self, breaker):
+        if self.store is not None:
+            self.store.set(self._key(breaker.host), breaker.to_dict(),
+                           STATE_TTL)
+
+    def reset(self):
+        with self._lock:
+            for host in self._breakers:
+                if self.store is not None:
+                    self.store.delete(self._key(host))
+            self._breakers.clear()
+
+
+_registry = None
+
+
+def get_registry(persist=False):
+    """Return the process wide registry
+
+    With persist, breaker state is kept in the shared cache store between
+    add-on invocations.
+    """
+    global _registry
+    if _registry is None:
+        _registry = CircuitRegistry()
+    if persist and _registry.store is None:
+        _registry.store = cache.get_store()
+    return _registry
@@ -0,0 +1,93 @@
+import threading
+
+from requests.packages.urllib3.util.request import ACCEPT_ENCODING
+
+# Content codings urllib3 can decode here. gzip and deflate always, plus
+# br and zstd when the brotli and zstandard packages are installed
+SUPPORTED_ENCODINGS = tuple(e.strip() for e in ACCEPT_ENCODING.split(','))
+
+# Size of decoded chunks yielded by iter_decoded
+CHUNK_SIZE = 64 * 1024
+
+
+def accept_encoding(encodings=None):
+    """Return an Accept-Encoding header value
+
+    Only encodings that can be decoded are advertised, in the order given,
+    or best compression first by default. An empty list, or none that are
+    supported, asks for the response uncompressed.
+    """
+    if encodings is None:
+        encodings = sorted(SUPPORTED_ENCODINGS, key=_preference)
+    encodings = [e for e in encodings if e in SUPPORTED_ENCODINGS]
+    return ', '.join(encodings) or 'identity'
+
+
+def _preference(encoding):
+    order = ('zstd', 'br', 'gzip', 'deflate')
+    return order.index(encoding) if encoding in order else len(order)
+
+
+def wire_bytes(response):
+    """Return the number of body bytes transferred for a response
+
+    That is before decompression, so for a compressed response it is less
+    than len(response.content).
+    """
+    tell = getattr(response.raw, 'tell', None)
+    if tell is not None:
+        return tell()
+    transferred = getattr(response, 'wire_bytes', None)
+    if transferred is not None:
+        return transferred
+    return len(response._content or b'')
+
+
+class TransferStats(object):
+    """Running totals of compressed and decompressed response bytes"""
+    def __init__(self):
+        self.responses = 0
+        self.compressed = 0
+        self.decoded = 0
+        self._lock = threading.Lock()
+
+    def add(self, compressed, decoded):
+        with self._lock:
+            self.responses += 1
+            self.compressed += compressed
+            self.decoded += decoded
+
+    def add_response(self, response):
+        """Count a response whose body has been read"""
+        self.add(wire_bytes(response), len(response._content or b''))
+
+    @property
+    def ratio(self):
+        """Compressed size as a fraction of decoded size"""
+        if not self.decoded:
+            return 1.0
+        return float(self.compressed) / self.decoded
+
+    def __str__(self):
+        return ('{0} responses, {1} bytes transferred, {2} bytes decoded '
+                '({3:.0%})'.format(self.responses, self.compressed,
+                                   self.decoded, self.ratio))
+
+
+def iter_decoded(response, chunk_size=CHUNK_SIZE, stats=None):
+    """Yield the decompressed body of a stream=True response in chunks
+
+    Each chunk is decoded as it arrives, so a large compressed response is
+    never held in memory whole. The response is closed once the body is
+    read or the generator is closed, and its sizes added to stats.
+    """
+    decoded = 0
+    try:
+        for chunk in response.iter_content(chunk_size):
+            decoded += len(chunk)
+            yield chunk
+    finally:
+        response.close()
+        if stats is not None:
+            tell = getattr(response.raw, 'tell', None)
+            stats.add(decoded if tell is None else tell(), decoded)
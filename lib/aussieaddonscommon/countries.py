@@ -1,249 +1,157 @@
-countries = {'AD': u'Andorra',
-             'AE': u'United Arab Emirates',
-             'AF': u'Afghanistan',
-             'AG': u'Antigua and Barbuda',
-             'AI': u'Anguilla',
-             'AL': u'Albania',
-             'AM': u'Armenia',
-             'AO': u'Angola',
-             'AQ': u'Antarctica',
-             'AR': u'Argentina',
-             'AS': u'American Samoa',
-             'AT': u'Austria',
-             'AU': u'Australia',
-             'AW': u'Aruba',
-             'AX': u'Aland Islands',
-             'AZ': u'Azerbaijan',
-             'BA': u'Bosnia and Herzegovina',
-             'BB': u'Barbados',
-             'BD': u'Bangladesh',
-             'BE': u'Belgium',
-             'BF': u'Burkina Faso',
-             'BG': u'Bulgaria',
-             'BH': u'Bahrain',
-             'BI': u'Burundi',
-             'BJ': u'Benin',
-             'BL': u'Saint Barthelemy',
-             'BM': u'Bermuda',
-             'BN': u'Brunei Darussalam',
-             'BO': u'Bolivia, Plurinational State of',
-             'BQ': u'Bonaire, Sint Eustatius and Saba',
-             'BR': u'Brazil',
-             'BS': u'Bahamas',
-             'BT': u'Bhutan',
-             'BV': u'Bouvet Island',
-             'BW': u'Botswana',
-             'BY': u'Belarus',
-             'BZ': u'Belize',
-             'CA': u'Canada',
-             'CC': u'Cocos (Keeling Islands)',
-             'CD': u'Congo, The Democratic Republic of the',
-             'CF': u'Central African Republic',
-             'CG': u'Congo',
-             'CH': u'Switzerland',
-             'CI': u"Cote D'ivoire",
-             'CK': u'Cook Islands',
-             'CL': u'Chile',
-             'CM': u'Cameroon',
-             'CN': u'China',
-             'CO': u'Colombia',
-             'CR': u'Costa Rica',
-             'CU': u'Cuba',
-             'CV': u'Cape Verde',
-             'CW': u'Curaeao',
-             'CX': u'Christmas Island',
-             'CY': u'Cyprus',
-             'CZ': u'Czech Republic',
-             'DE': u'Germany',
-             'DJ': u'Djibouti',
-             'DK': u'Denmark',
-             'DM': u'Dominica',
-             'DO': u'Dominican Republic',
-             'DZ': u'Algeria',
-             'EC': u'Ecuador',
-             'EE': u'Estonia',
-             'EG': u'Egypt',
-             'EH': u'Western Sahara',
-             'ER': u'Eritrea',
-             'ES': u'Spain',
-             'ET': u'Ethiopia',
-             'FI': u'Finland',
-             'FJ': u'Fiji',
-             'FK': u'Falkland Islands (Malvinas)',
-             'FM': u'Micronesia, Federated States of',
-             'FO': u'Faroe Islands',
-             'FR': u'France',
-             'GA': u'Gabon',
-             'GB': u'United Kingdom',
-             'GD': u'Grenada',
-             'GE': u'Georgia',
-             'GF': u'French Guiana',
-             'GG': u'Guernsey',
-             'GH': u'Ghana',
-             'GI': u'Gibraltar',
-             'GL': u'Greenland',
-             'GM': u'Gambia',
-             'GN': u'Guinea',
-             'GP': u'Guadeloupe',
-             'GQ': u'Equatorial Guinea',
-             'GR': u'Greece',
-             'GS': u'South Georgia and the South Sandwich Islands',
-             'GT': u'Guatemala',
-             'GU': u'Guam',
-             'GW': u'Guinea-bissau',
-             'GY': u'Guyana',
-             'HK': u'Hong Kong',
-             'HM': u'Heard Island and McDonald Islands',
-             'HN': u'Honduras',
-             'HR': u'Croatia',
-             'HT': u'Haiti',
-             'HU': u'Hungary',
-             'ID': u'Indonesia',
-             'IE': u'Ireland',
-             'IL': u'Israel',
-             'IM': u'Isle of Man',
-             'IN': u'India',
-             'IO': u'British Indian Ocean Territory',
-             'IQ': u'Iraq',
-             'IR': u'Iran, Islamic Republic of',
-             'IS': u'Iceland',
-             'IT': u'Italy',
-             'JE': u'Jersey',
-             'JM': u'Jamaica',
-             'JO': u'Jordan',
-             'JP': u'Japan',
-             'KE': u'Kenya',
-             'KG': u'Kyrgyzstan',
-             'KH': u'Cambodia',
-             'KI': u'Kiribati',
-             'KM': u'Comoros',
-             'KN': u'Saint Kitts and Nevis',
-             'KP': u"Korea, Democratic People's Republic of",
-             'KR': u'Korea, Republic of',
-             'KW': u'Kuwait',
-             'KY': u'Cayman Islands',
-             'KZ': u'Kazakhstan',
-             'LA': u"Lao People's Democratic Republic",
-             'LB': u'Lebanon',
-             'LC': u'Saint Lucia',
-             'LI': u'Liechtenstein',
-             'LK': u'Sri Lanka',
-             'LR': u'Liberia',
-             'LS': u'Lesotho',
-             'LT': u'Lithuania',
-             'LU': u'Luxembourg',
-             'LV': u'Latvia',
-             'LY': u'Libya',
-             'MA': u'Morocco',
-             'MC': u'Monaco',
-             'MD': u'Moldova, Republic of',
-             'ME': u'Montenegro',
-             'MF': u'Saint Martin (French Part)',
-             'MG': u'Madagascar',
-             'MH': u'Marshall Islands',
-             'MK': u'Macedonia, The Former Yugoslav Republic of',
-             'ML': u'Mali',
-             'MM': u'Myanmar',
-             'MN': u'Mongolia',
-             'MO': u'Macao',
-             'MP': u'Northern Mariana Islands',
-             'MQ': u'Martinique',
-             'MR': u'Mauritania',
-             'MS': u'Montserrat',
-             'MT': u'Malta',
-             'MU': u'Mauritius',
-             'MV': u'Maldives',
-             'MW': u'Malawi',
-             'MX': u'Mexico',
-             'MY': u'Malaysia',
-             'MZ': u'Mozambique',
-             'NA': u'Namibia',
-             'NC': u'New Caledonia',
-             'NE': u'Niger',
-             'NF': u'Norfolk Island',
-             'NG': u'Nigeria',
-             'NI': u'Nicaragua',
-             'NL': u'Netherlands',
-             'NO': u'Norway',
-             'NP': u'Nepal',
-             'NR': u'Nauru',
-             'NU': u'Niue',
-             'NZ': u'New Zealand',
-             'OM': u'Oman',
-             'PA': u'Panama',
-             'PE': u'Peru',
-             'PF': u'French Polynesia',
-             'PG': u'Papua New Guinea',
-             'PH': u'Philippines',
-             'PK': u'Pakistan',
-             'PL': u'Poland',
-             'PM': u'Saint Pierre and Miquelon',
-             'PN': u'Pitcairn',
-             'PR': u'Puerto Rico',
-             'PS': u'Palestinian Territory, Occupied',
-             'PT': u'Portugal',
-             'PW': u'Palau',
-             'PY': u'Paraguay',
-             'QA': u'Qatar',
-             'RE': u'Reunion',
-             'RO': u'Romania',
-             'RS': u'Serbia',
-             'RU': u'Russian Federation',
-             'RW': u'Rwanda',
-             'SA': u'Saudi Arabia',
-             'SB': u'Solomon Islands',
-             'SC': u'Seychelles',
-             'SD': u'Sudan',
-             'SE': u'Sweden',
-             'SG': u'Singapore',
-             'SH': u'Saint Helena, Ascension and Tristan Da Cunha',
-             'SI': u'Slovenia',
-             'SJ': u'Svalbard and Jan Mayen',
-             'SK': u'Slovakia',
-             'SL': u'Sierra Leone',
-             'SM': u'San Marino',
-             'SN': u'Senegal',
-             'SO': u'Somalia',
-             'SR': u'Suriname',
-             'SS': u'South Sudan',
-             'ST': u'Sao Tome and Principe',
-             'SV': u'El Salvador',
-             'SX': u'Sint Maarten (Dutch Part)',
-             'SY': u'Syrian Arab Republic',
-             'SZ': u'Swaziland',
-             'TC': u'Turks and Caicos Islands',
-             'TD': u'Chad',
-             'TF': u'French Southern Territories',
-             'TG': u'Togo',
-             'TH': u'Thailand',
-             'TJ': u'Tajikistan',
-             'TK': u'Tokelau',
-             'TL': u'Timor-leste',
-             'TM': u'Turkmenistan',
-             'TN': u'Tunisia',
-             'TO': u'Tonga',
-             'TR': u'Turkey',
-             'TT': u'Trinidad and Tobago',
-             'TV': u'Tuvalu',
-             'TW': u'Taiwan, Province of China',
-             'TZ': u'Tanzania, United Republic of',
-             'UA': u'Ukraine',
-             'UG': u'Uganda',
-             'UM': u'United States Minor Outlying Islands',
-             'US': u'United States',
-             'UY': u'Uruguay',
-             'UZ': u'Uzbekistan',
-             'VA': u'Holy See (Vatican City State)',
-             'VC': u'Saint Vincent and the Grenadines',
-             'VE': u'Venezuela, Bolivarian Republic of',
-             'VG': u'Virgin Islands, British',
-             'VI': u'Virgin Islands, U.S.',
-             'VN': u'Vietnam',
-             'VU': u'Vanuatu',
-             'WF': u'Wallis and Futuna',
-             'WS': u'Samoa',
-             'YE': u'Yemen',
-             'YT': u'Mayotte',
-             'ZA': u'South Africa',
-             'ZM': u'Zambia',
-             'ZW': u'Zimbabwe'}
+import bisect
+import io
+import os
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+COUNTRIES_PATH = os.path.join(DATA_DIR, 'countries.tsv')
+ASN_PATH = os.path.join(DATA_DIR, 'asn_countries.tsv')
+
+CONTINENTS = {
+    'AF': u'Africa',
+    'AN': u'Antarctica',
+    'AS': u'Asia',
+    'EU': u'Europe',
+    'NA': u'North America',
+    'OC': u'Oceania',
+    'SA': u'South America',
+}
+
+
+class Country(object):
+    """ISO 3166-1 country record"""
+    __slots__ = ('alpha2', 'alpha3', 'numeric', 'continent', 'name')
+
+    def __init__(self, alpha2, alpha3, numeric, continent, name):
+        self.alpha2 = alpha2
+        self.alpha3 = alpha3
+        self.numeric = numeric
+        self.continent = continent
+        self.name = name
+
+    def __repr__(self):
+        return 'Country(%r, %r)' % (self.alpha2, self.name)
+
+    @property
+    def region(self):
+        return CONTINENTS.get(self.continent)
+
+
+# The reference data is only read from disk on the first lookup, as most
+# add-on invocations never need it. Keep module level work here to a
+# minimum for the same reason.
+_by_alpha2 = None
+_by_alpha3 = None
+_asn_starts = None
+_asn_ranges = None
+
+
+def _read_rows(path):
+    with io.open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#') or not line.strip():
+                continue
+            yield line.rstrip('\r\n').split('\t')
+
+
+def _load_countries():
+    global _by_alpha2, _by_alpha3
+    by_alpha2 = {}
+    by_alpha3 = {}
+    for row in _read_rows(COUNTRIES_PATH):
+        country = Country(*row)
+        by_alpha2[country.alpha2] = country
+        by_alpha3[country.alpha3] = country
+    _by_alpha2, _by_alpha3 = by_alpha2, by_alpha3
+
+
+def _load_asns():
+    global _asn_starts, _asn_ranges
+    ranges = [(int(first), int(last), alpha2)
+              for first, last, alpha2 in _read_rows(ASN_PATH)]
+    ranges.sort()
+    _asn_starts = [r[0] for r in ranges]
+    _asn_ranges = ranges
+
+
+def get_country(code):
+    """Look up a country by ISO alpha-2 or alpha-3 code"""
+    if not code:
+        return None
+    if _by_alpha2 is None:
+        _load_countries()
+    code = code.upper()
+    if len(code) == 3:
+        return _by_alpha3.get(code)
+    return _by_alpha2.get(code)
+
+
+def get_country_name(code, default=None):
+    """Return the country name for an ISO code, or default if unknown"""
+    country = get_country(code)
+    if country is None:
+        return default
+    return country.name
+
+
+def get_region(code, default=None):
+    """Return the continent name for an ISO code, or default if unknown"""
+    country = get_country(code)
+    if country is None:
+        return default
+    return country.region
+
+
+def get_asn_country(asn):
+    """Return the country an ASN is registered to
+
+    The ASN can be given as a number, 'AS1221' or an ipinfo.io style org
+    string such as 'AS1221 Telstra Corporation Ltd'.
+    """
+    if not isinstance(asn, int):
+        asn = (asn or '').strip().upper()
+        if asn.startswith('AS'):
+            asn = asn[2:]
+        asn = asn.split(' ', 1)[0]
+        if not asn.isdigit():
+            return None
+        asn = int(asn)
+    if _asn_starts is None:
+        _load_asns()
+    i = bisect.bisect_right(_asn_starts, asn) - 1
+    if i < 0:
+        return None
+    first, last, alpha2 = _asn_ranges[i]
+    if asn > last:
+        return None
+    return get_country(alpha2)
+
+
+class _CountryNames(object):
+    """Read only alpha-2 code to name mapping, loaded on first access"""
+
+    def _data(self):
+        if _by_alpha2 is None:
+            _load_countries()
+        return _by_alpha2
+
+    def __getitem__(self, key):
+        return self._data()[key].name
+
+    def __contains__(self, key):
+        return key in self._data()
+
+    def __iter__(self):
+        return iter(self._data())
+
+    def __len__(self):
+        return len(self._data())
+
+    def get(self, key, default=None):
+        country = self._data().get(key)
+        if country is None:
+            return default
+        return country.name
+
+
+# Kept for backwards compatibility with the old dict of names
+countries = _CountryNames()
@@ -0,0 +1,245 @@
+import io
+import re
+import xml.etree.ElementTree as ET
+
+from aussieaddonscommon import compression
+
+from future.builtins import chr
+from future.moves.html.entities import name2codepoint
+
+MRSS_NAMESPACE = 'http://search.yahoo.com/mrss/'
+
+# Numeric entities seen are added to the named ones, up to this many
+MAX_CHARS = 4096
+
+# Named, decimal and hex entities, and tags for clean_text
+_ENTITY = re.compile(r'&(#[xX][0-9a-fA-F]+|#[0-9]+|[A-Za-z][A-Za-z0-9]*);')
+_TAG_OR_ENTITY = re.compile(
+    r'<[^>]*>|&(#[xX][0-9a-fA-F]+|#[0-9]+|[A-Za-z][A-Za-z0-9]*);')
+
+_CHARS = dict((name, chr(codepoint))
+              for name, codepoint in name2codepoint.items())
+# XML's apos isn't an HTML 4 entity
+_CHARS['apos'] = "'"
+
+# HTML entities that XML doesn't predefine, as character references, for
+# feeds using them without declaring them
+_XML_ENTITIES = ('amp', 'lt', 'gt', 'quot', 'apos')
+_CHAR_REFS = dict((name.encode('ascii'), ('&#%d;' % codepoint).encode(
+    'ascii')) for name, codepoint in name2codepoint.items()
+    if name not in _XML_ENTITIES)
+_NAMED_ENTITY = re.compile(br'&([A-Za-z][A-Za-z0-9]*);')
+
+# Longest entity held back from the end of a chunk, in case the rest of
+# it is in the next one
+_MAX_ENTITY = 32
+
+
+def _entity(m):
+    name = m.group(1)
+    char = _CHARS.get(name)
+    if char is not None:
+        return char
+    if name is None:
+        # A tag
+        return ''
+    if name[0] != '#':
+        return m.group(0)
+    try:
+        if name[1] in 'xX':
+            char = chr(int(name[2:], 16))
+        else:
+            char = chr(int(name[1:]))
+    except (ValueError, OverflowError):
+        return m.group(0)
+    if len(_CHARS) < MAX_CHARS:
+        _CHARS[name] = char
+    return char
+
+
+def unescape(text):
+    """Replace HTML entities with the characters they stand for
+
+    Handles named, decimal and hex entities in one pass. Unknown entities
+    are left as they are. Unlike utils.descape the result isn't forced to
+    ascii.
+    """
+    if not text or '&' not in text:
+        return text
+    return _ENTITY.sub(_entity, text)
+
+
+def clean_text(text):
+    """Strip HTML tags and replace entities, in one pass
+
+    For descriptions in feeds, which often carry escaped HTML markup.
+    """
+    if not text:
+        return text
+    if '<' not in text and '&' not in text:
+        return text.strip()
+    return _TAG_OR_ENTITY.sub(_entity, text).strip()
+
+
+class _ChunkReader(object):
+    """File-like object reading from an iterable of bytes chunks"""
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _char_ref(m):
+    return _CHAR_REFS.get(m.group(1), m.group(0))
+
+
+class _EntityReader(object):
+    """File-like object replacing undeclared HTML entities as it reads
+
+    expat rejects entities such as &nbsp; that the document doesn't
+    declare, so they are turned into character references first. Others,
+    including those a DTD might declare, are left alone.
+    """
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self._pending = b''
+
+    def read(self, size=-1):
+        chunk = self._fileobj.read(size)
+        data, self._pending = self._pending + chunk, b''
+        if b'&' not in data:
+            return data
+        if chunk and size >= 0:
+            start = data.rfind(b'&')
+            if (len(data) - start <= _MAX_ENTITY and
+                    b';' not in data[start:]):
+                data, self._pending = data[:start], data[start:]
+                if not data:
+                    # Only part of an entity, so read on to the rest of it
+                    return self.read(size)
+        return _NAMED_ENTITY.sub(_char_ref, data)
+
+
+def _open(source):
+    """Return a file-like object for a response, file, bytes or chunks"""
+    if hasattr(source, 'read'):
+        return source
+    if hasattr(source, 'iter_content'):
+        return _ChunkReader(compression.iter_decoded(source))
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    return _ChunkReader(source)
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_elements(source, tag):
+    """Yield each element named tag from an XML document as it is parsed
+
+    source is a requests.Response (ideally from a stream=True request, so
+    the body isn't read up front), a file, bytes or an iterable of bytes
+    chunks. tag is matched against the local name, ignoring any
+    namespace, unless given in {namespace}name form.
+
+    Each element is cleared and dropped from the tree once the next one
+    is asked for, so memory use doesn't grow with the document. Take what
+    is needed from it before moving on.
+    """
+    match_local = not tag.startswith('{')
+    parents = []
+    for event, elem in ET.iterparse(_EntityReader(_open(source)),
+                                    events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            continue
+        parents.pop()
+        name = _local_name(elem.tag) if match_local else elem.tag
+        if name != tag:
+            continue
+        yield elem
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
+
+
+def _text(elem, path):
+    child = elem.find(path)
+    if child is None or child.text is None:
+        return None
+    return unescape(child.text.strip())
+
+
+def _mrss(name):
+    return '{%s}%s' % (MRSS_NAMESPACE, name)
+
+
+def rss_item(item):
+    """Return a dict of the useful parts of an RSS or Media RSS item
+
+    Keys are title, link, description (with HTML removed), guid, pub_date
+    (as in the feed), categories, thumbnail, enclosure (its attributes)
+    and media (attributes of each media:content, including those in a
+    media:group).
+    """
+    thumbnail = item.find('.//' + _mrss('thumbnail'))
+    enclosure = item.find('enclosure')
+    return {
+        'title': _text(item, 'title'),
+        'link': _text(item, 'link'),
+        'description': clean_text(item.findtext('description')),
+        'guid': _text(item, 'guid'),
+        'pub_date': _text(item, 'pubDate'),
+        'categories': [unescape(c.text.strip()) for c in
+                       item.findall('category') if c.text],
+        'thumbnail': None if thumbnail is None else thumbnail.get('url'),
+        'enclosure': None if enclosure is None else dict(enclosure.attrib),
+        'media': [dict(content.attrib) for content in
+                  item.iter(_mrss('content'))],
+    }
+
+
+def parse_rss(source):
+    """Yield rss_item() for each item of a feed, streamed from source"""
+    for item in iter_elements(source, 'item'):
+        yield rss_item(item)
+
+
+def xmltv_programme(programme):
+    """Return a dict of the useful parts of an XMLTV programme
+
+    Keys are channel, start and stop (as in the guide, e.g.
+    '20240101060000 +1000'), title, sub_title, desc, categories,
+    episode_num and icon.
+    """
+    icon = programme.find('icon')
+    return {
+        'channel': programme.get('channel'),
+        'start': programme.get('start'),
+        'stop': programme.get('stop'),
+        'title': _text(programme, 'title'),
+        'sub_title': _text(programme, 'sub-title'),
+        'desc': clean_text(programme.findtext('desc')),
+        'categories': [unescape(c.text.strip()) for c in
+                       programme.findall('category') if c.text],
+        'episode_num': _text(programme, 'episode-num'),
+        'icon': None if icon is None else icon.get('src'),
+    }
+
+
+def parse_xmltv(source):
+    """Yield xmltv_programme() for each programme, streamed from source"""
+    for programme in iter_elements(source, 'programme'):
+        yield xmltv_programme(programme)
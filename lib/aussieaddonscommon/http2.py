@@ -0,0 +1,183 @@
+import ssl
+import threading
+import time
+
+from aussieaddonscommon import ratelimit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.packages.urllib3.exceptions import MaxRetryError
+from requests.packages.urllib3.util import Retry
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+
+# httpx (with its http2 extra) is optional and not shipped with Kodi, so
+# add-ons fall back to HTTP/1.1 when it isn't installed. It takes a while
+# to import, so that is only done once HTTP/2 is asked for
+httpx = None
+
+
+# Connection specific headers, which aren't allowed in HTTP/2
+HOP_BY_HOP_HEADERS = frozenset(['connection', 'keep-alive', 'proxy-connection',
+                                'transfer-encoding', 'upgrade'])
+
+
+def is_available():
+    """Whether the HTTP/2 transport can be used, importing httpx if so"""
+    global httpx
+    if httpx is None:
+        try:
+            import h2  # noqa: F401
+            import httpx as module
+        except ImportError:
+            return False
+        httpx = module
+    return True
+
+
+def _map_exception(e, request):
+    """Translate an httpx exception into the requests equivalent"""
+    message = str(e) or e.__class__.__name__
+    if isinstance(e, httpx.ConnectTimeout):
+        return requests.exceptions.ConnectTimeout(message, request=request)
+    if isinstance(e, httpx.TimeoutException):
+        return requests.exceptions.ReadTimeout(message, request=request)
+    if isinstance(e, httpx.ProxyError):
+        return requests.exceptions.ProxyError(message, request=request)
+    if isinstance(e, httpx.ConnectError):
+        if 'SSL' in message or 'CERTIFICATE' in message:
+            return requests.exceptions.SSLError(message, request=request)
+        return requests.exceptions.ConnectionError(message, request=request)
+    if isinstance(e, httpx.UnsupportedProtocol):
+        return requests.exceptions.InvalidSchema(message, request=request)
+    if isinstance(e, httpx.DecodingError):
+        return requests.exceptions.ContentDecodingError(message,
+                                                        request=request)
+    return requests.exceptions.ConnectionError(message, request=request)
+
+
+def _ssl_context(verify, cert):
+    """Build the SSLContext for requests' verify and cert arguments"""
+    if verify is False and cert is None:
+        return False
+    if isinstance(verify, str):
+        context = ssl.create_default_context(cafile=verify)
+    else:
+        context = ssl.create_default_context()
+    if verify is False:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    if isinstance(cert, tuple):
+        context.load_cert_chain(*cert)
+    elif cert is not None:
+        context.load_cert_chain(cert)
+    return context
+
+
+class HTTP2Adapter(BaseAdapter):
+    """Transport adapter sending requests through an HTTP/2 httpx client
+
+    Concurrent requests to the same host from different threads are
+    multiplexed over a single connection, rather than each needing its own
+    pooled connection as with HTTP/1.1. Servers that don't offer HTTP/2
+    are spoken to over HTTP/1.1.
+
+    Responses are read in full, so stream=True is not supported.
+    max_retries is a count or a urllib3 Retry, as with HTTPAdapter. Failed
+    connections are retried by httpx, and responses with a status in the
+    Retry's status_forcelist are sent again after its backoff.
+    """
+    def __init__(self, max_retries=0, max_connections=10, http1=True):
+        if not is_available():
+            raise ImportError('HTTP/2 support needs httpx[http2] installed')
+        super(HTTP2Adapter, self).__init__()
+        self.max_retries = Retry.from_int(max_retries)
+        self.max_connections = max_connections
+        self.http1 = http1
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get_client(self, verify=True, cert=None, proxy=None):
+        """Return the client for a combination of TLS and proxy settings"""
+        key = (verify, cert, proxy)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                connect = self.max_retries.connect
+                if connect is None:
+                    connect = self.max_retries.total
+                transport = httpx.HTTPTransport(
+                    http1=self.http1, http2=True,
+                    verify=_ssl_context(verify, cert), proxy=proxy,
+                    retries=connect or 0,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections))
+                client = httpx.Client(transport=transport, trust_env=False)
+                self._clients[key] = client
+            return client
+
+    def send(self, request, stream=False, timeout=None, verify=True,
+             cert=None, proxies=None):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            timeout = httpx.Timeout(read, connect=connect)
+        else:
+            timeout = httpx.Timeout(timeout)
+        client = self.get_client(verify, cert,
+                                 select_proxy(request.url, proxies))
+        headers = [(k, v) for k, v in request.headers.items()
+                   if k.lower() not in HOP_BY_HOP_HEADERS]
+        retries = self.max_retries
+        while True:
+            try:
+                response = client.request(request.method, request.url,
+                                          headers=headers,
+                                          content=request.body,
+                                          timeout=timeout)
+            except httpx.HTTPError as e:
+                raise _map_exception(e, request)
+            resp = self.build_response(request, response)
+            retry_after = resp.headers.get('Retry-After')
+            if not retries.is_retry(request.method, resp.status_code,
+                                    bool(retry_after)):
+                return resp
+            try:
+                retries = retries.increment(request.method, request.url)
+            except MaxRetryError as e:
+                if not retries.raise_on_status:
+                    return resp
+                raise requests.exceptions.RetryError(e, request=request)
+            self._sleep(retries, resp.status_code, retry_after)
+
+    @staticmethod
+    def _sleep(retries, status_code, retry_after):
+        """Wait before a retry, as urllib3 does for HTTPAdapter"""
+        if (retries.respect_retry_after_header and
+                status_code in retries.RETRY_AFTER_STATUS_CODES):
+            seconds = ratelimit.parse_retry_after(retry_after)
+            if seconds is not None:
+                time.sleep(seconds)
+                return
+        retries.sleep()
+
+    def build_response(self, request, response):
+        resp = requests.Response()
+        resp.status_code = response.status_code
+        resp.reason = response.reason_phrase
+        resp.headers = CaseInsensitiveDict(response.headers.items())
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp._content = response.content
+        resp._content_consumed = True
+        resp.url = request.url
+        resp.request = request
+        resp.connection = self
+        resp.elapsed = response.elapsed
+        resp.http_version = response.http_version
+        resp.wire_bytes = response.num_bytes_downloaded
+        return resp
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.close()
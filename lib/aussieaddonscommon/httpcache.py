@@ -0,0 +1,157 @@
+import hashlib
+import threading
+import time
+
+from aussieaddonscommon import cache
+from aussieaddonscommon import utils
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Responses that are remembered briefly, so that repeatedly asking for
+# something that doesn't exist doesn't go back to the server every time
+NEGATIVE_STATUSES = (404, 410)
+
+# Request headers that can change the response, so responses are cached
+# separately for each combination of their values
+VARY_HEADERS = ('Accept', 'Accept-Language', 'Authorization', 'Cookie')
+
+
+class CachePolicy(object):
+    """How long GET responses are cached for and how stale copies are used
+
+    fresh_ttl            seconds a response is served without a request
+    stale_ttl            seconds after that a stale copy is kept around
+    stale_while_revalidate
+                         serve stale copies at once and refresh them in the
+                         background
+    stale_if_error       serve stale copies when the request fails
+    negative_ttl         seconds 404 and 410 responses are cached for
+    """
+    def __init__(self, fresh_ttl=0, stale_ttl=24 * 60 * 60,
+                 stale_while_revalidate=True, stale_if_error=True,
+                 negative_ttl=60):
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+        self.negative_ttl = negative_ttl
+
+
+class CacheEntry(object):
+    """A stored response, rebuilt into a requests.Response when served"""
+    def __init__(self, status_code, reason, headers, content, url, encoding,
+                 stored_at):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.url = url
+        self.encoding = encoding
+        self.stored_at = stored_at
+
+    @classmethod
+    def from_response(cls, response, now=None):
+        return cls(response.status_code, response.reason,
+                   dict(response.headers), response.content, response.url,
+                   response.encoding, time.time() if now is None else now)
+
+    @property
+    def is_negative(self):
+        return self.status_code in NEGATIVE_STATUSES
+
+    def age(self, now=None):
+        return (time.time() if now is None else now) - self.stored_at
+
+    def to_response(self, stale=False):
+        response = requests.Response()
+        response.status_code = self.status_code
+        response.reason = self.reason
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.content
+        response.url = self.url
+        response.encoding = self.encoding
+        response.from_cache = True
+        response.is_stale = stale
+        return response
+
+
+class ResponseCache(object):
+    """Cached GET responses, kept in a CacheStore between invocations"""
+    def __init__(self, store=None):
+        self._store = store
+        self._refreshing = set()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = cache.get_store()
+        return self._store
+
+    @staticmethod
+    def make_key(url, params=None, headers=None):
+        """Key for a GET of url
+
+        The values of any VARY_HEADERS in headers are hashed into the key,
+        so a response fetched with one user's credentials or cookies is
+        never served for another request, and the credentials themselves
+        aren't stored in the key.
+        """
+        if params:
+            url = requests.Request('GET', url, params=params).prepare().url
+        key = 'http:' + url
+        if headers:
+            headers = CaseInsensitiveDict(headers)
+            vary = '\n'.join(
+                '{0}: {1}'.format(name, headers[name])
+                for name in VARY_HEADERS if name in headers)
+            if vary:
+                key += '#' + hashlib.sha256(
+                    vary.encode('utf-8')).hexdigest()[:32]
+        return key
+
+    def get(self, key):
+        entry = self.store.get(key)
+        if isinstance(entry, CacheEntry):
+            return entry
+        return None
+
+    def set(self, key, response, policy, now=None):
+        entry = CacheEntry.from_response(response, now)
+        if entry.is_negative:
+            ttl = policy.negative_ttl
+        else:
+            ttl = policy.fresh_ttl + policy.stale_ttl
+        if ttl:
+            self.store.set(key, entry, ttl, now=now)
+        return entry
+
+    def refresh_in_background(self, key, fetch):
+        """Run fetch in a daemon thread, unless key is already refreshing"""
+        with self._lock:
+            if key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+            thread = threading.Thread(target=self._refresh, args=(key, fetch))
+            thread.daemon = True
+            self._threads.append(thread)
+        thread.start()
+        return thread
+
+    def _refresh(self, key, fetch):
+        try:
+            fetch()
+        except Exception as e:
+            utils.log('Background refresh failed: {0}'.format(e))
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def join(self, timeout=None):
+        """Wait for background refreshes, e.g. before the add-on exits"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
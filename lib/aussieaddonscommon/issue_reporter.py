@@ -2,12 +2,11 @@ import io
 import json
 import os
 import platform
-import re
 import sys
 import traceback
 from distutils.version import LooseVersion
 
-from aussieaddonscommon import utils
+from aussieaddonscommon import blacklist, ledger, redact, utils, windowcache
 
 from future.moves.urllib.error import HTTPError, URLError
 from future.moves.urllib.request import Request, urlopen
@@ -22,11 +21,14 @@ GIST_API_URL = 'https://api.github.com/gists'
 ORG_API_URL = 'https://api.github.com/orgs/aussieaddons/repos?per_page=100'
 
 # Filter out username and passwords from log files
-LOG_FILTERS = (
-    ('//.+?:.+?@', '//[FILTERED_USER]:[FILTERED_PASSWORD]@'),
-    ('<user>.+?</user>', '<user>[FILTERED_USER]</user>'),
-    ('<pass>.+?</pass>', '<pass>[FILTERED_PASSWORD]</pass>'),
-)
+LOG_FILTERS = redact.DEFAULT_RULES
+
+# Seconds connection info is cached for, short enough to notice a VPN
+# being turned on or off
+CONNECTION_INFO_TTL = 15 * 60
+
+# Connection info is kept in the add-on's own namespace
+_connection_cache = windowcache.get_cache()
 
 
 def make_request(url):
@@ -37,11 +39,13 @@ def make_request(url):
     })
 
 
+@_connection_cache.memoize(CONNECTION_INFO_TTL, key_prefix='connection_info')
 def get_connection_info():
     """Get connection details
 
     Fetch the details for the users Internet connection for logging
-    and filtering by country
+    and filtering by country. Successful results are kept in a window
+    property for CONNECTION_INFO_TTL seconds.
     """
     try:
         utils.log('Fetching connection information...')
@@ -71,9 +75,7 @@ def get_kodi_log():
     utils.log("Reading log file from \"%s\"" % log_file_path)
     with io.open(log_file_path, 'rb') as f:
         log_content = f.read().decode('utf-8')
-    for pattern, repl in LOG_FILTERS:
-        log_content = re.sub(pattern, repl, log_content)
-    return log_content
+    return redact.redact(log_content)
 
 
 def fetch_tags(github_repo):
@@ -117,37 +119,37 @@ def is_not_latest_version(current_version, latest_version):
 def not_already_reported(error):
     """Is the user allowed to send this error?
 
-    Check to see if our new error message is different from the last
-    successful error report. If it is, or the file doesn't exist, then
-    we'll return True
+    Check the report ledger to see if an error with the same fingerprint
+    (see ledger.fingerprint) has been reported recently. If it hasn't,
+    then we'll return True
     """
     try:
-        rfile = os.path.join(utils.get_file_dir(), 'last_report_error.txt')
-
-        if not os.path.isfile(rfile):
+        if ledger.get_ledger().is_allowed(error):
             return True
-        else:
-            f = io.open(rfile, 'rb')
-            report = f.read()
-            if report != error.encode('utf-8'):
-                return True
     except Exception as e:
-        utils.log("Error checking error report file: %s" % str(e))
+        utils.log("Error checking error report ledger: %s" % str(e))
         return False
 
-    utils.log("Not allowing error report. Last report matches this one")
+    utils.log("Not allowing error report. This error was already reported")
     return False
 
 
-def save_last_error_report(error):
-    """Save a copy of our last error report"""
+def save_last_error_report(error, summary=None):
+    """Record a successful error report in the report ledger"""
     try:
-        rfile = os.path.join(utils.get_file_dir(), 'last_report_error.txt')
-        with io.open(rfile, 'wb') as f:
-            f.write(error)
-            return rfile
+        report_ledger = ledger.get_ledger()
+        report_ledger.record_report(error, summary)
+        return report_ledger.path
     except Exception:
-        utils.log("Error writing error report file")
+        utils.log("Error writing error report ledger")
+
+
+def record_error(error, summary=None):
+    """Count an occurrence of an error in the report ledger"""
+    try:
+        ledger.get_ledger().record_seen(error, summary)
+    except Exception as e:
+        utils.log("Error writing error report ledger: %s" % str(e))
 
 
 def get_org_repos():
@@ -175,16 +177,12 @@ def is_reportable(exc_type, exc_value, exc_traceback, force=False):
       * we are under test.
     """
 
-    # AttributeError: global name 'foo' is not defined
-    error = '%s: %s' % (
-        exc_type.__name__, ', '.join(
-            utils.ensure_ascii(x) for x in exc_value.args))
-
     # Don't show any dialogs when user cancels
     if exc_type.__name__ == 'SystemExit':
         return False
 
     # Work out if we should allow an error report
+    error = ledger.fingerprint(exc_type, exc_value, exc_traceback)
     if not not_already_reported(error):
         return False
 
@@ -231,34 +229,9 @@ def blacklisted_hostname(connection_info):
 
     Some VPNs/proxys are known to content providers and will return 403
     responses. Blacklisting these to avoid issues reports caused by this.
+    The blacklist itself lives in data/vpn_blacklist.txt.
     """
-    org_blacklist = ['highwinds',
-                     'softlayer',
-                     'micfo',
-                     'total server solutions',  # PIA
-                     'host universal pty ltd',  # NordVPN
-                     'AS45671']  # serversaustralia.com.au
-
-    hostname_blacklist = ['ipvanish',
-                          'zoogvpn',
-                          'sl-reverse']
-
-    if not connection_info:
-        return False
-
-    org = connection_info.get('org')
-    if org:
-        for item in org_blacklist:
-            if item in org.lower():
-                return True
-
-    hostname = connection_info.get('hostname')
-    if hostname:
-        for item in hostname_blacklist:
-            if item in hostname:
-                return True
-
-    return False
+    return blacklist.get_blacklist().is_blacklisted(connection_info)
 
 
 def generate_report(title, log_url=None, trace=None, connection_info={}):
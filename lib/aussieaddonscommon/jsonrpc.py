@@ -0,0 +1,218 @@
+import json
+import threading
+import time
+
+from aussieaddonscommon.exceptions import AussieAddonsException
+
+import xbmc
+
+# How long results of read only calls are reused for, in seconds
+CACHE_TTL = 5
+
+
+class JSONRPCError(AussieAddonsException):
+    """Error response from Kodi's JSON-RPC interface"""
+    def __init__(self, message, code=None, method=None):
+        super(JSONRPCError, self).__init__(
+            '{0}: {1}'.format(method, message) if method else message)
+        self.code = code
+        self.method = method
+
+
+def is_cacheable(method):
+    """Only read only methods, i.e. Foo.GetBar, are cached"""
+    return method.rpartition('.')[2].startswith('Get')
+
+
+class Call(object):
+    """A single method call, which may be part of a batch"""
+    def __init__(self, method, params=None, cache=True):
+        self.method = method
+        self.params = params or {}
+        self.cache = cache and is_cacheable(method)
+        self.done = False
+        self._result = None
+        self._error = None
+
+    @property
+    def cache_key(self):
+        return self.method, json.dumps(self.params, sort_keys=True)
+
+    def request(self, request_id):
+        return {'jsonrpc': '2.0', 'id': request_id, 'method': self.method,
+                'params': self.params}
+
+    def set_response(self, response):
+        self.done = True
+        if not isinstance(response, dict):
+            self._error = JSONRPCError('Invalid response', method=self.method)
+        elif 'error' in response:
+            error = response['error'] or {}
+            self._error = JSONRPCError(error.get('message', 'Unknown error'),
+                                       code=error.get('code'),
+                                       method=self.method)
+        else:
+            self._result = response.get('result')
+
+    def set_result(self, result):
+        self.done = True
+        self._result = result
+
+    @property
+    def result(self):
+        """The result of the call, raising JSONRPCError if it failed"""
+        if not self.done:
+            raise JSONRPCError('Call has not been executed',
+                               method=self.method)
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class Batch(object):
+    """Collect calls to send to Kodi in one round trip
+
+    Usable as a context manager, which executes the batch on exit:
+
+        with client.batch() as batch:
+            volume = batch.call('Application.GetProperties',
+                                {'properties': ['volume']})
+        print(volume.result)
+    """
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def call(self, method, params=None, cache=True):
+        call = Call(method, params, cache)
+        self.calls.append(call)
+        return call
+
+    def execute(self):
+        self.client.execute(self.calls)
+        return self.calls
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        if exc_type is None:
+            self.client.execute(self.calls)
+
+
+class JSONRPCClient(object):
+    """Client for Kodi's JSON-RPC interface
+
+    Calls can be grouped into JSON-RPC 2.0 batches so that many of them are
+    sent with one xbmc.executeJSONRPC call. Results of read only methods
+    are cached for cache_ttl seconds.
+    """
+    def __init__(self, cache_ttl=CACHE_TTL):
+        self.cache_ttl = cache_ttl
+        self.round_trips = 0
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _send(self, payload):
+        self.round_trips += 1
+        return json.loads(xbmc.executeJSONRPC(json.dumps(payload)))
+
+    def _cache_get(self, call, now):
+        entry = self._cache.get(call.cache_key)
+        if entry is not None and entry[0] > now:
+            return True, entry[1]
+        return False, None
+
+    def _cache_set(self, call, now):
+        if call.cache and self.cache_ttl and call._error is None:
+            with self._lock:
+                self._cache[call.cache_key] = (now + self.cache_ttl,
+                                               call._result)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def execute(self, calls):
+        """Send any calls not answered by the cache in a single request"""
+        now = time.time()
+        pending = []
+        for call in calls:
+            if call.cache:
+                hit, result = self._cache_get(call, now)
+                if hit:
+                    call.set_result(result)
+                    continue
+            pending.append(call)
+
+        if len(pending) == 1:
+            pending[0].set_response(self._send(pending[0].request(0)))
+        elif pending:
+            responses = self._send([c.request(i)
+                                    for i, c in enumerate(pending)])
+            if isinstance(responses, list):
+                by_id = dict((r.get('id'), r) for r in responses
+                             if isinstance(r, dict))
+                for i, call in enumerate(pending):
+                    call.set_response(by_id.get(i))
+            else:
+                # No batch support, so fall back to one call at a time
+                for call in pending:
+                    call.set_response(self._send(call.request(0)))
+
+        for call in pending:
+            self._cache_set(call, now)
+
+    def batch(self):
+        return Batch(self)
+
+    def call(self, method, params=None, cache=True):
+        """Make a single call and return its result"""
+        call = Call(method, params, cache)
+        self.execute([call])
+        return call.result
+
+    def get_setting_value(self, setting, cache=True):
+        return self.call('Settings.GetSettingValue',
+                         {'setting': setting}, cache=cache)['value']
+
+    def get_setting_values(self, settings, cache=True):
+        """Fetch several settings at once, skipping any that fail"""
+        batch = self.batch()
+        calls = [(s, batch.call('Settings.GetSettingValue', {'setting': s},
+                                cache=cache)) for s in settings]
+        self.execute(batch.calls)
+        values = {}
+        for setting, call in calls:
+            try:
+                values[setting] = call.result['value']
+            except (JSONRPCError, KeyError, TypeError):
+                continue
+        return values
+
+    def get_application_properties(self, properties, cache=True):
+        return self.call('Application.GetProperties',
+                         {'properties': list(properties)}, cache=cache)
+
+    def get_info_labels(self, labels, cache=True):
+        return self.call('XBMC.GetInfoLabels',
+                         {'labels': list(labels)}, cache=cache)
+
+    def get_active_players(self):
+        return self.call('Player.GetActivePlayers', cache=False)
+
+    def get_player_properties(self, player_id, properties):
+        return self.call('Player.GetProperties',
+                         {'playerid': player_id,
+                          'properties': list(properties)}, cache=False)
+
+
+_client = None
+
+
+def get_client():
+    """Return the shared client for this invocation"""
+    global _client
+    if _client is None:
+        _client = JSONRPCClient()
+    return _client
@@ -0,0 +1,137 @@
+import os
+import sqlite3
+import threading
+import time
+
+from aussieaddonscommon import signature, utils
+
+LEDGER_FILE = 'report_ledger.db'
+
+# Keep enough history to cover a user cycling through a handful of errors,
+# without the file growing forever
+MAX_ENTRIES = 200
+
+# Don't allow the same error to be reported more than once a week
+MIN_REPORT_INTERVAL = 7 * 24 * 60 * 60
+
+
+def fingerprint(exc_type, exc_value, exc_traceback):
+    """Build a stable hash identifying an error
+
+    See signature.ErrorSignature for what makes up the hash.
+    """
+    return signature.ErrorSignature(exc_type, exc_value,
+                                    exc_traceback).digest
+
+
+class ReportLedger(object):
+    """SQLite backed record of errors seen and reported
+
+    Each fingerprint is stored once with a count and first/last seen and
+    last reported timestamps. Lookups are by primary key, and the least
+    recently seen entries are evicted once there are more than max_entries.
+    """
+    def __init__(self, path, max_entries=MAX_ENTRIES,
+                 min_interval=MIN_REPORT_INTERVAL):
+        self.path = path
+        self.max_entries = max_entries
+        self.min_interval = min_interval
+        self._local = threading.local()
+
+    @property
+    def conn(self):
+        # sqlite3 connections can't be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # A generous timeout lets concurrent add-on invocations wait for
+            # each other's writes rather than failing
+            conn = sqlite3.connect(self.path, timeout=5)
+            with conn:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS reports ('
+                    'fingerprint TEXT PRIMARY KEY, '
+                    'summary TEXT, '
+                    'count INTEGER NOT NULL DEFAULT 0, '
+                    'first_seen REAL, '
+                    'last_seen REAL, '
+                    'reported_at REAL)')
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def get(self, fp):
+        """Return the ledger entry for a fingerprint as a dict, or None"""
+        row = self.conn.execute(
+            'SELECT summary, count, first_seen, last_seen, reported_at '
+            'FROM reports WHERE fingerprint = ?', (fp,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('summary', 'count', 'first_seen', 'last_seen',
+                         'reported_at'), row))
+
+    def _upsert(self, fp, summary, now, reported=False):
+        with self.conn as conn:
+            cur = conn.execute(
+                'UPDATE reports SET count = count + ?, last_seen = ?, '
+                'summary = COALESCE(?, summary), '
+                'reported_at = CASE WHEN ? THEN ? ELSE reported_at END '
+                'WHERE fingerprint = ?',
+                (0 if reported else 1, now, summary, reported, now, fp))
+            if cur.rowcount:
+                return
+            conn.execute(
+                'INSERT INTO reports (fingerprint, summary, count, '
+                'first_seen, last_seen, reported_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (fp, summary, 0 if reported else 1, now, now,
+                 now if reported else None))
+            self._evict(conn)
+
+    def _evict(self, conn):
+        count = conn.execute('SELECT COUNT(*) FROM reports').fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(
+                'DELETE FROM reports WHERE fingerprint IN ('
+                'SELECT fingerprint FROM reports '
+                'ORDER BY last_seen ASC LIMIT ?)',
+                (count - self.max_entries,))
+
+    def record_seen(self, fp, summary=None, now=None):
+        """Count an occurrence of an error"""
+        self._upsert(fp, summary, time.time() if now is None else now)
+
+    def record_report(self, fp, summary=None, now=None):
+        """Mark an error as successfully reported"""
+        self._upsert(fp, summary, time.time() if now is None else now,
+                     reported=True)
+
+    def is_allowed(self, fp, now=None):
+        """Can this error be reported?
+
+        Returns False if it has already been reported within min_interval.
+        """
+        row = self.conn.execute(
+            'SELECT reported_at FROM reports WHERE fingerprint = ?',
+            (fp,)).fetchone()
+        if row is None or row[0] is None:
+            return True
+        if now is None:
+            now = time.time()
+        return now - row[0] >= self.min_interval
+
+
+_ledger = None
+
+
+def get_ledger():
+    """Return the ledger stored in the add-on working directory"""
+    global _ledger
+    if _ledger is None:
+        _ledger = ReportLedger(os.path.join(utils.get_file_dir(),
+                                            LEDGER_FILE))
+    return _ledger
@@ -0,0 +1,159 @@
+import itertools
+import sys
+
+from aussieaddonscommon import utils
+
+from future.moves.urllib.parse import quote_plus
+from future.utils import iteritems, text_type
+
+import xbmcgui
+
+import xbmcplugin
+
+# Number of items passed to each addDirectoryItems call when streaming
+CHUNK_SIZE = 500
+
+
+class UrlEncoder(object):
+    """Bulk version of utils.make_url
+
+    Keys, which are usually repeated across every item of a listing, are
+    only quoted once, and values that are already ascii skip the unicode
+    normalisation done by utils.ensure_ascii.
+    """
+    def __init__(self):
+        self._keys = {}
+
+    def quote_value(self, value):
+        if not isinstance(value, (str, text_type)):
+            value = text_type(value)
+        try:
+            value.encode('ascii')
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            value = utils.ensure_ascii(value)
+        return quote_plus(value)
+
+    def encode(self, params):
+        pairs = []
+        for k, v in iteritems(params):
+            key = self._keys.get(k)
+            if key is None:
+                key = self._keys[k] = quote_plus(k)
+            pairs.append('%s=%s' % (key, self.quote_value(v)))
+        return '&'.join(pairs)
+
+    def encode_all(self, dicts):
+        return [self.encode(d) for d in dicts]
+
+
+class LabelNormalizer(object):
+    """Memoised utils.descape for labels, which repeat a lot in listings"""
+    def __init__(self):
+        self._cache = {}
+
+    def __call__(self, label):
+        if not label:
+            return ''
+        result = self._cache.get(label)
+        if result is None:
+            result = self._cache[label] = utils.descape(label)
+        return result
+
+
+def make_list_item(label, label2='', path=''):
+    try:
+        # offscreen skips locking the GUI for each item (Kodi 18+)
+        return xbmcgui.ListItem(label=label, label2=label2, path=path,
+                                offscreen=True)
+    except TypeError:
+        return xbmcgui.ListItem(label=label, label2=label2, path=path)
+
+
+class ListingBuilder(object):
+    """Build and submit Kodi directory listings in bulk
+
+    Items are dicts with the following keys, all optional except label:
+      label, label2   shown in the listing, converted to ascii
+      params          dict of plugin URL parameters, encoded with make_url
+      url             used as is instead of building one from params
+      is_folder       defaults to True
+      is_playable     sets the IsPlayable property
+      art             passed to ListItem.setArt
+      info            passed to ListItem.setInfo, with info_type
+      info_type       defaults to 'video'
+      properties      passed to ListItem.setProperty
+    """
+    def __init__(self, handle=None, base_url=None):
+        self.handle = int(sys.argv[1]) if handle is None else handle
+        self.base_url = sys.argv[0] if base_url is None else base_url
+        self.encoder = UrlEncoder()
+        self.normalize = LabelNormalizer()
+
+    def build_url(self, item):
+        url = item.get('url')
+        if url is None:
+            url = '%s?%s' % (self.base_url,
+                             self.encoder.encode(item.get('params', {})))
+        return url
+
+    def build_item(self, item):
+        """Return a (url, ListItem, is_folder) tuple for one item"""
+        url = self.build_url(item)
+        li = make_list_item(self.normalize(item.get('label')),
+                            self.normalize(item.get('label2')))
+        if item.get('art'):
+            li.setArt(item['art'])
+        if item.get('info'):
+            li.setInfo(item.get('info_type', 'video'), item['info'])
+        is_folder = item.get('is_folder', True)
+        if item.get('is_playable'):
+            li.setProperty('IsPlayable', 'true')
+            is_folder = False
+        for key, value in iteritems(item.get('properties', {})):
+            li.setProperty(key, value)
+        return url, li, is_folder
+
+    def build(self, items):
+        """Lazily build directory item tuples from item dicts"""
+        for item in items:
+            yield self.build_item(item)
+
+    def add_items(self, items, total=None, chunk_size=None):
+        """Submit items with as few addDirectoryItems calls as possible
+
+        Lists and tuples go in one call. Other iterables, such as
+        generators, are streamed in chunks of chunk_size (CHUNK_SIZE by
+        default) so large listings don't have to be held in memory and
+        start showing sooner. Returns the number of items added.
+        """
+        if isinstance(items, (list, tuple)) and chunk_size is None:
+            built = [self.build_item(item) for item in items]
+            xbmcplugin.addDirectoryItems(self.handle, built,
+                                         total or len(built))
+            return len(built)
+
+        count = 0
+        built = self.build(items)
+        while True:
+            chunk = list(itertools.islice(built, chunk_size or CHUNK_SIZE))
+            if not chunk:
+                break
+            xbmcplugin.addDirectoryItems(self.handle, chunk, total or 0)
+            count += len(chunk)
+        return count
+
+    def end(self, succeeded=True, cache=True, content=None):
+        if content:
+            xbmcplugin.setContent(self.handle, content)
+        xbmcplugin.endOfDirectory(self.handle, succeeded=succeeded,
+                                  cacheToDisc=cache)
+
+
+def add_items(items, handle=None, base_url=None, content=None, end=True,
+              **kwargs):
+    """Build and add a listing in one go, optionally ending the directory"""
+    builder = ListingBuilder(handle, base_url)
+    count = builder.add_items(items, **kwargs)
+    if end:
+        builder.end(content=content)
+    return count
@@ -0,0 +1,159 @@
+import json
+import threading
+import time
+
+from aussieaddonscommon import compression
+from aussieaddonscommon import utils
+
+from future.moves.urllib.parse import urlparse
+
+
+class RequestMetrics(object):
+    """Timing and transfer figures for one Session request
+
+    total      seconds from sending the request to having the whole body
+    ttfb       seconds until the response headers arrived, including any
+               connect, TLS handshake and retries
+    bytes      bytes read from the network (before decompression)
+    decoded    bytes of body after decompression, once it has been read
+    retries    number of retries urllib3 made
+    reused     whether a pooled keep-alive connection was used, or None if
+               the transport can't tell
+    status     final HTTP status, or None if no response was received
+    error      exception message if the request failed
+    """
+    __slots__ = ('method', 'url', 'host', 'started', 'total', 'ttfb',
+                 'bytes', 'decoded', 'retries', 'reused', 'status', 'error')
+
+    def __init__(self, method, url, started=None):
+        self.method = method.upper()
+        self.url = url
+        self.host = urlparse(url).netloc
+        self.started = time.time() if started is None else started
+        self.total = None
+        self.ttfb = None
+        self.bytes = 0
+        self.decoded = 0
+        self.retries = 0
+        self.reused = None
+        self.status = None
+        self.error = None
+
+    def on_response(self, response, **kwargs):
+        """requests response hook, called before the body is read"""
+        if self.ttfb is None:
+            self.ttfb = time.time() - self.started
+            raw = response.raw
+            conn = getattr(raw, 'connection', None) or getattr(
+                raw, '_connection', None)
+            if conn is not None:
+                self.reused = getattr(conn, '_metrics_used', False)
+                conn._metrics_used = True
+            retries = getattr(raw, 'retries', None)
+            if retries is not None:
+                self.retries = len(getattr(retries, 'history', ()))
+        return response
+
+    def finish(self, response=None, error=None):
+        self.total = time.time() - self.started
+        if response is not None:
+            self.status = response.status_code
+            self.bytes = compression.wire_bytes(response)
+            if response._content:
+                self.decoded = len(response._content)
+        if error is not None:
+            self.error = str(error)
+        return self
+
+    def to_dict(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+    def __str__(self):
+        return ('{0} {1} {2}: {3:.0f}ms total, {4}ms to first byte, '
+                '{5} bytes, {6} retries, {7}'.format(
+                    self.method, self.url, self.status or self.error,
+                    (self.total or 0) * 1000,
+                    '?' if self.ttfb is None else '%.0f' % (self.ttfb * 1000),
+                    self.bytes, self.retries,
+                    {True: 'reused connection', False: 'new connection',
+                     None: 'connection unknown'}[self.reused]))
+
+
+class LogSink(object):
+    """Write each request's metrics to the Kodi log"""
+    def __call__(self, metrics):
+        utils.log(str(metrics))
+
+
+class JSONLinesSink(object):
+    """Append each request's metrics to a file as one JSON object per line"""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, metrics):
+        line = json.dumps(metrics.to_dict(), sort_keys=True) + '\n'
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line)
+
+
+class HostSummary(object):
+    __slots__ = ('requests', 'errors', 'total', 'slowest', 'bytes',
+                 'retries', 'reused')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.bytes = 0
+        self.retries = 0
+        self.reused = 0
+
+
+class SummarySink(object):
+    """Aggregate metrics per host over an add-on invocation"""
+    def __init__(self):
+        self.hosts = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, metrics):
+        with self._lock:
+            summary = self.hosts.get(metrics.host)
+            if summary is None:
+                summary = self.hosts[metrics.host] = HostSummary()
+            summary.requests += 1
+            if metrics.error is not None:
+                summary.errors += 1
+            summary.total += metrics.total or 0
+            summary.slowest = max(summary.slowest, metrics.total or 0)
+            summary.bytes += metrics.bytes
+            summary.retries += metrics.retries
+            if metrics.reused:
+                summary.reused += 1
+
+    def summary(self):
+        """Lines describing each host, slowest overall first"""
+        with self._lock:
+            hosts = sorted(self.hosts.items(), key=lambda h: -h[1].total)
+        return ['{0}: {1} requests ({2} failed, {3} reused), {4:.0f}ms total, '
+                '{5:.0f}ms slowest, {6} bytes, {7} retries'.format(
+                    host, s.requests, s.errors, s.reused, s.total * 1000,
+                    s.slowest * 1000, s.bytes, s.retries)
+                for host, s in hosts]
+
+    def log_summary(self):
+        for line in self.summary():
+            utils.log('Request summary: {0}'.format(line))
+
+
+_summary = None
+
+
+def get_summary():
+    """Return the shared per-invocation summary sink"""
+    global _summary
+    if _summary is None:
+        _summary = SummarySink()
+    return _summary
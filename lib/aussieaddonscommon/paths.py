@@ -0,0 +1,170 @@
+import contextlib
+import errno
+import mmap
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+from aussieaddonscommon import utils
+
+import xbmc
+
+
+def makedirs(path):
+    """Create a directory and any parents, ignoring it already existing
+
+    Tolerates another add-on invocation creating it at the same time.
+    """
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        if e.errno != errno.EEXIST or not os.path.isdir(path):
+            raise
+    return path
+
+
+def atomic_write(path, data):
+    """Write data to a file so that readers only see old or new contents
+
+    The data is written to a temporary file in the same directory, which
+    then replaces the original in one rename.
+    """
+    dirname, basename = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix='.%s.' % basename, dir=dirname)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        replace = getattr(os, 'replace', None)
+        if replace is not None:
+            replace(tmp_path, path)
+        else:
+            # Python 2 on Windows can't rename over an existing file
+            if os.name == 'nt' and os.path.exists(path):
+                os.remove(path)
+            os.rename(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+@contextlib.contextmanager
+def open_mapped(path):
+    """Memory map a file read only, for large cached files
+
+    Yields an mmap object supporting slicing and find() without reading
+    the whole file into memory. Empty files, which can't be mapped, yield
+    an empty bytes object.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+@contextlib.contextmanager
+def file_lock(path, timeout=10):
+    """Hold an exclusive lock on a file, for coordinating add-on processes
+
+    Blocks until the lock is free, or raises IOError after timeout seconds
+    on Windows, where locks can't be waited on indefinitely.
+    """
+    with open(path, 'a+') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            deadline = time.time() + timeout
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except IOError:
+                    if time.time() > deadline:
+                        raise
+                    time.sleep(0.01)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class AddonPaths(object):
+    """Working directories of the running add-on
+
+    Each directory is resolved and created the first time it is used and
+    then remembered, so repeated lookups don't touch Kodi or the disk.
+    """
+    def __init__(self, addon_id=None):
+        self._addon_id = addon_id
+        self._paths = {}
+        self._lock = threading.Lock()
+
+    @property
+    def addon_id(self):
+        if self._addon_id is None:
+            self._addon_id = utils.get_addon_id()
+        return self._addon_id
+
+    def _get(self, name, resolve):
+        path = self._paths.get(name)
+        if path is None:
+            with self._lock:
+                path = self._paths.get(name)
+                if path is None:
+                    path = self._paths[name] = makedirs(resolve())
+        return path
+
+    @property
+    def temp(self):
+        """Temporary directory, special://temp/<addon id>"""
+        return self._get('temp', lambda: os.path.join(
+            xbmc.translatePath('special://temp/'), self.addon_id))
+
+    @property
+    def profile(self):
+        """Add-on data directory, which is kept across restarts"""
+        return self._get('profile', lambda: xbmc.translatePath(
+            utils.get_addon().getAddonInfo('profile')))
+
+    @property
+    def cache(self):
+        """Cache directory inside the temp directory"""
+        return self._get('cache', lambda: os.path.join(self.temp, 'cache'))
+
+
+_paths = None
+
+
+def get_paths():
+    """Return the shared paths of the running add-on"""
+    global _paths
+    if _paths is None:
+        _paths = AddonPaths()
+    return _paths
+
+
+def reset():
+    """Forget the resolved paths"""
+    global _paths
+    _paths = None
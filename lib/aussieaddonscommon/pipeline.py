@@ -0,0 +1,256 @@
+import threading
+import time
+
+from aussieaddonscommon import utils
+
+from future.moves.queue import Empty, Full, Queue
+
+# Items a threaded stage works ahead of its consumer by
+QUEUE_SIZE = 32
+
+_DONE = object()
+
+
+class StageStats(object):
+    """Counters for one pipeline stage
+
+    items      items the stage has output
+    busy       seconds spent in the stage's own work, summed over threads
+    first      seconds from the pipeline starting to the first output
+    """
+    __slots__ = ('name', 'items', 'busy', 'first', '_lock')
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.first = None
+        self._lock = threading.Lock()
+
+    def add(self, busy):
+        with self._lock:
+            self.busy += busy
+
+    def output(self, started):
+        with self._lock:
+            self.items += 1
+            if self.first is None:
+                self.first = time.time() - started
+
+    def __str__(self):
+        return '{0}: {1} items, {2:.0f}ms busy, first after {3}'.format(
+            self.name, self.items, self.busy * 1000,
+            'never' if self.first is None else '%.0fms' % (self.first * 1000))
+
+
+class _Slot(object):
+    """Result of one item in a threaded stage, filled in by a worker"""
+    __slots__ = ('item', 'result', 'error', 'ready')
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.ready = threading.Event()
+
+
+class Pipeline(object):
+    """Streaming fetch, parse, transform and render stages
+
+    Each stage is a generator pulling from the one before, so items flow
+    through one at a time and the first reaches the end (such as
+    ListingBuilder.add_items) before the last has been fetched. Nothing
+    holds the whole listing in memory unless a stage does.
+
+    Stages with workers run their function on that many threads, keeping
+    results in order. At most queue_size items are in flight, so a fast
+    stage can't run far ahead of a slow consumer.
+
+    Stages are added with map(), flat_map(), filter() and stage(), which
+    return the pipeline for chaining. Iterate over the pipeline once to
+    run it; stats then has a StageStats for each stage.
+
+        items = (Pipeline(page_urls)
+                 .map(session.get, workers=4, name='fetch')
+                 .flat_map(lambda r: r.json()['items'], name='parse')
+                 .map(make_item, name='transform'))
+        builder.add_items(items)
+        items.log_stats()
+    """
+    def __init__(self, source):
+        self.source = source
+        self.stats = []
+        self._stages = []
+        self._started = None
+
+    def _add(self, name, build):
+        stats = StageStats(name or 'stage %d' % (len(self._stages) + 1))
+        self.stats.append(stats)
+        self._stages.append((stats, build))
+        return self
+
+    def map(self, func, name=None, workers=0, queue_size=QUEUE_SIZE):
+        """Apply func to each item"""
+        if workers:
+            return self._add(name, lambda items, stats: self._threaded(
+                items, stats, func, workers, queue_size))
+        return self._add(name, lambda items, stats: self._mapped(
+            items, stats, func))
+
+    def flat_map(self, func, name=None, workers=0, queue_size=QUEUE_SIZE):
+        """Apply func to each item, outputting every item it returns"""
+        self.map(func, name, workers, queue_size)
+        stats, build = self._stages[-1]
+        self._stages[-1] = (stats, lambda items, stats: _flatten(
+            build(items, stats)))
+        return self
+
+    def filter(self, predicate, name=None):
+        """Keep only items for which predicate is true"""
+        def build(items, stats):
+            for item in items:
+                start = time.time()
+                keep = predicate(item)
+                stats.add(time.time() - start)
+                if keep:
+                    yield item
+        return self._add(name, build)
+
+    def stage(self, func, name=None):
+        """Add a generator function taking and returning an iterable
+
+        For stages that don't work item by item, such as a streaming
+        parser. Time spent waiting on earlier stages isn't counted.
+        """
+        def build(items, stats):
+            upstream = _Timed(items)
+            output = iter(func(upstream))
+            while True:
+                start = time.time()
+                waited = upstream.waited
+                try:
+                    item = next(output)
+                except StopIteration:
+                    stats.add(time.time() - start -
+                              (upstream.waited - waited))
+                    return
+                stats.add(time.time() - start - (upstream.waited - waited))
+                yield item
+        return self._add(name, build)
+
+    def _mapped(self, items, stats, func):
+        for item in items:
+            start = time.time()
+            result = func(item)
+            stats.add(time.time() - start)
+            yield result
+
+    def _threaded(self, items, stats, func, workers, queue_size):
+        pending = Queue(queue_size)
+        work = Queue()
+        cancelled = threading.Event()
+
+        def put(slot):
+            """Wait for room in the queue, unless the consumer has gone"""
+            while not cancelled.is_set():
+                try:
+                    pending.put(slot, timeout=0.1)
+                    return True
+                except Full:
+                    pass
+            return False
+
+        def feed():
+            try:
+                for item in items:
+                    slot = _Slot(item)
+                    if not put(slot):
+                        return
+                    work.put(slot)
+            except Exception as e:
+                slot = _Slot(None)
+                slot.error = e
+                slot.ready.set()
+                put(slot)
+            finally:
+                for _ in range(workers):
+                    work.put(_DONE)
+                put(_DONE)
+
+        def run():
+            while True:
+                slot = work.get()
+                if slot is _DONE:
+                    return
+                start = time.time()
+                try:
+                    slot.result = func(slot.item)
+                except Exception as e:
+                    slot.error = e
+                stats.add(time.time() - start)
+                slot.item = None
+                slot.ready.set()
+
+        threads = [threading.Thread(target=feed)]
+        threads.extend(threading.Thread(target=run) for _ in range(workers))
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        try:
+            while True:
+                slot = pending.get()
+                if slot is _DONE:
+                    return
+                slot.ready.wait()
+                if slot.error is not None:
+                    raise slot.error
+                yield slot.result
+        finally:
+            # Unblock the feeder if the consumer stopped early
+            cancelled.set()
+            try:
+                while True:
+                    pending.get_nowait()
+            except Empty:
+                pass
+
+    def _counted(self, items, stats):
+        for item in items:
+            stats.output(self._started)
+            yield item
+
+    def __iter__(self):
+        self._started = time.time()
+        items = iter(self.source)
+        for stats, build in self._stages:
+            items = self._counted(build(items, stats), stats)
+        return items
+
+    def log_stats(self):
+        for stats in self.stats:
+            utils.log('Pipeline {0}'.format(stats))
+
+
+def _flatten(iterables):
+    for iterable in iterables:
+        for item in iterable:
+            yield item
+
+
+class _Timed(object):
+    """Iterator wrapper adding up the time spent waiting on next()"""
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+        self.waited = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.time()
+        try:
+            return next(self._iterator)
+        finally:
+            self.waited += time.time() - start
+
+    next = __next__
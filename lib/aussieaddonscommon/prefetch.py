@@ -0,0 +1,132 @@
+import heapq
+import itertools
+import threading
+import time
+
+from aussieaddonscommon import utils
+
+# Requests made at once, kept low to leave bandwidth for what the user is
+# waiting on
+CONCURRENCY = 2
+
+# Stop prefetching once this many bytes of responses have been fetched
+BYTE_BUDGET = 2 * 1024 * 1024
+
+
+class Prefetcher(object):
+    """Fetch URLs the user is likely to open next into the response cache
+
+    After rendering a listing, an add-on adds the URLs behind the first
+    item or the next page, calls xbmcplugin.endOfDirectory() and then
+    finish(), which gives the prefetches a few seconds before cancelling
+    whatever is left. When the user clicks, the next invocation's Session
+    finds the response in its cache instead of going to the network.
+
+    session must have a cache_policy, and should have a response cache
+    kept on disk (the default) so it outlives the invocation. Lower
+    priority values are fetched first, by at most concurrency background
+    threads, until byte_budget bytes have been fetched. URLs with a fresh
+    cached response are skipped.
+    """
+    def __init__(self, session, concurrency=CONCURRENCY,
+                 byte_budget=BYTE_BUDGET):
+        if session.cache_policy is None:
+            raise ValueError('Prefetching needs a Session with a cache '
+                             'policy')
+        self.session = session
+        self.concurrency = concurrency
+        self.byte_budget = byte_budget
+        self.fetched = 0
+        self.failed = 0
+        self.bytes = 0
+        self._queue = []
+        self._seen = set()
+        self._counter = itertools.count()
+        self._threads = []
+        self._workers = 0
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cancel()
+
+    def add(self, url, params=None, priority=0):
+        """Queue a GET request, returning False if it won't be made"""
+        key = self.session._cache_key(url, params=params)
+        with self._lock:
+            if (self._cancelled.is_set() or key in self._seen or
+                    self.bytes >= self.byte_budget):
+                return False
+            self._seen.add(key)
+            heapq.heappush(self._queue, (priority, next(self._counter), key,
+                                         url, params))
+            if self._workers < min(self.concurrency, len(self._queue)):
+                self._workers += 1
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                self._threads.append(thread)
+                thread.start()
+        return True
+
+    def _next(self):
+        with self._lock:
+            if (self._cancelled.is_set() or not self._queue or
+                    self.bytes >= self.byte_budget):
+                # Decided under the lock, so add() starts another worker
+                # for anything queued after this
+                self._workers -= 1
+                return None
+            return heapq.heappop(self._queue)
+
+    def _work(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            _, _, key, url, params = item
+            entry = self.session.response_cache.get(key)
+            if (entry is not None and not entry.is_negative and
+                    entry.age() < self.session.cache_policy.fresh_ttl):
+                continue
+            try:
+                response = self.session._fetch_and_store(key, url,
+                                                         params=params)
+            except Exception as e:
+                utils.log('Prefetching {0} failed: {1}'.format(url, e))
+                with self._lock:
+                    self.failed += 1
+                continue
+            with self._lock:
+                self.fetched += 1
+                self.bytes += len(response.content)
+
+    def cancel(self):
+        """Drop queued requests. Those already being made still finish"""
+        self._cancelled.set()
+        with self._lock:
+            self._queue = []
+
+    def join(self, timeout=None):
+        """Wait up to timeout seconds in total for the prefetch threads"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._lock:
+            threads = list(self._threads)
+        for thread in threads:
+            remaining = None
+            if deadline is not None:
+                remaining = max(0, deadline - time.time())
+            thread.join(remaining)
+
+    def finish(self, timeout=5):
+        """Give prefetching until timeout, then cancel the rest
+
+        Call at the end of the invocation, after the listing has been
+        handed to Kodi, so waiting doesn't hold up the user.
+        """
+        self.join(timeout)
+        self.cancel()
+        utils.log('Prefetched {0} responses ({1} bytes), {2} failed'.format(
+            self.fetched, self.bytes, self.failed))
@@ -0,0 +1,196 @@
+import email.utils
+import json
+import os
+import threading
+import time
+
+from aussieaddonscommon import paths
+from aussieaddonscommon import utils
+
+import requests
+from requests.packages.urllib3.util import Retry as _Retry
+
+STATE_FILE = 'ratelimit.json'
+LOCK_FILE = 'ratelimit.lock'
+
+# Pause after a 429 response that doesn't say how long to wait
+DEFAULT_PENALTY = 5
+
+# Responses whose Retry-After header is honoured
+RETRY_AFTER_STATUSES = (429, 503)
+
+
+class Retry(_Retry):
+    """urllib3 Retry leaving 429 responses to the RateLimiter
+
+    urllib3 would otherwise sleep through Retry-After within the one
+    request, leaving other requests and add-on processes to keep hitting
+    the host in the meantime.
+    """
+    RETRY_AFTER_STATUS_CODES = frozenset(
+        _Retry.RETRY_AFTER_STATUS_CODES) - frozenset([429])
+
+
+def parse_retry_after(value, now=None):
+    """Return the seconds to wait from a Retry-After header value
+
+    The header is either a number of seconds or an HTTP date. Returns None
+    if it can't be parsed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    if now is None:
+        now = time.time()
+    return max(0, email.utils.mktime_tz(parsed) - now)
+
+
+class TokenBucket(object):
+    """Allow rate requests per second on average, in bursts of up to burst
+
+    reserve() always succeeds and returns how long the caller must wait,
+    so concurrent callers queue up in order rather than all retrying.
+    """
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = burst or max(1, int(rate))
+        self.tokens = float(self.burst)
+        # Time tokens were last counted, which is in the future while
+        # blocked by Retry-After
+        self.updated = None
+        self.blocked_until = 0
+
+    def reserve(self, now):
+        start = max(now, self.blocked_until)
+        if self.rate == float('inf'):
+            return start - now
+        if self.updated is None or start > self.updated:
+            if self.updated is not None:
+                self.tokens = min(self.burst, self.tokens +
+                                  (start - self.updated) * self.rate)
+            self.updated = start
+        self.tokens -= 1
+        wait = self.updated - now
+        if self.tokens < 0:
+            wait += -self.tokens / self.rate
+        return max(0, wait)
+
+    def block(self, until):
+        """Hold off all requests until a time, then start again slowly"""
+        if until > self.blocked_until:
+            self.blocked_until = until
+            self.tokens = min(self.tokens, 0)
+            self.updated = until
+
+    def to_dict(self):
+        return {'tokens': self.tokens, 'updated': self.updated,
+                'blocked_until': self.blocked_until}
+
+    def load(self, data):
+        self.tokens = min(self.burst, data.get('tokens', self.burst))
+        self.updated = data.get('updated')
+        self.blocked_until = data.get('blocked_until', 0)
+
+
+class RateLimiter(object):
+    """Token bucket rate limits for requests to each host
+
+    rates maps host names to a rate in requests per second, or a (rate,
+    burst) tuple. default applies to any other host; without one, other
+    hosts are only held back by Retry-After.
+
+    With state_dir, bucket state is kept in a file there and updated under
+    a file lock, so that add-on invocations running at the same time (as
+    when a skin loads several widgets) share the same limits.
+    """
+    def __init__(self, rates=None, default=None, state_dir=None,
+                 sleep=time.sleep):
+        self.rates = rates or {}
+        self.default = default
+        self.state_dir = state_dir
+        self.sleep = sleep
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _new_bucket(self, host):
+        rate = self.rates.get(host, self.default)
+        if rate is None:
+            # No limit, other than being blocked by Retry-After
+            return TokenBucket(float('inf'), 1)
+        if isinstance(rate, tuple):
+            return TokenBucket(*rate)
+        return TokenBucket(rate)
+
+    def _bucket(self, host):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = self._new_bucket(host)
+        return bucket
+
+    def _update(self, host, func):
+        """Apply func to the host's bucket, in every process if shared"""
+        with self._lock:
+            if self.state_dir is None:
+                return func(self._bucket(host))
+            with paths.file_lock(os.path.join(self.state_dir, LOCK_FILE)):
+                state_path = os.path.join(self.state_dir, STATE_FILE)
+                try:
+                    with open(state_path) as f:
+                        state = json.load(f)
+                except (IOError, OSError, ValueError):
+                    state = {}
+                bucket = self._new_bucket(host)
+                if host in state:
+                    bucket.load(state[host])
+                result = func(bucket)
+                state[host] = bucket.to_dict()
+                # Only read under the lock, and a lost or torn file just
+                # resets the buckets, so it isn't synced to disk
+                with open(state_path, 'w') as f:
+                    json.dump(state, f)
+                return result
+
+    def reserve(self, host, now=None):
+        """Take a request slot, returning how long to wait before using it"""
+        if now is None:
+            now = time.time()
+        return self._update(host, lambda bucket: bucket.reserve(now))
+
+    def wait(self, host):
+        """Block until a request may be made to host"""
+        delay = self.reserve(host)
+        if delay > 0:
+            utils.log('Rate limiting requests to {0}, waiting {1:.2f}s'.format(
+                host, delay))
+            self.sleep(delay)
+
+    def block(self, host, seconds, now=None):
+        if now is None:
+            now = time.time()
+        self._update(host, lambda bucket: bucket.block(now + seconds))
+
+    def record_error(self, host, error):
+        """Honour Retry-After on 429 and 503 errors from Session.request
+
+        Returns True if requests to the host are now being held back
+        because of a 429, so the request is worth retrying.
+        """
+        if not isinstance(error, requests.exceptions.HTTPError):
+            return False
+        response = error.response
+        if response is None or response.status_code not in \
+                RETRY_AFTER_STATUSES:
+            return False
+        seconds = parse_retry_after(response.headers.get('Retry-After'))
+        if seconds is None and response.status_code == 429:
+            seconds = DEFAULT_PENALTY
+        if seconds:
+            utils.log('{0} asked us to back off for {1:.0f}s'.format(
+                host, seconds))
+            self.block(host, seconds)
+        return response.status_code == 429
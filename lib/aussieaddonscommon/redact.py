@@ -0,0 +1,192 @@
+import re
+
+from future.utils import string_types
+
+# Filter out username and passwords from log files.
+#
+# Each rule is a (pattern, replacement) pair. Patterns avoid unbounded
+# '.+?' scans by only consuming characters that can't terminate the
+# match, so every rule runs in linear time even on very long lines.
+DEFAULT_RULES = (
+    (r'//[^\s/:@]+:[^\s/@]+@', '//[FILTERED_USER]:[FILTERED_PASSWORD]@'),
+    (r'<user>[^<]+</user>', '<user>[FILTERED_USER]</user>'),
+    (r'<pass>[^<]+</pass>', '<pass>[FILTERED_PASSWORD]</pass>'),
+)
+
+# Extra rules for other credentials that commonly end up in debug logs.
+# These are applied along with the defaults by redact(). Their third item
+# lists lower case strings a line must contain for the rule to match it.
+# Key names are matched case-insensitively and anywhere in a word, so
+# camelCase and prefixed names such as refreshToken and xApiKey match, as
+# do bare token= query and form parameters.
+TOKEN_RULE = (
+    r'((?:access|refresh|id|auth|session)[_-]?token'
+    r'["\']?[ \t]*[=:][ \t]*["\']?|(?<![a-z0-9])token=)[^\s&"\'<>,;]+',
+    r'\1[FILTERED_TOKEN]',
+    ('token',))
+
+API_KEY_RULE = (
+    r'((?:api[_-]?key|client[_-]?secret|secret)'
+    r'["\']?[ \t]*[=:][ \t]*["\']?)[^\s&"\'<>,;]+',
+    r'\1[FILTERED_API_KEY]',
+    ('key', 'secret'))
+
+EMAIL_RULE = (
+    r'(?<![\w.%+-])[\w.%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*'
+    r'\.[A-Za-z]{2,}',
+    '[FILTERED_EMAIL]',
+    ('@',))
+
+AUTHORIZATION_RULE = (
+    r'(authorization["\']?[ \t]*[:=][ \t]*["\']?)'
+    r'(?:[A-Za-z]+ )?[^\s"\'<>,;]+',
+    r'\1[FILTERED_AUTH]',
+    ('authorization',))
+
+EXTRA_RULES = (TOKEN_RULE, API_KEY_RULE, EMAIL_RULE, AUTHORIZATION_RULE)
+
+
+# Group references allowed in replacements, either \1 or \g<1>
+GROUP_REF = re.compile(r'\\(?:g<(\d+)>|(\d+))')
+
+
+def parse_template(repl):
+    """Split a replacement into literal strings and group numbers
+
+    Replacements without group references are returned unchanged.
+    """
+    if '\\' not in repl:
+        return repl
+    parts = []
+    pos = 0
+    for m in GROUP_REF.finditer(repl):
+        if m.start() > pos:
+            parts.append(repl[pos:m.start()])
+        parts.append(int(m.group(1) or m.group(2)))
+        pos = m.end()
+    if pos < len(repl):
+        parts.append(repl[pos:])
+    return parts
+
+
+class Redactor(object):
+    """Multi-pattern log redaction
+
+    Each rule is a (pattern, replacement) pair, applied in order as its
+    own pass over the text. Rules without a literal prefix, such as the
+    extra rules, make the regex engine try a match at almost every
+    position, so a rule can have a third item: a tuple of lower case
+    strings of which any line it matches must contain one, such as the
+    key name for a token. Those rules only run on the lines containing
+    one of the strings, found with plain substring tests.
+
+    Rules with strings are case-insensitive. Their patterns are matched
+    against the lower cased lines, which is much faster than
+    re.IGNORECASE, so they must be written in lower case. They must not
+    match across lines.
+    """
+    def __init__(self, rules=DEFAULT_RULES):
+        self.rules = tuple(rules)
+        self._compile()
+
+    def _compile(self):
+        self._compiled = []
+        for rule in self.rules:
+            if len(rule) > 2:
+                self._compiled.append((re.compile(rule[0]),
+                                       parse_template(rule[1]),
+                                       tuple(rule[2])))
+            else:
+                self._compiled.append((re.compile(rule[0]), rule[1], None))
+
+    def add_rule(self, pattern, repl, literals=None):
+        """Add an extra rule, optionally limited to lines with literals"""
+        if literals:
+            self.rules += ((pattern, repl, tuple(literals)),)
+        else:
+            self.rules += ((pattern, repl),)
+        self._compile()
+
+    def redact(self, text):
+        """Return text with all sensitive values replaced"""
+        lines = lowered = None
+        for regex, repl, literals in self._compiled:
+            if literals is None:
+                if lines is not None:
+                    text = '\n'.join(lines)
+                    lines = lowered = None
+                text = regex.sub(repl, text)
+                continue
+            if lines is None:
+                lower = text.lower()
+                if not any(literal in lower for literal in literals):
+                    continue
+                lines = text.split('\n')
+                # Lower casing never adds or removes newlines, so the
+                # lines line up. Earlier rules only replace values, so
+                # these stay good enough for finding key names.
+                lowered = lower.split('\n')
+            hits = [i for i, line in enumerate(lowered)
+                    if literals[0] in line]
+            if len(literals) > 1:
+                hits = set(hits)
+                for literal in literals[1:]:
+                    hits.update(i for i, line in enumerate(lowered)
+                                if literal in line)
+                hits = sorted(hits)
+            if not hits:
+                continue
+            # One pass over all the candidate lines together
+            redacted = _sub_lower(regex, repl,
+                                  '\n'.join(lines[i] for i in hits))
+            for i, line in zip(hits, redacted.split('\n')):
+                lines[i] = line
+        if lines is not None:
+            text = '\n'.join(lines)
+        return text
+
+
+def _sub_lower(regex, template, text):
+    """Replace matches of regex in the lower cased text, keeping the case
+    of everything else, including groups used in the replacement"""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Some characters change length when lower cased, so offsets
+        # wouldn't line up. Fall back to matching ignoring case.
+        regex = re.compile(regex.pattern, re.IGNORECASE)
+        lowered = text
+    parts = []
+    pos = 0
+    for m in regex.finditer(lowered):
+        parts.append(text[pos:m.start()])
+        if isinstance(template, string_types):
+            parts.append(template)
+        else:
+            for part in template:
+                if isinstance(part, string_types):
+                    parts.append(part)
+                else:
+                    start, end = m.span(part)
+                    if start >= 0:
+                        parts.append(text[start:end])
+        pos = m.end()
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return ''.join(parts)
+
+
+_default_redactor = None
+
+
+def get_default_redactor():
+    """Return a cached Redactor with the default and extra rules"""
+    global _default_redactor
+    if _default_redactor is None:
+        _default_redactor = Redactor(DEFAULT_RULES + EXTRA_RULES)
+    return _default_redactor
+
+
+def redact(text):
+    """Redact text using the default rules"""
+    return get_default_redactor().redact(text)
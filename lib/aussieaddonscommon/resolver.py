@@ -0,0 +1,336 @@
+import errno
+import select
+import socket
+import threading
+import time
+
+# selectors is Python 3 only, so Python 2 waits with poll, or with select
+# where poll isn't available, as on Windows
+try:
+    import selectors
+except ImportError:
+    selectors = None
+
+from aussieaddonscommon import cache
+from aussieaddonscommon import utils
+
+from requests.packages.urllib3.connection import HTTPConnection
+from requests.packages.urllib3.connection import HTTPSConnection
+from requests.packages.urllib3.exceptions import ConnectTimeoutError
+from requests.packages.urllib3.exceptions import NewConnectionError
+from requests.packages.urllib3.poolmanager import PoolManager
+from requests.packages.urllib3.util.connection import allowed_gai_family
+
+# How long a DNS answer is used for. getaddrinfo doesn't give the record
+# TTL, so this is a fixed time
+DNS_TTL = 5 * 60
+
+# How long an expired answer is kept, to use if DNS stops responding
+STALE_TTL = 24 * 60 * 60
+
+# Delay before trying the next address while a connection attempt is still
+# pending, as recommended by RFC 8305
+ATTEMPT_DELAY = 0.25
+
+_IN_PROGRESS = frozenset([errno.EINPROGRESS, errno.EWOULDBLOCK,
+                          errno.EALREADY, getattr(errno, 'WSAEWOULDBLOCK',
+                                                  errno.EWOULDBLOCK)])
+
+
+def wait_connected(socks, timeout=None):
+    """Return the sockets whose connection attempt finished or failed
+
+    Waits up to timeout seconds, or without limit if it's None. Unlike
+    select.select, this works with file descriptors of 1024 and above.
+    """
+    if selectors is not None:
+        with selectors.DefaultSelector() as selector:
+            for sock in socks:
+                selector.register(sock, selectors.EVENT_WRITE)
+            return [key.fileobj for key, _ in selector.select(timeout)]
+    if hasattr(select, 'poll'):
+        poller = select.poll()
+        by_fd = {}
+        for sock in socks:
+            by_fd[sock.fileno()] = sock
+            poller.register(sock, select.POLLOUT | select.POLLERR |
+                            select.POLLHUP)
+        if timeout is not None:
+            timeout = max(timeout, 0) * 1000
+        return [by_fd[fd] for fd, _ in poller.poll(timeout)]
+    _, writable, failed = select.select([], socks, socks, timeout)
+    return list(set(writable) | set(failed))
+
+
+def interleave(addresses):
+    """Order getaddrinfo results alternating between address families
+
+    Starts with the family of the first result, so a broken IPv6 route
+    only delays the first IPv4 attempt by one attempt delay.
+    """
+    by_family = {}
+    families = []
+    for address in addresses:
+        family = address[0]
+        if family not in by_family:
+            by_family[family] = []
+            families.append(family)
+        by_family[family].append(address)
+    ordered = []
+    while any(by_family.values()):
+        for family in families:
+            if by_family[family]:
+                ordered.append(by_family[family].pop(0))
+    return ordered
+
+
+def _numeric_addresses(host, port):
+    """getaddrinfo results for an IP address, or None for a host name"""
+    try:
+        return socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM, 0,
+                                  socket.AI_NUMERICHOST)
+    except socket.gaierror:
+        return None
+
+
+class Resolver(object):
+    """Cached DNS lookups and happy eyeballs connections
+
+    Answers are kept for ttl seconds in memory, and in a CacheStore if
+    given one so later add-on invocations needn't resolve the same hosts.
+    If DNS fails, an answer up to STALE_TTL seconds old is used instead.
+
+    connect() tries the addresses of a host in turn, alternating IPv6 and
+    IPv4, starting the next attempt whenever the last has gone
+    attempt_delay seconds without connecting, and uses whichever connects
+    first.
+
+    The time taken by each host's last lookup is kept in timings, and
+    totals for all lookups and connections in stats.
+    """
+    def __init__(self, store=None, ttl=DNS_TTL, attempt_delay=ATTEMPT_DELAY,
+                 getaddrinfo=socket.getaddrinfo):
+        self.store = store
+        self.ttl = ttl
+        self.attempt_delay = attempt_delay
+        self.getaddrinfo = getaddrinfo
+        self.timings = {}
+        self.stats = {'lookups': 0, 'cache_hits': 0, 'stale': 0,
+                      'resolve_time': 0.0, 'connects': 0, 'fallbacks': 0,
+                      'connect_time': 0.0}
+        self._answers = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(host, port):
+        return 'dns:{0}:{1}'.format(host, port)
+
+    def _cached(self, host, port):
+        answer = self._answers.get((host, port))
+        if answer is None and self.store is not None:
+            answer = self.store.get(self._key(host, port))
+            if answer is not None:
+                self._answers[(host, port)] = answer
+        return answer
+
+    def lookup(self, host, port, now=None):
+        """Return getaddrinfo results for a host, from the cache if fresh"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            self.stats['lookups'] += 1
+            answer = self._cached(host, port)
+            if answer is not None and answer['expires'] > now:
+                self.stats['cache_hits'] += 1
+                return answer['addresses']
+
+        started = time.time()
+        try:
+            addresses = [
+                (family, socktype, proto, canonname, sockaddr)
+                for family, socktype, proto, canonname, sockaddr in
+                self.getaddrinfo(host, port, allowed_gai_family(),
+                                 socket.SOCK_STREAM)]
+        except socket.gaierror as e:
+            if answer is None or answer['expires'] + STALE_TTL < now:
+                raise
+            utils.log('Resolving {0} failed, using previous answer: '
+                      '{1}'.format(host, e))
+            with self._lock:
+                self.stats['stale'] += 1
+            return answer['addresses']
+        elapsed = time.time() - started
+
+        answer = {'expires': now + self.ttl, 'addresses': addresses}
+        with self._lock:
+            self.stats['resolve_time'] += elapsed
+            self.timings[host] = elapsed
+            self._answers[(host, port)] = answer
+        if self.store is not None and addresses:
+            self.store.set(self._key(host, port), answer,
+                           self.ttl + STALE_TTL)
+        utils.log('Resolved {0} in {1:.0f}ms'.format(host, elapsed * 1000))
+        return addresses
+
+    def forget(self, host, port):
+        with self._lock:
+            self._answers.pop((host, port), None)
+        if self.store is not None:
+            self.store.delete(self._key(host, port))
+
+    def _start(self, address, source_address, socket_options):
+        family, socktype, proto, _, sockaddr = address
+        sock = socket.socket(family, socktype, proto)
+        try:
+            for option in socket_options or ():
+                sock.setsockopt(*option)
+            if source_address:
+                sock.bind(source_address)
+            sock.setblocking(False)
+            err = sock.connect_ex(sockaddr)
+            if err and err not in _IN_PROGRESS:
+                raise socket.error(err, errno.errorcode.get(err, str(err)))
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def connect(self, address, timeout=None, source_address=None,
+                socket_options=None):
+        """Connect to (host, port), like socket.create_connection
+
+        Raises socket.timeout if no address connected within timeout.
+        """
+        host, port = address
+        host = host.strip('[]')
+        addresses = _numeric_addresses(host, port)
+        if addresses is None:
+            addresses = self.lookup(host, port)
+        addresses = interleave(addresses)
+        if not addresses:
+            raise socket.error('getaddrinfo returned an empty list')
+
+        started = time.time()
+        deadline = None if timeout is None else started + timeout
+        pending = []
+        errors = []
+        winner = None
+        attempts = 0
+        try:
+            while winner is None and (addresses or pending):
+                if addresses:
+                    attempts += 1
+                    try:
+                        pending.append(self._start(addresses.pop(0),
+                                                   source_address,
+                                                   socket_options))
+                    except socket.error as e:
+                        errors.append(e)
+                        continue
+
+                wait = self.attempt_delay if addresses else None
+                if deadline is not None:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise socket.timeout('timed out')
+                    wait = remaining if wait is None else min(wait,
+                                                              remaining)
+                for sock in wait_connected(pending, wait):
+                    pending.remove(sock)
+                    err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    if err == 0 and winner is None:
+                        winner = sock
+                        continue
+                    sock.close()
+                    if err:
+                        errors.append(socket.error(
+                            err, errno.errorcode.get(err, str(err))))
+        finally:
+            for sock in pending:
+                sock.close()
+
+        if winner is None:
+            raise errors[-1]
+        winner.settimeout(timeout)
+        with self._lock:
+            self.stats['connects'] += 1
+            self.stats['connect_time'] += time.time() - started
+            if attempts > 1:
+                self.stats['fallbacks'] += 1
+        return winner
+
+    def install(self, adapter):
+        """Make a requests HTTPAdapter connect through this resolver"""
+        manager = adapter.poolmanager
+        adapter.poolmanager = ResolvingPoolManager(
+            self, num_pools=manager.pools._maxsize, headers=manager.headers,
+            **manager.connection_pool_kw)
+
+
+class ResolvingConnectionMixin(object):
+    """urllib3 connection opening its socket through a Resolver"""
+    def __init__(self, *args, **kwargs):
+        self.resolver = kwargs.pop('resolver')
+        super(ResolvingConnectionMixin, self).__init__(*args, **kwargs)
+
+    def _new_conn(self):
+        timeout = self.timeout
+        if timeout is socket._GLOBAL_DEFAULT_TIMEOUT:
+            timeout = socket.getdefaulttimeout()
+        try:
+            return self.resolver.connect(
+                (self._dns_host, self.port), timeout,
+                source_address=self.source_address,
+                socket_options=self.socket_options)
+        except socket.gaierror as e:
+            raise NewConnectionError(
+                self, 'Failed to resolve {0}: {1}'.format(self.host, e))
+        except socket.timeout:
+            raise ConnectTimeoutError(
+                self, 'Connection to {0} timed out. (connect timeout='
+                      '{1})'.format(self.host, timeout))
+        except socket.error as e:
+            raise NewConnectionError(
+                self, 'Failed to establish a new connection: {0}'.format(e))
+
+
+class ResolvingHTTPConnection(ResolvingConnectionMixin, HTTPConnection):
+    pass
+
+
+class ResolvingHTTPSConnection(ResolvingConnectionMixin, HTTPSConnection):
+    pass
+
+
+class ResolvingPoolManager(PoolManager):
+    """PoolManager whose connection pools connect through a Resolver"""
+    def __init__(self, resolver, *args, **kwargs):
+        super(ResolvingPoolManager, self).__init__(*args, **kwargs)
+        self.resolver = resolver
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super(ResolvingPoolManager, self)._new_pool(
+            scheme, host, port, request_context)
+        if scheme == 'https':
+            pool.ConnectionCls = ResolvingHTTPSConnection
+        else:
+            pool.ConnectionCls = ResolvingHTTPConnection
+        pool.conn_kw['resolver'] = self.resolver
+        return pool
+
+
+_resolver = None
+
+
+def get_resolver(persist=True):
+    """Return the process wide resolver
+
+    With persist, answers are kept in the shared cache store between
+    add-on invocations.
+    """
+    global _resolver
+    if _resolver is None:
+        _resolver = Resolver()
+    if persist and _resolver.store is None:
+        _resolver.store = cache.get_store()
+    return _resolver
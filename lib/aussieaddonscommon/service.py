@@ -0,0 +1,281 @@
+import base64
+import binascii
+import hmac
+import json
+import os
+import socket
+import threading
+import time
+
+from aussieaddonscommon import utils
+from aussieaddonscommon.exceptions import AussieAddonsException
+from aussieaddonscommon.httpcache import CacheEntry, NEGATIVE_STATUSES
+from aussieaddonscommon.session import Session
+from aussieaddonscommon.windowcache import HOME_WINDOW
+
+from future.moves import socketserver
+
+import requests
+
+import xbmc
+
+import xbmcgui
+
+# Home window property holding the service's port and secret
+PROPERTY = 'aussieaddonscommon.service.{0}'
+
+# Seconds a plugin invocation waits for the service before going direct
+CLIENT_TIMEOUT = 10
+
+# Results remembered per method, oldest dropped first
+MAX_RESULTS = 256
+
+# Longest request or response line accepted
+MAX_MESSAGE = 64 * 1024 * 1024
+
+
+class ServiceUnavailable(AussieAddonsException):
+    """The add-on's service isn't running or didn't answer"""
+
+
+class ServiceError(AussieAddonsException):
+    """The service ran the call, which raised an exception"""
+
+
+def _property_name(addon_id):
+    return PROPERTY.format(addon_id or utils.get_addon_id())
+
+
+def response_to_dict(response):
+    entry = CacheEntry.from_response(response)
+    data = dict(vars(entry))
+    data['content'] = base64.b64encode(entry.content).decode('ascii')
+    data['from_cache'] = getattr(response, 'from_cache', False)
+    return data
+
+
+def is_cacheable_response(data):
+    """Whether a 'get' result can be remembered
+
+    Successful responses are, and 404 and 410 errors as in httpcache, but
+    not server or other errors, which are worth retrying next time.
+    """
+    status = data['status_code']
+    return 200 <= status < 300 or status in NEGATIVE_STATUSES
+
+
+def response_from_dict(data):
+    data = dict(data)
+    from_cache = data.pop('from_cache', False)
+    data['content'] = base64.b64decode(data['content'])
+    response = CacheEntry(**data).to_response()
+    response.from_cache = from_cache
+    return response
+
+
+class Service(object):
+    """Background service answering calls from the add-on's plugin
+
+    Runs in the add-on's xbmc.service extension, where it outlives plugin
+    invocations, so its Session keeps its connections, TLS sessions and
+    tokens between clicks. Methods are registered by name; with a ttl,
+    results are remembered in memory for that many seconds for the same
+    parameters, unless the method's remember callable rejects them. The
+    built in 'get' method makes a GET request through the service's
+    Session, remembered for get_ttl seconds if it succeeded or was a 404
+    or 410.
+
+    The service listens on a loopback port, which is published with a
+    random secret in a home window property for ServiceClient to find.
+    """
+    def __init__(self, session=None, addon_id=None, get_ttl=60):
+        self.session = session or Session()
+        self.addon_id = addon_id or utils.get_addon_id()
+        self.secret = binascii.hexlify(os.urandom(16)).decode('ascii')
+        self.methods = {}
+        self._results = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self.register('ping', lambda: True)
+        self.register('get', self._get, ttl=get_ttl,
+                      remember=is_cacheable_response)
+
+    def register(self, name, func, ttl=0, remember=None):
+        """Make func(**params) callable by clients as name
+
+        With a ttl, results are remembered unless remember(result) is
+        false.
+        """
+        self.methods[name] = (func, ttl, remember)
+
+    def _get(self, url, params=None, headers=None):
+        try:
+            response = self.session.get(url, params=params, headers=headers)
+        except requests.exceptions.HTTPError as e:
+            if e.response is None:
+                raise
+            response = e.response
+        return response_to_dict(response)
+
+    def call(self, name, params):
+        """Run a registered method, or return its remembered result"""
+        func, ttl, remember = self.methods[name]
+        if not ttl:
+            return func(**params)
+        key = (name, json.dumps(params, sort_keys=True))
+        now = time.time()
+        with self._lock:
+            cached = self._results.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        result = func(**params)
+        if remember is not None and not remember(result):
+            return result
+        with self._lock:
+            if len(self._results) >= MAX_RESULTS:
+                oldest = min(self._results, key=lambda k: self._results[k][0])
+                del self._results[oldest]
+            self._results[key] = (now + ttl, result)
+        return result
+
+    def forget(self, name=None):
+        """Drop remembered results, of one method or all of them"""
+        with self._lock:
+            for key in list(self._results):
+                if name is None or key[0] == name:
+                    del self._results[key]
+
+    def handle(self, message):
+        """Answer one request message, returning the response message"""
+        try:
+            request = json.loads(message)
+            if not hmac.compare_digest(str(request.get('secret', '')),
+                                       str(self.secret)):
+                return {'error': 'Not authorised'}
+            name = request['method']
+            if name not in self.methods:
+                return {'error': 'No method {0}'.format(name)}
+            return {'result': self.call(name, request.get('params') or {})}
+        except Exception as e:
+            utils.log('Service call failed: {0}'.format(e))
+            return {'error': str(e) or e.__class__.__name__}
+
+    def start(self, port=0):
+        service = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                message = self.rfile.readline(MAX_MESSAGE)
+                if not message:
+                    return
+                reply = service.handle(message.decode('utf-8'))
+                self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', port),
+                                                       Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.1})
+        self._thread.daemon = True
+        self._thread.start()
+        xbmcgui.Window(HOME_WINDOW).setProperty(
+            _property_name(self.addon_id), json.dumps({
+                'port': self._server.server_address[1],
+                'secret': self.secret}))
+        utils.log('Service listening on port {0}'.format(
+            self._server.server_address[1]))
+        return self
+
+    def stop(self):
+        xbmcgui.Window(HOME_WINDOW).clearProperty(
+            _property_name(self.addon_id))
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def run(self):
+        """Serve until Kodi asks the service to exit"""
+        self.start()
+        try:
+            monitor = xbmc.Monitor()
+            while not monitor.waitForAbort(1):
+                pass
+        finally:
+            self.stop()
+
+
+class ServiceClient(object):
+    """Calls into the add-on's Service from a plugin invocation
+
+    When the service isn't running, calls raise ServiceUnavailable, or
+    with call_or_direct() run the given function in the plugin instead,
+    so add-ons work the same without the service.
+    """
+    def __init__(self, addon_id=None, timeout=CLIENT_TIMEOUT, session=None):
+        self.addon_id = addon_id
+        self.timeout = timeout
+        self._session = session
+
+    @property
+    def session(self):
+        """Session for requests made directly, without the service"""
+        if self._session is None:
+            self._session = Session()
+        return self._session
+
+    def address(self):
+        value = xbmcgui.Window(HOME_WINDOW).getProperty(
+            _property_name(self.addon_id))
+        if not value:
+            return None
+        try:
+            data = json.loads(value)
+            return data['port'], data['secret']
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def call(self, method, **params):
+        address = self.address()
+        if address is None:
+            raise ServiceUnavailable('Service is not running')
+        port, secret = address
+        message = json.dumps({'secret': secret, 'method': method,
+                              'params': params}).encode('utf-8') + b'\n'
+        try:
+            sock = socket.create_connection(('127.0.0.1', port),
+                                            self.timeout)
+            try:
+                sock.sendall(message)
+                reply = sock.makefile('rb').readline(MAX_MESSAGE)
+            finally:
+                sock.close()
+            reply = json.loads(reply.decode('utf-8'))
+        except (socket.error, ValueError) as e:
+            raise ServiceUnavailable('Service did not answer: {0}'.format(e))
+        if 'error' in reply:
+            raise ServiceError(reply['error'])
+        return reply['result']
+
+    def call_or_direct(self, method, direct, **params):
+        """Call the service, or direct(**params) if it isn't running"""
+        try:
+            return self.call(method, **params)
+        except ServiceUnavailable as e:
+            utils.log('{0}, running {1} directly'.format(e, method))
+            return direct(**params)
+
+    def get(self, url, params=None, headers=None):
+        """GET a URL through the service's Session, or a local one
+
+        Raises requests' HTTPError for error responses, as Session does.
+        """
+        try:
+            data = self.call('get', url=url, params=params, headers=headers)
+        except ServiceUnavailable as e:
+            utils.log('{0}, fetching {1} directly'.format(e, url))
+            return self.session.get(url, params=params, headers=headers)
+        response = response_from_dict(data)
+        response.raise_for_status()
+        return response
@@ -1,42 +1,93 @@
-import ssl
-
+from aussieaddonscommon import circuit
+from aussieaddonscommon import compression
+from aussieaddonscommon import http2
+from aussieaddonscommon import httpcache
+from aussieaddonscommon import metrics
+from aussieaddonscommon import ratelimit
 from aussieaddonscommon import utils
 from aussieaddonscommon.exceptions import AussieAddonsException
+from aussieaddonscommon.resolver import get_resolver
+from aussieaddonscommon.tls import TLSAdapter, TLSv1Adapter
+
+from future.moves.urllib.parse import urlparse
 
 import requests
 from requests.adapters import HTTPAdapter
 from requests.exceptions import SSLError
-from requests.packages.urllib3.poolmanager import PoolManager
 from requests.packages.urllib3.util import Retry
 
 # Ignore all warnings
 requests.packages.urllib3.disable_warnings()
 
 
-class TLSv1Adapter(HTTPAdapter):
-    def init_poolmanager(self, connections, maxsize, block=False):
-        self.poolmanager = PoolManager(num_pools=connections,
-                                       maxsize=maxsize,
-                                       block=block,
-                                       ssl_version=ssl.PROTOCOL_TLSv1)
-
-
 class Session(requests.Session):
     """Class to encapsulate the rest api endpoint with a requests session."""
-    def __init__(self, force_tlsv1=False, max_retries=3, *args, **kwargs):
+    def __init__(self, force_tlsv1=False, max_retries=3, cache_policy=None,
+                 response_cache=None, tls_options=None, use_http2=False,
+                 metrics_sinks=None, circuit_breaker=None, rate_limiter=None,
+                 accept_encoding=None, resolver=None, *args, **kwargs):
         requests.Session.__init__(self, *args, **kwargs)
 
-        retry = Retry(total=max_retries,
-                      backoff_factor=0.2,
-                      status_forcelist=[500, 502, 503, 504])
+        # Advertise every content coding that can be decoded, or only those
+        # listed in accept_encoding, and keep count of the bytes saved
+        self.headers['Accept-Encoding'] = compression.accept_encoding(
+            accept_encoding)
+        self.transfer_stats = compression.TransferStats()
+
+        # Requests are paced per host when given a ratelimit.RateLimiter
+        self.rate_limiter = rate_limiter
+
+        # Requests to hosts that keep failing are refused for a while when
+        # given a circuit.CircuitRegistry, or True for the shared one
+        if circuit_breaker is True:
+            circuit_breaker = circuit.get_registry()
+        self.circuit_breaker = circuit_breaker or None
+
+        # Callables given a metrics.RequestMetrics after each request
+        self.metrics_sinks = list(metrics_sinks or [])
+
+        # GET responses are only cached when given a cache policy
+        self.cache_policy = cache_policy
+        self.response_cache = response_cache
+        if cache_policy is not None and response_cache is None:
+            self.response_cache = httpcache.ResponseCache()
+
+        # A rate limiter handles 429 Retry-After itself, across requests
+        retry_class = Retry if rate_limiter is None else ratelimit.Retry
+        retry = retry_class(total=max_retries,
+                            backoff_factor=0.2,
+                            status_forcelist=[500, 502, 503, 504])
 
         # Always allow retries on server failures
         http_adapter = HTTPAdapter(max_retries=retry)
 
-        if force_tlsv1:
+        if use_http2 and not http2.is_available():
+            utils.log('HTTP/2 not available, install httpx[http2] to use it')
+            use_http2 = False
+        if use_http2 and (force_tlsv1 or tls_options or resolver):
+            utils.log('Warning: force_tlsv1, tls_options and resolver are '
+                      'not supported over HTTP/2, so are ignored for HTTPS')
+
+        # HTTPS connections share one SSLContext, given the TLS version
+        # range and ciphers in tls_options, and resume TLS sessions
+        if use_http2:
+            https_adapter = http2.HTTP2Adapter(max_retries=retry)
+        elif force_tlsv1:
             https_adapter = TLSv1Adapter(max_retries=retry)
         else:
-            https_adapter = HTTPAdapter(max_retries=retry)
+            https_adapter = TLSAdapter(max_retries=retry,
+                                       **(tls_options or {}))
+
+        # Host names are looked up through a resolver.Resolver if given
+        # one, or True for the shared one, which caches answers between
+        # invocations and races IPv6 and IPv4 connections
+        if resolver is True:
+            resolver = get_resolver()
+        self.resolver = resolver or None
+        if self.resolver is not None:
+            for adapter in (http_adapter, https_adapter):
+                if isinstance(adapter, HTTPAdapter):
+                    self.resolver.install(adapter)
 
         self.mount('http://', http_adapter)
         self.mount('https://', https_adapter)
@@ -46,7 +97,83 @@ class Session(requests.Session):
 
     def request(self, method, url, *args, **kwargs):
         """Send the request after generating the complete URL."""
-        utils.log("Performing {0} for {1}".format(method, url))
+        if (self.cache_policy is None or method.upper() != 'GET' or
+                kwargs.get('stream') or args):
+            return self._request(method, url, *args, **kwargs)
+        return self._cached_get(url, **kwargs)
+
+    def _request(self, method, url, *args, **kwargs):
+        host = urlparse(url).netloc
+        breaker = None
+        if self.circuit_breaker is not None:
+            breaker = self.circuit_breaker.get(host)
+            breaker.before_request()
+
+        # With a rate limiter, a 429 is retried once after waiting
+        attempts = 1 if self.rate_limiter is None else 2
+        for attempt in range(attempts):
+            if self.rate_limiter is not None:
+                self.rate_limiter.wait(host)
+            utils.log("Performing {0} for {1}".format(method, url))
+            try:
+                req = self._measured_request(method, url, *args, **kwargs)
+            except Exception as e:
+                if breaker is not None:
+                    breaker.record(e)
+                if (self.rate_limiter is not None and
+                        self.rate_limiter.record_error(host, e) and
+                        attempt + 1 < attempts):
+                    continue
+                raise
+            if breaker is not None:
+                breaker.record()
+            return req
+
+    def resend(self, request, **kwargs):
+        """Send a prepared request again, as from a response hook
+
+        The retry waits for the rate limiter and is refused by an open
+        circuit like a new request, and runs the request's hooks. Its
+        outcome is recorded with that of the request being retried.
+        """
+        host = urlparse(request.url).netloc
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.get(host).before_request()
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait(host)
+        utils.log("Retrying {0} for {1}".format(request.method, request.url))
+        return self.send(request, **kwargs)
+
+    def _measured_request(self, method, url, *args, **kwargs):
+        if not self.metrics_sinks:
+            return self._send_request(method, url, *args, **kwargs)
+
+        request_metrics = metrics.RequestMetrics(method, url)
+        # Request hooks replace the session's, so include those as well
+        hooks = dict(kwargs.get('hooks') or {})
+        response_hooks = hooks.get('response') or self.hooks['response']
+        if callable(response_hooks):
+            response_hooks = [response_hooks]
+        hooks['response'] = [request_metrics.on_response] + list(
+            response_hooks)
+        kwargs['hooks'] = hooks
+        try:
+            req = self._send_request(method, url, *args, **kwargs)
+        except Exception as e:
+            request_metrics.finish(getattr(e, 'response', None), e)
+            self._emit_metrics(request_metrics)
+            raise
+        self._emit_metrics(request_metrics.finish(req))
+        return req
+
+    def _emit_metrics(self, request_metrics):
+        for sink in self.metrics_sinks:
+            try:
+                sink(request_metrics)
+            except Exception as e:
+                utils.log('Metrics sink failed: {0}'.format(e))
+
+    def _send_request(self, method, url, *args, **kwargs):
         try:
             req = super(Session, self).request(method, url, *args, **kwargs)
             req.raise_for_status()
@@ -59,4 +186,71 @@ class Session(requests.Session):
         except Exception as e:
             raise AussieAddonsException('Error: {0}'.format(e))
 
+        if not kwargs.get('stream'):
+            self.transfer_stats.add_response(req)
         return req
+
+    def iter_content(self, url, chunk_size=compression.CHUNK_SIZE,
+                     method='GET', **kwargs):
+        """Request a URL and yield its decompressed body in chunks
+
+        For large responses, which are decoded as they are read rather than
+        held in memory whole.
+        """
+        response = self.request(method, url, stream=True, **kwargs)
+        return compression.iter_decoded(response, chunk_size,
+                                        self.transfer_stats)
+
+    def _fetch_and_store(self, key, url, **kwargs):
+        """GET a URL, caching the response, or a 404 or 410 error"""
+        try:
+            response = self._request('GET', url, **kwargs)
+        except requests.exceptions.HTTPError as e:
+            if (e.response is not None and
+                    e.response.status_code in httpcache.NEGATIVE_STATUSES):
+                self.response_cache.set(key, e.response, self.cache_policy)
+            raise
+        self.response_cache.set(key, response, self.cache_policy)
+        return response
+
+    def _cache_key(self, url, **kwargs):
+        """Response cache key for a GET, including the headers, cookies and
+        auth the request would be sent with"""
+        prepared = self.prepare_request(requests.Request(
+            'GET', url, params=kwargs.get('params'),
+            headers=kwargs.get('headers'), cookies=kwargs.get('cookies'),
+            auth=kwargs.get('auth')))
+        return self.response_cache.make_key(prepared.url,
+                                            headers=prepared.headers)
+
+    def _cached_get(self, url, **kwargs):
+        policy = self.cache_policy
+        key = self._cache_key(url, **kwargs)
+        entry = self.response_cache.get(key)
+        if entry is not None:
+            age = entry.age()
+            if entry.is_negative:
+                if age < policy.negative_ttl:
+                    utils.log("Cached {0} for {1}".format(
+                        entry.status_code, url))
+                    entry.to_response().raise_for_status()
+                entry = None
+            elif age < policy.fresh_ttl:
+                return entry.to_response()
+            elif (policy.stale_while_revalidate and
+                    age < policy.fresh_ttl + policy.stale_ttl):
+                utils.log("Serving stale copy of {0}".format(url))
+                self.response_cache.refresh_in_background(
+                    key, lambda: self._fetch_and_store(key, url, **kwargs))
+                return entry.to_response(stale=True)
+
+        try:
+            return self._fetch_and_store(key, url, **kwargs)
+        except (AussieAddonsException, requests.exceptions.HTTPError) as e:
+            response = getattr(e, 'response', None)
+            if (entry is None or not policy.stale_if_error or
+                    (response is not None and response.status_code < 500)):
+                raise
+            utils.log("Serving stale copy of {0} after error: {1}".format(
+                url, e))
+            return entry.to_response(stale=True)
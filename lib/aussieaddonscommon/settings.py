@@ -0,0 +1,94 @@
+import threading
+
+from aussieaddonscommon import jsonrpc
+from aussieaddonscommon import windowcache
+
+import xbmc
+
+# Kodi settings fetched together in a single JSON-RPC round trip
+SNAPSHOT_SETTINGS = (
+    'debug.showloginfo',
+    'debug.extralogging',
+    'locale.timezone',
+    'network.usehttpproxy',
+)
+
+
+def _get_values(settings):
+    """Fetch a number of Kodi settings in one JSON-RPC batch"""
+    return jsonrpc.get_client().get_setting_values(settings, cache=False)
+
+
+class SettingsSnapshot(object):
+    """Cached values of Kodi settings
+
+    All of the settings are fetched together on first use and then held
+    for the life of the plugin invocation. Long running services should
+    use a SettingsMonitor to refresh it when settings change.
+    """
+    def __init__(self, settings=SNAPSHOT_SETTINGS):
+        self.settings = tuple(settings)
+        self._values = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Fetch all of the settings again
+
+        Raises RuntimeError if Kodi's JSON-RPC interface isn't available,
+        in which case nothing is cached.
+        """
+        values = _get_values(self.settings)
+        with self._lock:
+            self._values = values
+        return values
+
+    def invalidate(self):
+        with self._lock:
+            self._values = None
+
+    def get(self, setting, default=None):
+        values = self._values
+        if values is None:
+            values = self.refresh()
+        if setting not in values and setting not in self.settings:
+            # Not part of the snapshot, so fetch and remember it on its own
+            values.update(_get_values((setting,)))
+        return values.get(setting, default)
+
+
+class SettingsMonitor(xbmc.Monitor):
+    """Refresh a snapshot in the background whenever settings change"""
+    def __init__(self, snapshot):
+        xbmc.Monitor.__init__(self)
+        self.snapshot = snapshot
+
+    def onSettingsChanged(self):
+        self.snapshot.invalidate()
+        # utils.is_debug keeps the debug flag in a window property as well
+        windowcache.get_cache(windowcache.SHARED).delete('is_debug')
+        thread = threading.Thread(target=self._refresh)
+        thread.daemon = True
+        thread.start()
+
+    def _refresh(self):
+        try:
+            self.snapshot.refresh()
+        except Exception:
+            pass
+
+
+_snapshot = None
+
+
+def get_snapshot():
+    """Return the shared settings snapshot for this invocation"""
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = SettingsSnapshot()
+    return _snapshot
+
+
+def reset():
+    """Discard the shared snapshot"""
+    global _snapshot
+    _snapshot = None
@@ -0,0 +1,108 @@
+import collections
+import hashlib
+import os
+import re
+
+from aussieaddonscommon import utils
+
+from future.utils import binary_type, text_type
+
+# Number of innermost traceback frames that make up the signature hash
+SIGNATURE_FRAMES = 3
+
+# Volatile parts of error messages that shouldn't stop two occurrences of
+# the same error from matching. Status codes and other short numbers are
+# kept, as 'HTTP Error 404' and 'HTTP Error 503' are different errors.
+VOLATILE_PATTERN = re.compile(
+    r'(?P<url>\b[a-zA-Z][a-zA-Z0-9+.-]*://(?P<host>[^\s/\'"<>?#]*)'
+    r'[^\s\'"<>]*)'
+    r'|(?P<addr>\b0x[0-9a-fA-F]+\b)'
+    r'|(?P<uuid>\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-'
+    r'[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b)'
+    r'|(?P<hex>\b(?=[0-9a-fA-F]*[0-9])[0-9a-fA-F]{16,}\b)'
+    r'|(?P<num>\d{4,})')
+
+
+def _replace_volatile(match):
+    kind = match.lastgroup
+    if kind == 'url':
+        return '<url:%s>' % match.group('host')
+    return '<%s>' % kind
+
+
+def normalize_message(message):
+    """Replace URLs, IDs, long numbers and memory addresses in a message"""
+    return VOLATILE_PATTERN.sub(_replace_volatile, message)
+
+
+def safe_text(value):
+    """Convert any exception argument to text without raising"""
+    if isinstance(value, binary_type):
+        return value.decode('utf-8', 'replace')
+    if isinstance(value, text_type):
+        return value
+    try:
+        return text_type(value)
+    except Exception:
+        return repr(value)
+
+
+def format_args(exc_type, exc_value):
+    """Join the exception arguments into an ascii message"""
+    args = list(getattr(exc_value, 'args', ()))
+    if issubclass(exc_type, UnicodeError) and len(args) == 5:
+        del args[1]  # remove error data, likely to be very long xml
+    return ', '.join(utils.ensure_ascii(safe_text(x)) for x in args)
+
+
+class ErrorSignature(object):
+    """Normalized, hashable description of an exception
+
+    The traceback is walked once, keeping only the outermost frame (for the
+    summary) and the innermost frames (for the hash), so this is cheap
+    enough to build for every exception regardless of stack depth.
+    """
+    def __init__(self, exc_type, exc_value, exc_traceback,
+                 frames=SIGNATURE_FRAMES):
+        self.exc_type = exc_type.__name__
+        self.message = format_args(exc_type, exc_value)
+        self.normalized = normalize_message(self.message)
+        self.first_frame = None
+        self.frames = collections.deque(maxlen=frames)
+        tb = exc_traceback
+        while tb is not None:
+            code = tb.tb_frame.f_code
+            frame = (os.path.basename(code.co_filename), tb.tb_lineno,
+                     code.co_name)
+            if self.first_frame is None:
+                self.first_frame = frame
+            self.frames.append(frame)
+            tb = tb.tb_next
+        self._digest = None
+
+    @property
+    def title(self):
+        """'Type: message', as used for issue report titles"""
+        return '%s: %s' % (self.exc_type, self.message)
+
+    @property
+    def summary(self):
+        """'file.py (line) - Type: message' from the outermost frame"""
+        if self.first_frame is None:
+            return self.title
+        return '%s (%d) - %s' % (self.first_frame[0], self.first_frame[1],
+                                 self.title)
+
+    @property
+    def digest(self):
+        """Short stable hash of the type, message and innermost frames
+
+        Line numbers are left out so the same error still matches after
+        unrelated changes to a module.
+        """
+        if self._digest is None:
+            parts = [self.exc_type, self.normalized]
+            parts.extend('%s:%s' % (f[0], f[2]) for f in self.frames)
+            self._digest = hashlib.sha1(
+                '\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+        return self._digest
@@ -0,0 +1,383 @@
+import datetime
+import re
+
+from future.utils import string_types
+
+ZERO = datetime.timedelta(0)
+HOUR = datetime.timedelta(hours=1)
+
+MONTHS = ('january', 'february', 'march', 'april', 'may', 'june', 'july',
+          'august', 'september', 'october', 'november', 'december')
+DAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday',
+        'sunday')
+
+_MONTH_NUMBERS = dict((name[:3], i + 1) for i, name in enumerate(MONTHS))
+_MONTH_NUMBERS.update((name, i + 1) for i, name in enumerate(MONTHS))
+
+
+class FixedOffset(datetime.tzinfo):
+    """Timezone a fixed number of minutes east of UTC"""
+    def __init__(self, minutes, name=None):
+        self._offset = datetime.timedelta(minutes=minutes)
+        if name is None:
+            sign = '-' if minutes < 0 else '+'
+            name = '{0}{1:02d}:{2:02d}'.format(sign, *divmod(abs(minutes),
+                                                             60))
+        self._name = name
+
+    def utcoffset(self, dt):
+        return self._offset
+
+    def dst(self, dt):
+        return ZERO
+
+    def tzname(self, dt):
+        return self._name
+
+    def __repr__(self):
+        return '<FixedOffset {0}>'.format(self._name)
+
+
+UTC = FixedOffset(0, 'UTC')
+AEST = FixedOffset(10 * 60, 'AEST')
+AEDT = FixedOffset(11 * 60, 'AEDT')
+
+# Queensland doesn't have daylight saving
+BRISBANE = AEST
+
+
+class AustralianEastern(datetime.tzinfo):
+    """AEST, or AEDT during daylight saving, as in NSW, VIC, ACT and TAS
+
+    Daylight saving runs from 2am on the first Sunday in October to 3am
+    on the first Sunday in April, the rules since 2008. Earlier dates use
+    the same rules.
+
+    The repeated hour when daylight saving ends is AEDT unless the
+    datetime's fold is set, as for Python's own timezones. Times in the
+    hour skipped when it starts are AEST unless fold is set, as PEP 495
+    has it.
+    """
+    def __init__(self):
+        self._years = {}
+
+    def _transitions(self, year):
+        """Local start and end of daylight saving in a year"""
+        transitions = self._years.get(year)
+        if transitions is None:
+            transitions = self._years.setdefault(year, (
+                _first_sunday(year, 10) + 2 * HOUR,
+                _first_sunday(year, 4) + 3 * HOUR))
+        return transitions
+
+    def utcoffset(self, dt):
+        return AEST.utcoffset(dt) + self.dst(dt)
+
+    def dst(self, dt):
+        if dt is None:
+            return ZERO
+        start, end = self._transitions(dt.year)
+        local = dt.replace(tzinfo=None)
+        if end - HOUR <= local < end:
+            return ZERO if getattr(dt, 'fold', 0) else HOUR
+        if start <= local < start + HOUR:
+            return HOUR if getattr(dt, 'fold', 0) else ZERO
+        if local >= start or local < end:
+            return HOUR
+        return ZERO
+
+    def tzname(self, dt):
+        return 'AEDT' if self.dst(dt) else 'AEST'
+
+    def fromutc(self, dt):
+        if dt.tzinfo is not self:
+            raise ValueError('fromutc: dt.tzinfo is not self')
+        standard = dt.replace(tzinfo=None) + AEST.utcoffset(None)
+        start, end = self._transitions(standard.year)
+        # The end is 2am standard time
+        if standard >= start or standard < end - HOUR:
+            return (standard + HOUR).replace(tzinfo=self)
+        local = standard.replace(tzinfo=self)
+        if standard < end and hasattr(local, 'fold'):
+            local = local.replace(fold=1)
+        return local
+
+    def __repr__(self):
+        return '<AustralianEastern>'
+
+
+SYDNEY = AustralianEastern()
+MELBOURNE = SYDNEY
+
+
+def _first_sunday(year, month):
+    first = datetime.datetime(year, month, 1)
+    return first + datetime.timedelta(days=(6 - first.weekday()) % 7)
+
+
+ZONES = {
+    'UT': UTC, 'UTC': UTC, 'GMT': UTC, 'Z': UTC,
+    'AEST': AEST, 'AEDT': AEDT,
+    'ACST': FixedOffset(9 * 60 + 30, 'ACST'),
+    'ACDT': FixedOffset(10 * 60 + 30, 'ACDT'),
+    'AWST': FixedOffset(8 * 60, 'AWST'),
+    # North American zones, obsolete in RFC 2822 but still seen in feeds
+    'EST': FixedOffset(-5 * 60, 'EST'), 'EDT': FixedOffset(-4 * 60, 'EDT'),
+    'CST': FixedOffset(-6 * 60, 'CST'), 'CDT': FixedOffset(-5 * 60, 'CDT'),
+    'MST': FixedOffset(-7 * 60, 'MST'), 'MDT': FixedOffset(-6 * 60, 'MDT'),
+    'PST': FixedOffset(-8 * 60, 'PST'), 'PDT': FixedOffset(-7 * 60, 'PDT'),
+}
+
+_fixed_offsets = {0: UTC}
+_zones = {}
+
+
+def fixed_offset(minutes):
+    """Return a shared FixedOffset for minutes east of UTC"""
+    tz = _fixed_offsets.get(minutes)
+    if tz is None:
+        tz = _fixed_offsets.setdefault(minutes, FixedOffset(minutes))
+    return tz
+
+
+def _make_zone(text):
+    zone = ZONES.get(text.upper())
+    if zone is not None:
+        return zone
+    sign, digits = text[0], text[1:].replace(':', '', 1)
+    if sign not in '+-' or len(digits) not in (2, 4) or not digits.isdigit():
+        raise ValueError('Unknown timezone: {0!r}'.format(text))
+    minutes = int(digits[:2]) * 60 + int(digits[2:] or 0)
+    if minutes >= 24 * 60:
+        raise ValueError('Unknown timezone: {0!r}'.format(text))
+    return fixed_offset(-minutes if sign == '-' else minutes)
+
+
+def _zone(text):
+    """Return the tzinfo for a name, Z, or offset such as +1000 or +10:00"""
+    zone = _zones.get(text)
+    if zone is None:
+        zone = _zones.setdefault(text, _make_zone(text))
+    return zone
+
+
+def parse_iso8601(value, tz=None):
+    """Parse an ISO 8601 date, or date and time, into a datetime
+
+    Takes the forms used by web APIs: 2024-01-01, 2024-01-01T06:00,
+    2024-01-01T06:00:00, with optional fractional seconds, and a space in
+    place of the T. The offset can be Z, +10:00, +1000 or +10. Without
+    one, tz is used, leaving the datetime naive if it's None.
+    """
+    try:
+        s = value.strip()
+        if s[4] != '-' or s[7] != '-':
+            raise ValueError
+        year, month, day = int(s[:4]), int(s[5:7]), int(s[8:10])
+        if len(s) == 10:
+            return datetime.datetime(year, month, day, tzinfo=tz)
+        if s[10] not in 'Tt ' or s[13] != ':':
+            raise ValueError
+        hour, minute = int(s[11:13]), int(s[14:16])
+        second = microsecond = 0
+        end = 16
+        if s[16:17] == ':':
+            second = int(s[17:19])
+            end = 19
+            if s[19:20] in ('.', ','):
+                end = 20
+                while s[end:end + 1].isdigit():
+                    end += 1
+                if end == 20:
+                    raise ValueError
+                microsecond = int(s[20:end][:6].ljust(6, '0'))
+        if end < len(s):
+            tz = _zone(s[end:])
+        return datetime.datetime(year, month, day, hour, minute, second,
+                                 microsecond, tzinfo=tz)
+    except (IndexError, ValueError):
+        raise ValueError('Invalid ISO 8601 date: {0!r}'.format(value))
+
+
+def parse_rfc2822(value, tz=None):
+    """Parse an RFC 2822 date, as in RSS pubDate, into a datetime
+
+    For example Mon, 01 Jan 2024 06:00:00 +1000. The day name and seconds
+    are optional. The zone can also be a name such as GMT or AEST. Without
+    one, tz is used, leaving the datetime naive if it's None.
+    """
+    try:
+        parts = value.split()
+        if parts[0][0].isalpha():
+            del parts[0]
+        day, month, year, clock = parts[:4]
+        month = _MONTH_NUMBERS[month.lower()]
+        year = int(year)
+        if year < 100:
+            year += 2000 if year < 50 else 1900
+        clock = clock.split(':')
+        if len(clock) not in (2, 3):
+            raise ValueError
+        if len(parts) > 4:
+            tz = _zone(parts[4])
+        return datetime.datetime(year, month, int(day), int(clock[0]),
+                                 int(clock[1]),
+                                 int(clock[2]) if len(clock) == 3 else 0,
+                                 tzinfo=tz)
+    except (IndexError, KeyError, ValueError):
+        raise ValueError('Invalid RFC 2822 date: {0!r}'.format(value))
+
+
+def parse_xmltv(value, tz=None):
+    """Parse an XMLTV time, such as 20240101060000 +1000, into a datetime
+
+    Trailing parts of the time can be left off, down to just the date.
+    Without an offset, tz is used, leaving the datetime naive if it's
+    None.
+    """
+    try:
+        s = value.strip()
+        rest = s.lstrip('0123456789')
+        digits = s[:len(s) - len(rest)]
+        if len(digits) not in (8, 10, 12, 14):
+            raise ValueError
+        rest = rest.strip()
+        if rest:
+            tz = _zone(rest)
+        return datetime.datetime(int(digits[:4]), int(digits[4:6]),
+                                 int(digits[6:8]), int(digits[8:10] or 0),
+                                 int(digits[10:12] or 0),
+                                 int(digits[12:14] or 0), tzinfo=tz)
+    except ValueError:
+        raise ValueError('Invalid XMLTV time: {0!r}'.format(value))
+
+
+_DIRECTIVES = {
+    'Y': r'(?P<Y>\d{4})',
+    'y': r'(?P<y>\d\d)',
+    'm': r'(?P<m>1[0-2]|0[1-9]|[1-9])',
+    'd': r'(?P<d>3[01]|[12]\d|0[1-9]|[1-9])',
+    'H': r'(?P<H>2[0-3]|[01]\d|\d)',
+    'I': r'(?P<I>1[0-2]|0[1-9]|[1-9])',
+    'M': r'(?P<M>[0-5]\d|\d)',
+    'S': r'(?P<S>6[01]|[0-5]\d|\d)',
+    'f': r'(?P<f>\d{1,6})',
+    'p': r'(?P<p>am|pm)',
+    'b': r'(?P<b>%s)' % '|'.join(name[:3] for name in MONTHS),
+    'B': r'(?P<B>%s)' % '|'.join(MONTHS),
+    'a': r'(?:%s)' % '|'.join(name[:3] for name in DAYS),
+    'A': r'(?:%s)' % '|'.join(DAYS),
+    'z': r'(?P<z>[Zz]|[+-]\d\d:?\d\d)',
+    'Z': r'(?P<Z>%s)' % '|'.join(sorted(ZONES, key=len, reverse=True)),
+    '%': '%',
+}
+_DIRECTIVES['h'] = _DIRECTIVES['b']
+
+_formats = {}
+
+
+def _compile(fmt):
+    pattern = []
+    chars = iter(fmt)
+    for char in chars:
+        if char == '%':
+            directive = next(chars, '')
+            if directive not in _DIRECTIVES:
+                raise ValueError("'{0}' is a bad directive in format "
+                                 "{1!r}".format(directive, fmt))
+            pattern.append(_DIRECTIVES[directive])
+        elif char.isspace():
+            pattern.append(r'\s+')
+        else:
+            pattern.append(re.escape(char))
+    return re.compile(''.join(pattern) + r'\Z', re.IGNORECASE)
+
+
+def strptime(value, fmt, tz=None):
+    """Parse value with a datetime.strptime format
+
+    A thread-safe and much faster stand-in for datetime.strptime, for the
+    numeric directives, English month and day names, %p, %f, %z and %Z
+    (with the names in ZONES). Each format is compiled once. Without a
+    zone in the value, tz is used, leaving the datetime naive if it's
+    None.
+    """
+    regex = _formats.get(fmt)
+    if regex is None:
+        regex = _formats.setdefault(fmt, _compile(fmt))
+    match = regex.match(value)
+    if match is None:
+        raise ValueError('time data {0!r} does not match format '
+                         '{1!r}'.format(value, fmt))
+    fields = match.groupdict()
+    if fields.get('Y'):
+        year = int(fields['Y'])
+    elif fields.get('y'):
+        year = int(fields['y'])
+        year += 2000 if year < 69 else 1900
+    else:
+        year = 1900
+    month = fields.get('b') or fields.get('B')
+    month = _MONTH_NUMBERS[month.lower()] if month else int(
+        fields.get('m') or 1)
+    if fields.get('I'):
+        hour = int(fields['I']) % 12
+        if (fields.get('p') or '').lower() == 'pm':
+            hour += 12
+    else:
+        hour = int(fields.get('H') or 0)
+    zone = fields.get('z') or fields.get('Z')
+    return datetime.datetime(
+        year, month, int(fields.get('d') or 1), hour,
+        int(fields.get('M') or 0), int(fields.get('S') or 0),
+        int((fields.get('f') or '0').ljust(6, '0')),
+        tzinfo=_zone(zone) if zone else tz)
+
+
+def _parser(parser):
+    if isinstance(parser, string_types):
+        fmt = parser
+        return lambda value, **kwargs: strptime(value, fmt, **kwargs)
+    return parser
+
+
+def parse_many(values, parser=parse_iso8601, **kwargs):
+    """Parse a list of times, returning a list of datetimes
+
+    parser is one of the parse functions, called with the keyword
+    arguments, or a strptime format. Each distinct value is parsed once,
+    which pays off for schedules where one programme's stop time is the
+    next one's start and channels share times.
+    """
+    parse = _parser(parser)
+    parsed = {}
+    results = []
+    for value in values:
+        dt = parsed.get(value)
+        if dt is None:
+            dt = parsed[value] = parse(value, **kwargs)
+        results.append(dt)
+    return results
+
+
+def parse_schedule(programmes, fields=('start', 'stop'), parser=parse_xmltv,
+                   **kwargs):
+    """Yield a copy of each programme dict with its times parsed
+
+    Suits the output of feeds.parse_xmltv, and streams like it. As with
+    parse_many, each distinct time is parsed once. Missing or empty
+    fields are left as they are.
+    """
+    parse = _parser(parser)
+    parsed = {}
+    for programme in programmes:
+        programme = dict(programme)
+        for field in fields:
+            value = programme.get(field)
+            if not value:
+                continue
+            dt = parsed.get(value)
+            if dt is None:
+                dt = parsed[value] = parse(value, **kwargs)
+            programme[field] = dt
+        yield programme
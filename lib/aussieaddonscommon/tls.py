@@ -0,0 +1,175 @@
+import ssl
+import threading
+
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.poolmanager import PoolManager
+
+# Versions can be given as these names, or as ssl.TLSVersion members
+TLS_VERSIONS = ('TLSv1', 'TLSv1.1', 'TLSv1.2', 'TLSv1.3')
+
+# Python 2 and 3.6 have no minimum_version/maximum_version, so versions
+# are disabled with these options instead
+_NO_VERSION_OPTIONS = ('OP_NO_TLSv1', 'OP_NO_TLSv1_1', 'OP_NO_TLSv1_2',
+                       'OP_NO_TLSv1_3')
+
+# TLS session resumption needs SSLSocket.session (Python 3.6+)
+RESUMPTION_SUPPORTED = hasattr(ssl.SSLSocket, 'session')
+
+# Client protocol for new contexts, PROTOCOL_SSLv23 before Python 3.6
+DEFAULT_PROTOCOL = getattr(ssl, 'PROTOCOL_TLS_CLIENT', ssl.PROTOCOL_SSLv23)
+
+# OpenSSL 3 won't negotiate TLSv1 or TLSv1.1 above security level 0
+LEGACY_CIPHERS = 'DEFAULT:@SECLEVEL=0'
+
+
+def _tls_version(version):
+    if isinstance(version, str):
+        name = version.replace('.', '_')
+        return getattr(ssl.TLSVersion, name)
+    return version
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """SSLContext that resumes TLS sessions with servers it has seen before
+
+    The last session for each server hostname is offered when wrapping a
+    new socket, so pooled connections to the same host after the first
+    skip the full handshake. Sessions are saved when a socket is wrapped
+    and again when it is closed, by which time TLSv1.3 session tickets
+    have usually arrived.
+    """
+    def __init__(self, protocol=None, *args, **kwargs):
+        # Python 2's SSLContext.__init__ takes the protocol, while Python 3
+        # only takes it in __new__
+        if '__init__' in vars(ssl.SSLContext):
+            super(ResumingSSLContext, self).__init__(
+                DEFAULT_PROTOCOL if protocol is None else protocol)
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        self.handshakes = 0
+        self.resumed = 0
+        if RESUMPTION_SUPPORTED:
+            self.sslsocket_class = ResumableSSLSocket
+
+    def __new__(cls, protocol=None, *args, **kwargs):
+        if protocol is None:
+            protocol = DEFAULT_PROTOCOL
+        return super(ResumingSSLContext, cls).__new__(cls, protocol, *args,
+                                                      **kwargs)
+
+    def get_session(self, hostname):
+        with self._sessions_lock:
+            return self._sessions.get(hostname)
+
+    def save_session(self, sock):
+        hostname = getattr(sock, 'server_hostname', None)
+        try:
+            session = sock.session
+        except (AttributeError, ValueError):
+            return
+        if hostname and session is not None:
+            with self._sessions_lock:
+                self._sessions[hostname] = session
+
+    def clear_sessions(self):
+        with self._sessions_lock:
+            self._sessions.clear()
+
+    def wrap_socket(self, sock, *args, **kwargs):
+        hostname = kwargs.get('server_hostname')
+        if (RESUMPTION_SUPPORTED and hostname and
+                kwargs.get('session') is None):
+            kwargs['session'] = self.get_session(hostname)
+        # An unknown or expired session just means a full handshake
+        ssock = super(ResumingSSLContext, self).wrap_socket(sock, *args,
+                                                            **kwargs)
+        self.handshakes += 1
+        if getattr(ssock, 'session_reused', False):
+            self.resumed += 1
+        if RESUMPTION_SUPPORTED:
+            self.save_session(ssock)
+        return ssock
+
+
+if RESUMPTION_SUPPORTED:
+    class ResumableSSLSocket(ssl.SSLSocket):
+        """SSLSocket that hands its session back to the context on close"""
+        def close(self):
+            if isinstance(self.context, ResumingSSLContext):
+                self.context.save_session(self)
+            super(ResumableSSLSocket, self).close()
+
+
+def create_ssl_context(min_version=None, max_version=None, ciphers=None):
+    """Build a client SSLContext allowing a range of TLS versions
+
+    min_version and max_version are names from TLS_VERSIONS (or
+    ssl.TLSVersion members), and default to whatever OpenSSL allows.
+    ciphers is an OpenSSL cipher list string.
+    """
+    context = ResumingSSLContext(DEFAULT_PROTOCOL)
+    # urllib3 sets verify_mode for each connection and checks hostnames
+    # itself, which it can't do while the context checks them too
+    context.check_hostname = False
+    if hasattr(context, 'minimum_version'):
+        if min_version is not None:
+            context.minimum_version = _tls_version(min_version)
+        if max_version is not None:
+            context.maximum_version = _tls_version(max_version)
+    else:
+        context.options |= ssl.OP_NO_SSLv2 | ssl.OP_NO_SSLv3
+        low = TLS_VERSIONS.index(min_version) if min_version else 0
+        high = (TLS_VERSIONS.index(max_version) if max_version
+                else len(TLS_VERSIONS) - 1)
+        for i, option in enumerate(_NO_VERSION_OPTIONS):
+            if (i < low or i > high) and hasattr(ssl, option):
+                context.options |= getattr(ssl, option)
+    if ciphers:
+        context.set_ciphers(ciphers)
+    context.load_default_certs()
+    return context
+
+
+class TLSAdapter(HTTPAdapter):
+    """HTTPS adapter sharing one configurable SSLContext between connections
+
+    Pass either the TLS version range and ciphers to build a context with,
+    or a prepared ssl_context. With a ResumingSSLContext (the default),
+    connections to a host after the first resume its TLS session.
+    """
+    def __init__(self, min_version=None, max_version=None, ciphers=None,
+                 ssl_context=None, **kwargs):
+        if ssl_context is None:
+            ssl_context = create_ssl_context(min_version, max_version,
+                                             ciphers)
+        self.ssl_context = ssl_context
+        super(TLSAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False,
+                         **pool_kwargs):
+        pool_kwargs['ssl_context'] = self.ssl_context
+        self.poolmanager = PoolManager(num_pools=connections,
+                                       maxsize=maxsize,
+                                       block=block,
+                                       **pool_kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        proxy_kwargs.setdefault('ssl_context', self.ssl_context)
+        return super(TLSAdapter, self).proxy_manager_for(proxy,
+                                                         **proxy_kwargs)
+
+
+class TLSv1Adapter(TLSAdapter):
+    """Compatibility mode for servers that only speak TLSv1
+
+    Kept for Session(force_tlsv1=True). Old Kodi builds without TLSv1.2
+    support needed it, and it is rarely required now.
+    """
+    def __init__(self, **kwargs):
+        if hasattr(ssl, 'TLSVersion'):
+            kwargs.setdefault('ssl_context', create_ssl_context(
+                'TLSv1', 'TLSv1', LEGACY_CIPHERS))
+        else:
+            kwargs.setdefault('ssl_context',
+                              ssl.SSLContext(ssl.PROTOCOL_TLSv1))
+        super(TLSv1Adapter, self).__init__(**kwargs)
@@ -1,5 +1,3 @@
-import json
-import os
 import re
 import sys
 import traceback
@@ -26,6 +24,10 @@ GITHUB_ORG = 'aussieaddons'
 # HTML code escape
 PATTERN = re.compile(r"&(\w+?);")
 
+# Seconds the debug logging setting is cached in a window property, so
+# turning it on takes effect soon after
+DEBUG_TTL = 60
+
 
 def get_addon():
     return xbmcaddon.Addon()
@@ -105,13 +107,10 @@ def get_file_dir():
     """Get our add-on working directory
 
     Make our add-on working directory if it doesn't exist and
-    return it.
+    return it. The path is only resolved once per invocation.
     """
-    filedir = os.path.join(
-        xbmc.translatePath('special://temp/'), get_addon_id())
-    if not os.path.isdir(filedir):
-        os.mkdir(filedir)
-    return filedir
+    from aussieaddonscommon import paths
+    return paths.get_paths().temp
 
 
 def log(s):
@@ -136,16 +135,8 @@ def format_error_summary():
     From the traceback, generate a nicely formatted string showing the
     error message.
     """
-    exc_type, exc_value, exc_traceback = sys.exc_info()
-
-    args = exc_value.args
-
-    if exc_type == UnicodeEncodeError:
-        args.pop(1)  # remove error data, likely to be very long xml
-    return "%s (%d) - %s: %s" % (
-        os.path.basename(exc_traceback.tb_frame.f_code.co_filename),
-        exc_traceback.tb_lineno, exc_type.__name__,
-        ', '.join([ensure_ascii(x) for x in args]))
+    from aussieaddonscommon import signature
+    return signature.ErrorSignature(*sys.exc_info()).summary
 
 
 def log_error(message=None):
@@ -187,6 +178,11 @@ def dialog_message(msg, title=None):
     xbmcgui.Dialog().ok(*content)
 
 
+def _shared_cache():
+    from aussieaddonscommon import windowcache
+    return windowcache.get_cache(windowcache.SHARED)
+
+
 def get_platform():
     """Get platform
 
@@ -194,7 +190,18 @@ def get_platform():
     match. Ordering of items is important as some match more than one type.
 
     E.g. Android will match both Android and Linux
+
+    The result is kept in a window property until Kodi restarts.
     """
+    window_cache = _shared_cache()
+    platform = window_cache.get('platform')
+    if platform is None:
+        platform = _detect_platform()
+        window_cache.set('platform', platform, None)
+    return platform
+
+
+def _detect_platform():
     platforms = [
         "Android",
         "Linux.RaspberryPi",
@@ -214,11 +221,19 @@ def get_platform():
 
 
 def get_kodi_build():
-    """Return the Kodi build version"""
-    try:
-        return xbmc.getInfoLabel("System.BuildVersion")
-    except Exception:
-        return
+    """Return the Kodi build version
+
+    The result is kept in a window property until Kodi restarts.
+    """
+    window_cache = _shared_cache()
+    build = window_cache.get('kodi_build')
+    if build is None:
+        try:
+            build = xbmc.getInfoLabel("System.BuildVersion")
+        except Exception:
+            return
+        window_cache.set('kodi_build', build, None)
+    return build
 
 
 def get_kodi_version():
@@ -289,7 +304,8 @@ def is_valid_for_report(connection_info, message=None):
         country_code = connection_info.get('country')
         if country_code:
             from aussieaddonscommon import countries
-            country_name = countries.countries.get(country_code, country_code)
+            country_name = countries.get_country_name(country_code,
+                                                      country_code)
             append_message(message,
                            'Your country is reported as {0}, but this '
                            'service is probably geo-blocked to '
@@ -320,14 +336,23 @@ def is_valid_for_report(connection_info, message=None):
 
 
 def is_debug():
-    try:
-        json_query = ('{"jsonrpc":"2.0","id":1,"method":'
-                      '"Settings.GetSettingValue","params":'
-                      '{"setting":"debug.showloginfo"}}')
-        result = json.loads(xbmc.executeJSONRPC(json_query))
-        return result['result']['value']
-    except RuntimeError:
-        return True
+    """Is Kodi debug logging enabled?
+
+    The value comes from the cached settings snapshot, so this is cheap to
+    call repeatedly, and is kept in a window property for DEBUG_TTL seconds
+    so later invocations needn't ask Kodi. If JSON-RPC isn't available,
+    assume debug is enabled.
+    """
+    from aussieaddonscommon import settings
+    window_cache = _shared_cache()
+    debug = window_cache.get('is_debug')
+    if debug is None:
+        try:
+            debug = settings.get_snapshot().get('debug.showloginfo', False)
+        except RuntimeError:
+            return True
+        window_cache.set('is_debug', debug, DEBUG_TTL)
+    return debug
 
 
 def user_report():
@@ -407,26 +432,31 @@ def handle_error(message, force=False):
     trace = traceback.format_exc()
     log(trace)
 
+    from aussieaddonscommon import issue_reporter, signature
+
     # AttributeError: global name 'foo' is not defined
-    error = '{0}: {1}'.format(
-        exc_type.__name__, ', '.join(ensure_ascii(e) for e in exc_value.args))
+    error_signature = signature.ErrorSignature(exc_type, exc_value,
+                                               exc_traceback)
+    error = error_signature.title
+    fingerprint = error_signature.digest
 
     message = format_dialog_error(message)
 
-    from aussieaddonscommon import issue_reporter
+    issue_reporter.record_error(fingerprint, error)
 
     connection_info = issue_reporter.get_connection_info()
 
     if not is_valid_for_report(connection_info, message):
         return
 
+    # This also checks the report ledger for recent duplicate reports
     is_reportable = issue_reporter.is_reportable(exc_type,
                                                  exc_value,
                                                  exc_traceback,
                                                  force)
 
     # If already reported, or a non-reportable error, just show the error
-    if not issue_reporter.not_already_reported(error) or not is_reportable:
+    if not is_reportable:
         xbmcgui.Dialog().ok(*message)
         return
 
@@ -450,6 +480,8 @@ def handle_error(message, force=False):
             issue_url = send_report(error, trace=trace,
                                     connection_info=connection_info)
             if issue_url:
-                report_file = issue_reporter.save_last_error_report(error)
+                report_file = issue_reporter.save_last_error_report(
+                    fingerprint, error)
                 if report_file:
-                    log('Saved error report heading: {0}'.format(report_file))
+                    log('Saved error report to ledger: {0}'.format(
+                        report_file))
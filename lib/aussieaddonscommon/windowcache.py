@@ -0,0 +1,169 @@
+import functools
+import json
+import threading
+import time
+
+from aussieaddonscommon import cache
+from aussieaddonscommon import utils
+
+import xbmcgui
+
+# Kodi's home window, whose properties last until Kodi exits
+HOME_WINDOW = 10000
+
+PREFIX = 'aussieaddonscommon.cache'
+
+# Namespace for facts about Kodi itself, shared by all add-ons
+SHARED = 'shared'
+
+DEFAULT_TTL = 60 * 60
+
+# Longest JSON encoded value kept, and total for a namespace, in characters
+MAX_VALUE_SIZE = 64 * 1024
+MAX_TOTAL_SIZE = 1024 * 1024
+
+_MISSING = object()
+
+
+class WindowCache(object):
+    """Cache of JSON values in Kodi window properties
+
+    Window properties live in Kodi's memory, so unlike files they are
+    read without touching the disk, and they outlive plugin invocations.
+    They are gone when Kodi restarts.
+
+    Keys are namespaced by add-on id unless a namespace is given. Values
+    larger than max_value_size aren't stored. Once the namespace holds
+    more than max_total_size, the oldest values are dropped. The sizes
+    are kept in an index property, which add-on invocations running at
+    the same time can race on, so the limits are approximate.
+    """
+    def __init__(self, namespace=None, window_id=HOME_WINDOW,
+                 default_ttl=DEFAULT_TTL, max_value_size=MAX_VALUE_SIZE,
+                 max_total_size=MAX_TOTAL_SIZE):
+        self.namespace = namespace
+        self.window_id = window_id
+        self.default_ttl = default_ttl
+        self.max_value_size = max_value_size
+        self.max_total_size = max_total_size
+
+    @property
+    def ns(self):
+        if self.namespace is None:
+            self.namespace = utils.get_addon_id()
+        return self.namespace
+
+    @property
+    def window(self):
+        return xbmcgui.Window(self.window_id)
+
+    def _name(self, key):
+        return '{0}.{1}.{2}'.format(PREFIX, self.ns, key)
+
+    def _index(self, window):
+        try:
+            return json.loads(window.getProperty(self._name('.index')) or
+                              '{}')
+        except ValueError:
+            return {}
+
+    def _save_index(self, window, index):
+        window.setProperty(self._name('.index'), json.dumps(index))
+
+    def get(self, key, default=None, now=None):
+        """Return a cached value, or default if missing or expired"""
+        raw = self.window.getProperty(self._name(key))
+        if not raw:
+            return default
+        try:
+            expires, value = json.loads(raw)
+        except ValueError:
+            return default
+        if now is None:
+            now = time.time()
+        if expires is not None and expires <= now:
+            self.delete(key)
+            return default
+        return value
+
+    def set(self, key, value, ttl=_MISSING, now=None):
+        """Store a value, expiring after ttl seconds (None never expires)
+
+        Returns False if the value is too large to store.
+        """
+        if now is None:
+            now = time.time()
+        if ttl is _MISSING:
+            ttl = self.default_ttl
+        raw = json.dumps([None if ttl is None else now + ttl, value])
+        if len(raw) > self.max_value_size:
+            utils.log('Not caching {0}, {1} characters is too large'.format(
+                key, len(raw)))
+            return False
+        window = self.window
+        index = self._index(window)
+        index[key] = [len(raw), now]
+        total = sum(size for size, _ in index.values())
+        for old_key in sorted(index, key=lambda k: index[k][1]):
+            if total <= self.max_total_size:
+                break
+            if old_key != key:
+                total -= index.pop(old_key)[0]
+                window.clearProperty(self._name(old_key))
+        window.setProperty(self._name(key), raw)
+        self._save_index(window, index)
+        return True
+
+    def delete(self, key):
+        window = self.window
+        window.clearProperty(self._name(key))
+        index = self._index(window)
+        if index.pop(key, None) is not None:
+            self._save_index(window, index)
+
+    def clear(self):
+        """Remove every value in this namespace"""
+        window = self.window
+        for key in self._index(window):
+            window.clearProperty(self._name(key))
+        window.clearProperty(self._name('.index'))
+
+    def memoize(self, ttl=_MISSING, key_prefix=None):
+        """Decorator caching a function's return value by its arguments
+
+        Return values must be JSON serialisable. None isn't cached, so
+        failures returning None are retried on the next call.
+        """
+        def decorator(func):
+            prefix = key_prefix or '%s.%s' % (func.__module__, func.__name__)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = cache.make_key(prefix, args, kwargs)
+                value = self.get(key, _MISSING)
+                if value is _MISSING:
+                    value = func(*args, **kwargs)
+                    if value is not None:
+                        self.set(key, value, ttl)
+                return value
+            return wrapper
+        return decorator
+
+
+_caches = {}
+_lock = threading.Lock()
+
+
+def get_cache(namespace=None):
+    """Return the window cache for a namespace, the add-on's by default"""
+    with _lock:
+        window_cache = _caches.get(namespace)
+        if window_cache is None:
+            window_cache = _caches[namespace] = WindowCache(namespace)
+        return window_cache
+
+
+def reset():
+    """Forget the window caches, e.g. between tests"""
+    with _lock:
+        _caches.clear()
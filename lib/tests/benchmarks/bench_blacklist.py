@@ -0,0 +1,56 @@
+"""VPN blacklist lookups at 10k patterns
+
+Run from the lib directory with: python -m tests.benchmarks.bench_blacklist
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import random
+import string
+import timeit
+
+from aussieaddonscommon import blacklist
+from tests.unit import fakes
+
+
+def make_patterns(count, seed=1):
+    rnd = random.Random(seed)
+    alphabet = string.ascii_lowercase + ' -'
+    return [''.join(rnd.choice(alphabet) for _ in range(rnd.randint(6, 20)))
+            for _ in range(count)]
+
+
+def naive_is_blacklisted(info, orgs, hostnames):
+    org = info.get('org').lower()
+    for item in orgs:
+        if item in org:
+            return True
+    hostname = info.get('hostname')
+    for item in hostnames:
+        if item in hostname:
+            return True
+    return False
+
+
+def main():
+    count = 10000
+    orgs = make_patterns(count, seed=1)
+    hostnames = make_patterns(count, seed=2)
+    asns = ['AS%d' % n for n in range(count)]
+    start = timeit.default_timer()
+    compiled = blacklist.Blacklist(asns=asns, orgs=orgs, hostnames=hostnames)
+    print('build %d patterns:   %8.1f ms' % (
+        3 * count, (timeit.default_timer() - start) * 1000))
+
+    info = fakes.VALID_CONNECTION_INFO[0]
+    number = 1000
+    naive = min(timeit.repeat(
+        lambda: naive_is_blacklisted(info, orgs, hostnames),
+        number=number, repeat=3)) / number
+    fast = min(timeit.repeat(lambda: compiled.is_blacklisted(info),
+                             number=number, repeat=3)) / number
+    print('substring loops:     %8.1f us/check' % (naive * 1e6))
+    print('compiled matcher:    %8.1f us/check' % (fast * 1e6))
+
+
+if __name__ == '__main__':
+    main()
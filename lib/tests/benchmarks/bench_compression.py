@@ -0,0 +1,86 @@
+"""Fetching a large JSON catalog with and without gzip over a slow link
+
+Run from the lib directory with: python -m tests.benchmarks.bench_compression
+
+The local server sleeps for the time the body would take to arrive at
+LINK_SPEED before answering, to stand in for a home connection.
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import gzip
+import io
+import json
+import random
+import time
+import timeit
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+# Bytes per second, about 16Mbit/s
+LINK_SPEED = 2 * 1024 * 1024
+WORDS = ('news', 'sport', 'drama', 'comedy', 'kids', 'documentary',
+         'australia', 'story', 'series', 'episode', 'live', 'special')
+
+
+def make_catalog(count=5000):
+    rand = random.Random(1)
+    return json.dumps([{
+        'id': 'ZX%06d' % rand.randint(0, 999999),
+        'title': ' '.join(rand.choice(WORDS) for _ in range(4)).title(),
+        'description': ' '.join(rand.choice(WORDS) for _ in range(30)),
+        'duration': rand.randint(60, 7200),
+        'thumbnail': 'https://cdn.example.com/img/%d.jpg' % rand.randint(
+            0, 10 ** 8),
+    } for _ in range(count)]).encode('utf-8')
+
+
+def gzipped(data):
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=6) as f:
+        f.write(data)
+    return buf.getvalue()
+
+
+def main():
+    catalog = make_catalog()
+    compressed = gzipped(catalog)
+    server = None
+
+    def handler(path):
+        accepted = server.headers[-1].get('Accept-Encoding', '')
+        if 'gzip' in accepted:
+            headers, body = {'Content-Encoding': 'gzip'}, compressed
+        else:
+            headers, body = {}, catalog
+        time.sleep(float(len(body)) / LINK_SPEED)
+        return 200, headers, body
+
+    server = fakes.FakeServer(handler).start()
+    with mock.patch('xbmcaddon.Addon', fakes.FakeAddon):
+        with mock.patch('aussieaddonscommon.utils.log'):
+            for name, encodings in (('identity', []), ('gzip', None)):
+                session = Session(accept_encoding=encodings)
+                best = min(timeit.repeat(
+                    lambda: session.get(server.url()).content,
+                    number=1, repeat=5))
+                streamed = min(timeit.repeat(
+                    lambda: sum(len(c) for c in
+                                session.iter_content(server.url())),
+                    number=1, repeat=5))
+                stats = session.transfer_stats
+                print('%-8s %7.1f ms, streamed %7.1f ms, %8d bytes '
+                      'transferred for %d' % (
+                          name, best * 1000, streamed * 1000,
+                          stats.compressed // stats.responses,
+                          stats.decoded // stats.responses))
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
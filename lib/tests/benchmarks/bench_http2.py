@@ -0,0 +1,101 @@
+"""50 concurrent small requests over HTTP/1.1 pooling against HTTP/2
+
+Run from the lib directory with: python -m tests.benchmarks.bench_http2
+
+Needs httpx[http2] installed. Both local servers speak TLS and wait a
+fixed delay before answering each request, to stand in for a CDN.
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import os
+import ssl
+import threading
+import time
+import timeit
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+from aussieaddonscommon import http2
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+CERT_FILE = os.path.join(os.path.dirname(__file__), os.pardir, 'unit',
+                         'data', 'localhost.pem')
+CONCURRENCY = 50
+DELAY = 0.02
+BODY = b'{"ok": true}'
+
+
+def server_context():
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(CERT_FILE)
+    return context
+
+
+def fetch_all(session, url):
+    errors = []
+
+    def fetch():
+        try:
+            session.get(url)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=fetch) for _ in range(CONCURRENCY)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def run(name, session, url, count_connections):
+    # Cold includes the TLS handshakes, warm reuses open connections
+    cold = timeit.timeit(lambda: fetch_all(session, url), number=1)
+    warm = min(timeit.repeat(lambda: fetch_all(session, url), number=1,
+                             repeat=5))
+    print('%-9s cold %6.1f ms, warm %6.1f ms, %d connections' % (
+        name, cold * 1000, warm * 1000, count_connections()))
+
+
+def main():
+    if not http2.is_available():
+        print('httpx[http2] is not installed')
+        return
+    for name in ('REQUESTS_CA_BUNDLE', 'CURL_CA_BUNDLE'):
+        os.environ.pop(name, None)
+
+    def handler(path):
+        time.sleep(DELAY)
+        return 200, {'Content-Type': 'application/json'}, BODY
+
+    connections = []
+    http1_server = fakes.FakeServer(handler, server_context(),
+                                    keep_alive=True)
+    get_request = http1_server.httpd.get_request
+
+    def counting_get_request():
+        connections.append(None)
+        return get_request()
+    http1_server.httpd.get_request = counting_get_request
+    http1_server.start()
+    h2_server = fakes.FakeH2Server(server_context(), body=BODY,
+                                   delay=DELAY).start()
+
+    with mock.patch('xbmcaddon.Addon', fakes.FakeAddon):
+        with mock.patch('aussieaddonscommon.utils.log'):
+            run('HTTP/1.1', Session(), http1_server.url(),
+                lambda: len(connections))
+            run('HTTP/2', Session(use_http2=True), h2_server.url(),
+                lambda: h2_server.connections)
+
+    http1_server.stop()
+    h2_server.stop()
+
+
+if __name__ == '__main__':
+    main()
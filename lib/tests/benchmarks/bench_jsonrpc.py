@@ -0,0 +1,47 @@
+"""N single JSON-RPC calls against one batch
+
+Run from the lib directory with: python -m tests.benchmarks.bench_jsonrpc
+
+Each executeJSONRPC call into Kodi is a synchronous round trip, so the
+fake adds a fixed delay per call to stand in for it.
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import time
+import timeit
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+from aussieaddonscommon import jsonrpc
+from tests.unit import fakes
+
+ROUND_TRIP = 0.002
+
+
+def main():
+    settings = ['setting.%d' % i for i in range(50)]
+    fake = fakes.FakeJSONRPC(dict((s, i) for i, s in enumerate(settings)))
+
+    def slow_execute(query):
+        time.sleep(ROUND_TRIP)
+        return fake(query)
+
+    with mock.patch('xbmc.executeJSONRPC', slow_execute):
+        client = jsonrpc.JSONRPCClient(cache_ttl=0)
+        for n in (1, 5, 20, 50):
+            single = min(timeit.repeat(
+                lambda: [client.get_setting_value(s)
+                         for s in settings[:n]],
+                number=1, repeat=3))
+            batch = min(timeit.repeat(
+                lambda: client.get_setting_values(settings[:n]),
+                number=1, repeat=3))
+            print('%2d calls: single %7.1f ms, batch %7.1f ms' % (
+                n, single * 1000, batch * 1000))
+
+
+if __name__ == '__main__':
+    main()
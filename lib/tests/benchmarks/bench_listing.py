@@ -0,0 +1,66 @@
+"""Building directory listings item by item against in bulk
+
+Run from the lib directory with: python -m tests.benchmarks.bench_listing
+
+xbmcplugin is replaced with a fake that charges a fixed cost per call,
+standing in for the trip from Python into Kodi.
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import time
+import timeit
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+from aussieaddonscommon import listing, utils
+
+import xbmcgui
+
+CALL_COST = 0.00005
+BASE_URL = 'plugin://plugin.video.foo/'
+
+
+def fake_call(*args, **kwargs):
+    time.sleep(CALL_COST)
+    return True
+
+
+def make_items(count):
+    return [{'label': 'Series %d &amp; friends' % (i % 50),
+             'params': {'action': 'list_episodes', 'series_id': str(i),
+                        'title': 'Series %d' % (i % 50),
+                        'addon_version': '1.2.3'}}
+            for i in range(count)]
+
+
+def one_at_a_time(items):
+    for item in items:
+        url = '%s?%s' % (BASE_URL, utils.make_url(item['params']))
+        li = xbmcgui.ListItem(label=utils.descape(item['label']))
+        listing.xbmcplugin.addDirectoryItem(5, url, li, True)
+
+
+def main():
+    with mock.patch('xbmcplugin.addDirectoryItem', fake_call), \
+            mock.patch('xbmcplugin.addDirectoryItems', fake_call):
+        for count in (1000, 10000):
+            items = make_items(count)
+            single = min(timeit.repeat(lambda: one_at_a_time(items),
+                                       number=1, repeat=3))
+            bulk = min(timeit.repeat(
+                lambda: listing.ListingBuilder(5, BASE_URL).add_items(items),
+                number=1, repeat=3))
+            stream = min(timeit.repeat(
+                lambda: listing.ListingBuilder(5, BASE_URL).add_items(
+                    iter(items)),
+                number=1, repeat=3))
+            print('%5d items: one at a time %7.1f ms, bulk %7.1f ms, '
+                  'streamed %7.1f ms' % (count, single * 1000, bulk * 1000,
+                                         stream * 1000))
+
+
+if __name__ == '__main__':
+    main()
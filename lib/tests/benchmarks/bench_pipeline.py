@@ -0,0 +1,95 @@
+"""A 10k item listing built stage by stage against through a Pipeline
+
+Run from the lib directory with: python -m tests.benchmarks.bench_pipeline
+
+100 pages of 100 items are fetched (a sleep standing in for the network),
+parsed, transformed and added to a listing. Reports the time until the
+first items are handed to Kodi, the total time and peak traced memory.
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import json
+import time
+import tracemalloc
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+from aussieaddonscommon import listing
+from aussieaddonscommon import pipeline
+from aussieaddonscommon import utils
+
+PAGES = 100
+PAGE_SIZE = 100
+FETCH_DELAY = 0.005
+BASE_URL = 'plugin://plugin.video.foo/'
+
+
+def fetch(page):
+    time.sleep(FETCH_DELAY)
+    return json.dumps({'items': [{
+        'id': page * PAGE_SIZE + i,
+        'title': 'Episode %d &amp; more' % i,
+        'description': 'Some description of the episode ' * 10,
+        'thumbnail': 'https://cdn.example.com/%d/%d.jpg' % (page, i),
+    } for i in range(PAGE_SIZE)]})
+
+
+def parse(body):
+    return json.loads(body)['items']
+
+
+def transform(entry):
+    return {'label': utils.descape(entry['title']),
+            'params': {'action': 'play', 'id': str(entry['id'])},
+            'art': {'thumb': entry['thumbnail']},
+            'is_playable': True}
+
+
+def stage_by_stage():
+    bodies = [fetch(page) for page in range(PAGES)]
+    entries = [entry for body in bodies for entry in parse(body)]
+    items = [transform(entry) for entry in entries]
+    return listing.ListingBuilder(5, BASE_URL).add_items(items)
+
+
+def streamed():
+    items = (pipeline.Pipeline(range(PAGES))
+             .map(fetch, workers=4, name='fetch')
+             .flat_map(parse, name='parse')
+             .map(transform, name='transform'))
+    return listing.ListingBuilder(5, BASE_URL).add_items(items)
+
+
+def measure(func):
+    first = []
+
+    def add_directory_items(handle, items, total=0):
+        if not first:
+            first.append(time.time())
+        return True
+
+    with mock.patch('xbmcplugin.addDirectoryItems', add_directory_items):
+        tracemalloc.start()
+        started = time.time()
+        count = func()
+        total = time.time() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    assert count == PAGES * PAGE_SIZE
+    return first[0] - started, total, peak
+
+
+def main():
+    for name, func in (('stage by stage', stage_by_stage),
+                       ('pipeline', streamed)):
+        first, total, peak = measure(func)
+        print('%-14s first items after %6.1f ms, total %6.1f ms, peak '
+              '%5.1f MB' % (name, first * 1000, total * 1000,
+                            peak / 1024.0 / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Time to open the next listing with and without prefetching
+
+Run from the lib directory with: python -m tests.benchmarks.bench_prefetch
+
+Each click is a new Session over the same on-disk cache, as it would be
+in a new add-on invocation. The local server waits DELAY before answering,
+to stand in for a slow API.
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+from aussieaddonscommon import cache
+from aussieaddonscommon import httpcache
+from aussieaddonscommon import prefetch
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+DELAY = 0.3
+CLICKS = 5
+BODY = '{"items": [%s]}' % ', '.join(['{"id": 1}'] * 500)
+
+
+def main():
+    def handler(path):
+        time.sleep(DELAY)
+        return 200, {'Content-Type': 'application/json'}, BODY
+
+    server = fakes.FakeServer(handler).start()
+    tmpdir = tempfile.mkdtemp()
+    store = cache.CacheStore(os.path.join(tmpdir, 'cache.db'),
+                             namespace='bench')
+
+    def make_session():
+        return Session(cache_policy=httpcache.CachePolicy(fresh_ttl=300),
+                       response_cache=httpcache.ResponseCache(store))
+
+    with mock.patch('xbmcaddon.Addon', fakes.FakeAddon):
+        with mock.patch('aussieaddonscommon.utils.log'):
+            for name, use_prefetch in (('direct', False),
+                                       ('prefetched', True)):
+                store.clear()
+                clicks = []
+                for page in range(CLICKS):
+                    # Render the current page, then prefetch the next
+                    session = make_session()
+                    url = server.url('/%s?page=%d' % (name, page))
+                    started = time.time()
+                    session.get(url)
+                    clicks.append(time.time() - started)
+                    if use_prefetch:
+                        prefetcher = prefetch.Prefetcher(session)
+                        prefetcher.add(server.url('/%s?page=%d' % (
+                            name, page + 1)))
+                        prefetcher.finish()
+                # The first page can't have been prefetched
+                later = clicks[1:]
+                print('%-10s first %6.1f ms, next pages %6.1f ms on '
+                      'average' % (name, clicks[0] * 1000,
+                                   sum(later) / len(later) * 1000))
+    server.stop()
+    store.close()
+    shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
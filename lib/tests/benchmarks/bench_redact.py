@@ -0,0 +1,58 @@
+"""Log redaction throughput
+
+Run from the lib directory with: python -m tests.benchmarks.bench_redact
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import re
+import timeit
+
+from aussieaddonscommon import redact
+from tests.unit.test_redact import make_corpus
+
+# The patterns used before the single pass engine, applied one at a time
+LEGACY_FILTERS = (
+    ('//.+?:.+?@', '//[FILTERED_USER]:[FILTERED_PASSWORD]@'),
+    ('<user>.+?</user>', '<user>[FILTERED_USER]</user>'),
+    ('<pass>.+?</pass>', '<pass>[FILTERED_PASSWORD]</pass>'),
+)
+
+
+def legacy_redact(text):
+    for pattern, repl in LEGACY_FILTERS:
+        text = re.sub(pattern, repl, text)
+    return text
+
+
+def plain_passes(text):
+    """All the default and extra rules, each as a plain re.sub pass"""
+    for rule in redact.DEFAULT_RULES + redact.EXTRA_RULES:
+        text = re.sub(rule[0], rule[1], text,
+                      flags=re.IGNORECASE if len(rule) > 2 else 0)
+    return text
+
+
+def report(name, func, text, number=5):
+    best = min(timeit.repeat(lambda: func(text), number=1, repeat=number))
+    size = len(text.encode('utf-8')) / 1024.0 / 1024.0
+    print('%-28s %8.1f MB/s' % (name, size / best))
+
+
+def main():
+    corpus, _ = make_corpus(lines=50000)
+    default = redact.Redactor()
+    full = redact.get_default_redactor()
+    report('legacy (3 x re.sub)', legacy_redact, corpus)
+    report('Redactor (default rules)', default.redact, corpus)
+    report('plain passes (all rules)', plain_passes, corpus)
+    report('Redactor (default + extra)', full.redact, corpus)
+
+    # A single long line without a closing delimiter is where the legacy
+    # '.+?' patterns degrade badly
+    line = '//' + 'a' * 20000 + ' ' + '<user>' * 2000
+    report('legacy, pathological line', legacy_redact, line, number=1)
+    report('Redactor, pathological line', full.redact, line, number=1)
+
+
+if __name__ == '__main__':
+    main()
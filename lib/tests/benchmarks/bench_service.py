@@ -0,0 +1,50 @@
+"""Repeat navigation through the background service against direct mode
+
+Run from the lib directory with: python -m tests.benchmarks.bench_service
+
+Each click builds a new Session or ServiceClient, as a new plugin
+invocation would. The local API server waits DELAY before answering.
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import time
+import timeit
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+from aussieaddonscommon import service
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+DELAY = 0.1
+BODY = '{"items": [%s]}' % ', '.join(['{"id": 1}'] * 500)
+
+
+def main():
+    def handler(path):
+        time.sleep(DELAY)
+        return 200, {'Content-Type': 'application/json'}, BODY
+
+    server = fakes.FakeServer(handler).start()
+    url = server.url('/catalog')
+    with mock.patch('xbmcaddon.Addon', fakes.FakeAddon), \
+            mock.patch('xbmcgui.Window', fakes.FakeWindow), \
+            mock.patch('aussieaddonscommon.utils.log'):
+        direct = min(timeit.repeat(
+            lambda: Session().get(url).json(), number=1, repeat=5))
+        svc = service.Service(Session(), addon_id='bench').start()
+        service.ServiceClient('bench').get(url)
+        warm = min(timeit.repeat(
+            lambda: service.ServiceClient('bench').get(url).json(),
+            number=1, repeat=5))
+        svc.stop()
+    server.stop()
+    print('direct  %7.2f ms per click' % (direct * 1000))
+    print('service %7.2f ms per click' % (warm * 1000))
+
+
+if __name__ == '__main__':
+    main()
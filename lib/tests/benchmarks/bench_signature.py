@@ -0,0 +1,65 @@
+"""Error signature cost on deep tracebacks
+
+Run from the lib directory with: python -m tests.benchmarks.bench_signature
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import timeit
+import traceback
+
+from aussieaddonscommon import signature
+from tests.unit import fakes
+
+
+class LinkedTraceback(object):
+    """Like fakes.FakeTraceback, but with tb_next built up front
+
+    FakeTraceback builds a new object for every tb_next access, which
+    would dominate the timings for deep stacks.
+    """
+    def __init__(self, frame, lineno, tb_next=None):
+        self.tb_frame = frame
+        self.tb_lineno = lineno
+        self.tb_lasti = -1
+        self.tb_next = tb_next
+
+
+def make_traceback(depth):
+    tb = None
+    for i in reversed(range(depth)):
+        code = fakes.FakeCode('/path/to/module%d.py' % (i % 7),
+                              'function_%d' % i)
+        tb = LinkedTraceback(fakes.FakeFrame(code, {}), i + 1, tb)
+    return tb
+
+
+def main():
+    exc_value = fakes.FakeException(
+        'Error fetching https://api.example.com/v2/video/1234567?token=abc '
+        'from <Session object at 0x7f3a2b1c0d90>')
+    number = 1000
+    for depth in (10, 100, 1000):
+        tb = make_traceback(depth)
+        fast = min(timeit.repeat(
+            lambda: signature.ErrorSignature(fakes.FakeException, exc_value,
+                                             tb).digest,
+            number=number, repeat=3)) / number
+        full = min(timeit.repeat(
+            lambda: traceback.format_exception(fakes.FakeException,
+                                               exc_value, tb),
+            number=10, repeat=3)) / 10
+        print('depth %4d: signature %8.1f us, format_exception %8.1f us' % (
+            depth, fast * 1e6, full * 1e6))
+
+    # FakeTraceback itself, as used by the unit tests
+    tb = fakes.FakeTraceback([fakes.frame1, fakes.frame2] * 50,
+                             list(range(100)))
+    fake = min(timeit.repeat(
+        lambda: signature.ErrorSignature(fakes.FakeException, exc_value,
+                                         tb).digest,
+        number=number, repeat=3)) / number
+    print('FakeTraceback depth 100: signature %8.1f us' % (fake * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""datetime.strptime against timeparse on the times of a 7 day EPG
+
+Run from the lib directory with: python -m tests.benchmarks.bench_timeparse
+
+The guide has 40 channels of half hour programmes, each with a start and
+stop time, in XMLTV, ISO 8601 and RFC 2822 forms. Each is parsed value
+by value with datetime.strptime, with timeparse's parser for the form,
+and as a batch with timeparse.parse_many.
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import datetime
+import time
+
+from aussieaddonscommon import timeparse
+
+CHANNELS = 40
+DAYS = 7
+
+
+def schedule():
+    start = datetime.datetime(2024, 1, 1, tzinfo=timeparse.AEST)
+    slot = datetime.timedelta(minutes=30)
+    times = []
+    for _ in range(CHANNELS):
+        for i in range(DAYS * 48):
+            times.append(start + i * slot)
+            times.append(start + (i + 1) * slot)
+    return times
+
+
+def best(func, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        started = time.time()
+        result = func()
+        timings.append(time.time() - started)
+    return min(timings), result
+
+
+def main():
+    times = schedule()
+    print('%d times, %d distinct' % (len(times), len(set(times))))
+    for name, fmt, parser in (
+            ('XMLTV', '%Y%m%d%H%M%S %z', timeparse.parse_xmltv),
+            ('ISO 8601', '%Y-%m-%dT%H:%M:%S%z', timeparse.parse_iso8601),
+            ('RFC 2822', '%a, %d %b %Y %H:%M:%S %z',
+             timeparse.parse_rfc2822)):
+        if parser is timeparse.parse_iso8601:
+            values = [dt.isoformat() for dt in times]
+        else:
+            values = [dt.strftime(fmt) for dt in times]
+        print('%s, such as %s' % (name, values[0]))
+        baseline = None
+        for method, func in (
+                ('datetime.strptime', lambda: [
+                    datetime.datetime.strptime(v, fmt) for v in values]),
+                ('timeparse.strptime', lambda: [
+                    timeparse.strptime(v, fmt) for v in values]),
+                (parser.__name__, lambda: [parser(v) for v in values]),
+                ('parse_many', lambda: timeparse.parse_many(values,
+                                                            parser))):
+            elapsed, result = best(func)
+            assert result == times
+            baseline = baseline or elapsed
+            print('  %-19s %7.1f ms, %5.2f us per time, %5.1fx' % (
+                method, elapsed * 1000, elapsed / len(values) * 10 ** 6,
+                baseline / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Window property cache against the disk caches, for small JSON values
+
+Run from the lib directory with: python -m tests.benchmarks.bench_windowcache
+
+Window properties are stood in for by fakes.FakeWindow, a dict. In Kodi
+each property access is a call into Kodi's C++ side, still without disk
+access. Each disk read opens the file afresh, as a new invocation would.
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import json
+import os
+import shutil
+import tempfile
+import timeit
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+from aussieaddonscommon import cache
+from aussieaddonscommon import paths
+from aussieaddonscommon import windowcache
+from tests.unit import fakes
+
+NUMBER = 2000
+VALUE = {'country': 'AU', 'org': 'AS1221 Telstra', 'city': 'Melbourne',
+         'platform': 'Android', 'build': '19.4 (19.4.0) Git:20220302'}
+
+
+def json_file_get(path):
+    with open(path) as f:
+        return json.load(f)['info']
+
+
+def main():
+    tmpdir = tempfile.mkdtemp()
+    json_path = os.path.join(tmpdir, 'info.json')
+    paths.atomic_write(json_path, json.dumps({'info': VALUE}).encode('utf-8'))
+
+    with mock.patch('xbmcaddon.Addon', fakes.FakeAddon), \
+            mock.patch('xbmcgui.Window', fakes.FakeWindow):
+        window_cache = windowcache.WindowCache()
+        window_cache.set('info', VALUE)
+        store = cache.CacheStore(os.path.join(tmpdir, 'cache.db'))
+        store.set('info', VALUE)
+
+        def store_get():
+            # A new invocation opens the database again
+            fresh = cache.CacheStore(store.path)
+            value = fresh.get('info')
+            fresh.close()
+            return value
+
+        results = [
+            ('window', lambda: window_cache.get('info')),
+            ('sqlite', store_get),
+            ('json file', lambda: json_file_get(json_path)),
+        ]
+        for name, get in results:
+            assert get() == VALUE
+            best = min(timeit.repeat(get, number=NUMBER, repeat=3))
+            print('%-10s %7.2f us per get' % (name, best / NUMBER * 10 ** 6))
+        store.close()
+    shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
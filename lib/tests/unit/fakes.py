@@ -1,4 +1,15 @@
 # This Python file uses the following encoding: utf-8
+import heapq
+import json
+import os
+import select
+import socket
+import threading
+import time
+
+from future.moves.http.server import BaseHTTPRequestHandler, HTTPServer
+from future.moves.socketserver import ThreadingMixIn
+
 
 # utils.py
 class FakeAddon(object):
@@ -6,6 +17,7 @@ class FakeAddon(object):
         self.id = id
         self.name = 'Test Add-on'
         self.version = '0.0.1'
+        self.profile = 'special://profile/addon_data/test.addon/'
 
     def getSetting(self, id):
         return ''
@@ -19,6 +31,250 @@ class FakeAddon(object):
     def getAddonInfo(self, key):
         return getattr(self, key)
 
+
+class FakeWindow(object):
+    """Stand-in for xbmcgui.Window, sharing properties by window id
+
+    As in Kodi, properties set through one Window object are seen by any
+    other for the same window. Clear properties between tests.
+    """
+    properties = {}
+
+    def __init__(self, existingWindowId=-1):
+        self.id = existingWindowId
+
+    def _properties(self):
+        return FakeWindow.properties.setdefault(self.id, {})
+
+    def getProperty(self, key):
+        return self._properties().get(key.lower(), '')
+
+    def setProperty(self, key, value):
+        self._properties()[key.lower()] = value
+
+    def clearProperty(self, key):
+        self._properties().pop(key.lower(), None)
+
+    def clearProperties(self):
+        self._properties().clear()
+
+
+class FakeJSONRPC(object):
+    """Stand-in for xbmc.executeJSONRPC that records each call
+
+    Answers Settings.GetSettingValue from a dict of values, and any other
+    methods from a dict of method name to result (or a callable taking the
+    params), for both single and batch requests (unless batch is False,
+    like older Kodi versions).
+    """
+    def __init__(self, values=None, batch=True, methods=None):
+        self.values = values or {}
+        self.batch = batch
+        self.methods = methods or {}
+        self.calls = []
+
+    def respond(self, request):
+        method = request.get('method')
+        params = request.get('params', {})
+        response = {'jsonrpc': '2.0', 'id': request.get('id')}
+        if method == 'Settings.GetSettingValue':
+            if params.get('setting') in self.values:
+                response['result'] = {
+                    'value': self.values[params['setting']]}
+            else:
+                response['error'] = {'code': -32602,
+                                     'message': 'Invalid params.'}
+        elif method in self.methods:
+            result = self.methods[method]
+            response['result'] = result(params) if callable(result) \
+                else result
+        else:
+            response['error'] = {'code': -32601,
+                                 'message': 'Method not found.'}
+        return response
+
+    def __call__(self, query):
+        self.calls.append(query)
+        request = json.loads(query)
+        if isinstance(request, list):
+            if not self.batch:
+                return json.dumps({'jsonrpc': '2.0', 'id': None, 'error': {
+                    'code': -32600, 'message': 'Invalid request.'}})
+            return json.dumps([self.respond(r) for r in request])
+        return json.dumps(self.respond(request))
+
+
+# session.py
+def unset_ca_bundle(test):
+    """Stop a CA bundle in the environment overriding verify=False
+
+    requests prefers REQUESTS_CA_BUNDLE or CURL_CA_BUNDLE over a session's
+    verify=False, which breaks tests against self-signed local servers.
+    """
+    try:
+        import mock
+    except ImportError:
+        import unittest.mock as mock
+    patcher = mock.patch.dict('os.environ')
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    for name in ('REQUESTS_CA_BUNDLE', 'CURL_CA_BUNDLE'):
+        os.environ.pop(name, None)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 100
+
+
+class FakeServer(object):
+    """Local HTTP server running in a background thread
+
+    handler is called with the request path for each request and returns
+    (status, headers, body). It can sleep or raise to act like a slow or
+    broken server, and can be swapped at any time. Every requested path
+    is recorded in paths, and its request headers in headers.
+
+    With ssl_context, the server speaks HTTPS instead. Connections are
+    closed after each response, unless keep_alive is set.
+    """
+    def __init__(self, handler, ssl_context=None, keep_alive=False):
+        self.handler = handler
+        self.paths = []
+        self.headers = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1' if keep_alive else 'HTTP/1.0'
+
+            def do_GET(self):
+                server.paths.append(self.path)
+                server.headers.append(dict(self.headers.items()))
+                status, headers, body = server.handler(self.path)
+                if not isinstance(body, bytes):
+                    body = body.encode('utf-8')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_POST = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = _ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.scheme = 'http'
+        if ssl_context is not None:
+            self.httpd.socket = ssl_context.wrap_socket(self.httpd.socket,
+                                                        server_side=True)
+            self.scheme = 'https'
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+                                       kwargs={'poll_interval': 0.05})
+        self.thread.daemon = True
+
+    def url(self, path='/'):
+        return '%s://127.0.0.1:%d%s' % (self.scheme,
+                                        self.httpd.server_address[1], path)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FakeH2Server(object):
+    """Local HTTP/2 server over TLS, for tests needing the h2 package
+
+    Every request is answered with status and body after delay seconds,
+    without blocking other streams on the same connection. The number of
+    connections accepted is counted in connections.
+    """
+    def __init__(self, ssl_context, body=b'ok', status=200, delay=0):
+        ssl_context.set_alpn_protocols(['h2'])
+        self.ssl_context = ssl_context
+        self.body = body
+        self.status = status
+        self.delay = delay
+        self.connections = 0
+        self.requests = 0
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(100)
+        self.running = True
+
+    def url(self, path='/'):
+        return 'https://127.0.0.1:%d%s' % (self.sock.getsockname()[1], path)
+
+    def start(self):
+        thread = threading.Thread(target=self._accept)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.sock.close()
+
+    def _accept(self):
+        while self.running:
+            try:
+                sock, _ = self.sock.accept()
+            except (OSError, socket.error):
+                return
+            self.connections += 1
+            thread = threading.Thread(target=self._serve, args=(sock,))
+            thread.daemon = True
+            thread.start()
+
+    def _serve(self, sock):
+        import h2.config
+        import h2.connection
+        import h2.events
+        try:
+            tls = self.ssl_context.wrap_socket(sock, server_side=True)
+        except (OSError, socket.error):
+            return
+        conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        tls.sendall(conn.data_to_send())
+        pending = []
+        connected = True
+        while self.running and connected:
+            now = time.time()
+            while pending and pending[0][0] <= now:
+                stream_id = heapq.heappop(pending)[1]
+                conn.send_headers(stream_id, [
+                    (':status', str(self.status)),
+                    ('content-length', str(len(self.body)))])
+                conn.send_data(stream_id, self.body, end_stream=True)
+            tls.sendall(conn.data_to_send())
+            timeout = max(0, pending[0][0] - now) if pending else 0.05
+            if not tls.pending() and not select.select([tls], [], [],
+                                                       timeout)[0]:
+                continue
+            try:
+                data = tls.recv(65535)
+            except (OSError, socket.error):
+                break
+            if not data:
+                break
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    self.requests += 1
+                    heapq.heappush(pending, (time.time() + self.delay,
+                                             event.stream_id))
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    connected = False
+        tls.close()
+
+
 #  fakes for tracebacks
 #  https://stackoverflow.com/questions/19248784/faking-a-traceback-in-python
 
@@ -41,6 +297,8 @@ class FakeTraceback(object):
         self._line_nums = line_nums
         self.tb_frame = frames[0]
         self.tb_lineno = line_nums[0]
+        # No bytecode offset, traceback skips column info on Python 3.11+
+        self.tb_lasti = -1
 
     @property
     def tb_next(self):
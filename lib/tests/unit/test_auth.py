@@ -0,0 +1,224 @@
+from __future__ import absolute_import, unicode_literals
+
+import os
+import shutil
+import tempfile
+import threading
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import requests
+
+import responses
+
+import testtools
+
+from aussieaddonscommon import auth
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+LOGIN_URL = 'http://auth.foo.bar/login'
+API_URL = 'http://foo.bar/api/1/foobar'
+
+
+class FakeLogin(object):
+    """fetch_token function that logs in with the fake auth server"""
+    def __init__(self, expires_in=3600):
+        self.expires_in = expires_in
+        self.calls = 0
+
+    def __call__(self, session, token):
+        self.calls += 1
+        data = session.post(LOGIN_URL).json()
+        return auth.Token(data['token'], data['expires'])
+
+
+def add_login(tokens, expires):
+    tokens = iter(tokens)
+    responses.add_callback(
+        responses.POST, LOGIN_URL, content_type='application/json',
+        callback=lambda r: (200, {}, '{"token": "%s", "expires": %d}' % (
+            next(tokens), expires)))
+
+
+def check_token(request):
+    if request.headers.get('Authorization') == 'Bearer good':
+        return 200, {}, '{"ok": true}'
+    return 401, {}, '{"ok": false}'
+
+
+class TokenTests(testtools.TestCase):
+
+    def test_expires_within(self):
+        token = auth.Token('abc', 1000)
+        self.assertIs(False, token.expires_within(100, now=800))
+        self.assertIs(True, token.expires_within(100, now=900))
+        self.assertIs(False, auth.Token('abc').expires_within(100))
+
+    def test_header(self):
+        self.assertEqual('Bearer abc', auth.Token('abc').header)
+        self.assertEqual('abc', auth.Token('abc', token_type=None).header)
+
+    def test_store(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        store = auth.TokenStore(os.path.join(tmpdir, auth.TOKEN_FILE))
+        self.assertIs(None, store.load('foo'))
+        store.save('foo', auth.Token('abc', 1000, refresh_token='def'))
+        store.save('bar', auth.Token('ghi'))
+        token = auth.TokenStore(store.path).load('foo')
+        self.assertEqual(('abc', 1000, 'def'),
+                         (token.value, token.expires, token.refresh_token))
+        store.save('foo', None)
+        self.assertIs(None, store.load('foo'))
+        self.assertEqual('ghi', store.load('bar').value)
+
+    def test_store_locked(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        store = auth.TokenStore(os.path.join(tmpdir, auth.TOKEN_FILE))
+        with mock.patch('aussieaddonscommon.paths.file_lock') as mock_lock:
+            store.save('foo', auth.Token('abc'))
+        mock_lock.assert_called_once_with(store.path + '.lock')
+
+
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class TokenManagerTests(testtools.TestCase):
+
+    def setUp(self):
+        super(TokenManagerTests, self).setUp()
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.store = auth.TokenStore(os.path.join(tmpdir, auth.TOKEN_FILE))
+
+    def make_manager(self, fetch_token):
+        return auth.TokenManager(fetch_token, 'foo', store=self.store)
+
+    def test_get_token_cached(self):
+        fetch = mock.Mock(return_value=auth.Token('abc', 10 ** 10))
+        manager = self.make_manager(fetch)
+        self.assertEqual('abc', manager.get_token().value)
+        self.assertEqual('abc', manager.get_token().value)
+        # A later invocation loads it from the store
+        self.assertEqual('abc', self.make_manager(fetch).get_token().value)
+        self.assertEqual(1, fetch.call_count)
+
+    def test_get_token_expired(self):
+        fetch = mock.Mock(side_effect=[auth.Token('abc', 1000),
+                                       auth.Token('def', 10 ** 10)])
+        manager = self.make_manager(fetch)
+        self.assertEqual('abc', manager.get_token(now=0).value)
+        self.assertEqual('def', manager.get_token(now=990).value)
+        self.assertEqual('abc', fetch.call_args[0][1].value)
+
+    def test_proactive_refresh(self):
+        fetch = mock.Mock(side_effect=[auth.Token('abc', 1000),
+                                       auth.Token('def', 10 ** 10)])
+        manager = self.make_manager(fetch)
+        manager.get_token(now=0)
+        with mock.patch.object(manager, 'refresh_in_background') as bg:
+            self.assertEqual('abc', manager.get_token(now=800).value)
+            bg.assert_called_once_with()
+        manager.refresh_in_background().join()
+        self.assertEqual('def', manager.get_token().value)
+        self.assertEqual('def', self.store.load('foo').value)
+
+    def test_single_flight(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def fetch(session, token):
+            started.set()
+            release.wait(5)
+            return auth.Token('token%d' % fetch.calls.pop(), 10 ** 10)
+        fetch.calls = [2, 1]
+
+        manager = self.make_manager(fetch)
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(manager.refresh().value))
+            for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(['token1'] * 5, results)
+        self.assertEqual([2], fetch.calls)
+
+    def test_invalidate(self):
+        fetch = mock.Mock(return_value=auth.Token('abc', 10 ** 10))
+        manager = self.make_manager(fetch)
+        manager.get_token()
+        manager.invalidate()
+        self.assertIs(None, self.store.load('foo'))
+        manager.get_token()
+        self.assertEqual(2, fetch.call_count)
+
+
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class TokenAuthTests(testtools.TestCase):
+
+    def setUp(self):
+        super(TokenAuthTests, self).setUp()
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.store = auth.TokenStore(os.path.join(tmpdir, auth.TOKEN_FILE))
+        self.login = FakeLogin()
+        self.manager = auth.TokenManager(self.login, 'foo', store=self.store)
+        self.session = self.manager.attach(Session())
+
+    @responses.activate
+    def test_attach(self):
+        add_login(['good'], 10 ** 10)
+        responses.add_callback(responses.GET, API_URL, callback=check_token)
+        self.assertIs(True, self.session.get(API_URL).json()['ok'])
+        self.assertIs(True, self.session.get(API_URL).json()['ok'])
+        self.assertEqual(1, self.login.calls)
+
+    @responses.activate
+    def test_retry_on_401(self):
+        # The server revoked the stored token before its expiry
+        self.store.save('foo', auth.Token('revoked', 10 ** 10))
+        add_login(['good'], 10 ** 10)
+        responses.add_callback(responses.GET, API_URL, callback=check_token)
+        response = self.session.get(API_URL)
+        self.assertIs(True, response.json()['ok'])
+        self.assertEqual([401], [r.status_code for r in response.history])
+        self.assertEqual(1, self.login.calls)
+        self.assertEqual('good', self.store.load('foo').value)
+
+    @responses.activate
+    def test_retry_cookies(self):
+        self.store.save('foo', auth.Token('revoked', 10 ** 10))
+        add_login(['good'], 10 ** 10)
+
+        def check_cookie(request):
+            if request.headers.get('Authorization') != 'Bearer good':
+                return 401, {'Set-Cookie': 'route=b'}, ''
+            return 200, {}, request.headers.get('Cookie', '')
+        responses.add_callback(responses.GET, API_URL, callback=check_cookie)
+        self.assertEqual('route=b', self.session.get(API_URL).text)
+
+    @responses.activate
+    def test_retry_rate_limited(self):
+        self.session.rate_limiter = mock.Mock()
+        self.session.rate_limiter.wait.return_value = None
+        self.store.save('foo', auth.Token('revoked', 10 ** 10))
+        add_login(['good'], 10 ** 10)
+        responses.add_callback(responses.GET, API_URL, callback=check_token)
+        self.assertIs(True, self.session.get(API_URL).json()['ok'])
+        self.assertEqual([mock.call('foo.bar')] * 2,
+                         self.session.rate_limiter.wait.call_args_list)
+
+    @responses.activate
+    def test_retry_once(self):
+        add_login(['bad1', 'bad2', 'bad3'], 10 ** 10)
+        responses.add_callback(responses.GET, API_URL, callback=check_token)
+        self.assertRaises(requests.exceptions.HTTPError, self.session.get,
+                          API_URL)
+        self.assertEqual(2, self.login.calls)
@@ -0,0 +1,71 @@
+from __future__ import absolute_import, unicode_literals
+
+import io
+import os
+import random
+import shutil
+import tempfile
+
+import testtools
+
+from aussieaddonscommon import blacklist
+from tests.unit import fakes
+
+
+class SubstringMatcherTests(testtools.TestCase):
+
+    def test_search(self):
+        matcher = blacklist.SubstringMatcher(['he', 'she', 'his', 'hers'])
+        self.assertEqual(4, matcher.size)
+        self.assertIs(True, matcher.search('ushers'))
+        self.assertIs(True, matcher.search('this'))
+        self.assertIs(False, matcher.search('hxsxe'))
+        self.assertIs(False, blacklist.SubstringMatcher().search('foo'))
+
+    def test_matches_naive_search(self):
+        rnd = random.Random(42)
+        patterns = [''.join(rnd.choice('abc') for _ in range(rnd.randint(2, 6)))
+                    for _ in range(50)]
+        matcher = blacklist.SubstringMatcher(patterns)
+        for _ in range(500):
+            text = ''.join(rnd.choice('abcd') for _ in range(rnd.randint(0, 8)))
+            self.assertEqual(any(p in text for p in patterns),
+                             matcher.search(text), text)
+
+
+class BlacklistTests(testtools.TestCase):
+
+    def setUp(self):
+        super(BlacklistTests, self).setUp()
+        self.blacklist = blacklist.Blacklist.from_file()
+
+    def test_connection_info(self):
+        for info in fakes.VALID_CONNECTION_INFO:
+            self.assertIs(False, self.blacklist.is_blacklisted(info))
+        for info in fakes.INVALID_CONNECTION_INFO[1:]:
+            self.assertIs(True, self.blacklist.is_blacklisted(info))
+        self.assertIs(False, self.blacklist.is_blacklisted(None))
+
+    def test_asn(self):
+        self.assertIs(True, self.blacklist.is_blacklisted(
+            {'org': 'AS45671 Servers Australia Pty. Ltd'}))
+        self.assertIs(False, self.blacklist.is_blacklisted(
+            {'org': 'AS456710 Some Other Network'}))
+
+    def test_from_file(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'blacklist.txt')
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write('# comment\n\nasn as123\norg Foo VPN  # trailing\n'
+                    'hostname .bar.\n')
+        observed = blacklist.Blacklist.from_file(path)
+        self.assertEqual(frozenset(['AS123']), observed.asns)
+        self.assertIs(True, observed.is_blacklisted_org('AS9 the foo vpn co'))
+        self.assertIs(True, observed.is_blacklisted_hostname('1.BAR.net'))
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write('ip 1.2.3.4\n')
+        self.assertRaises(ValueError, blacklist.Blacklist.from_file, path)
+
+    def test_get_blacklist_cached(self):
+        self.assertIs(blacklist.get_blacklist(), blacklist.get_blacklist())
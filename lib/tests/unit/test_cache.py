@@ -0,0 +1,122 @@
+from __future__ import absolute_import, unicode_literals
+
+import os
+import shutil
+import tempfile
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import testtools
+
+from aussieaddonscommon import cache
+
+
+class CacheStoreTests(testtools.TestCase):
+
+    def setUp(self):
+        super(CacheStoreTests, self).setUp()
+        self.store = cache.CacheStore(':memory:', namespace='plugin.foo',
+                                      default_ttl=100, max_entries=5)
+
+    def test_get_set(self):
+        self.assertIs(None, self.store.get('abc'))
+        self.assertEqual('x', self.store.get('abc', 'x'))
+        self.store.set('abc', {'a': [1, 2]}, now=0)
+        self.assertEqual({'a': [1, 2]}, self.store.get('abc', now=10))
+        self.store.delete('abc')
+        self.assertIs(None, self.store.get('abc', now=10))
+
+    def test_ttl(self):
+        self.store.set('abc', 1, now=0)
+        self.store.set('def', 2, ttl=10, now=0)
+        self.store.set('ghi', 3, ttl=None, now=0)
+        self.assertEqual(2, self.store.get('def', now=9))
+        self.assertIs(None, self.store.get('def', now=10))
+        self.assertEqual(1, self.store.get('abc', now=99))
+        self.assertIs(None, self.store.get('abc', now=100))
+        self.assertEqual(3, self.store.get('ghi', now=10 ** 9))
+
+    def test_purge_expired(self):
+        self.store.set('abc', 1, ttl=10, now=0)
+        self.store.set('def', 2, ttl=50, now=0)
+        self.store.purge_expired(now=20)
+        self.assertEqual(1, len(self.store))
+
+    def test_namespaces(self):
+        other = cache.CacheStore(':memory:', namespace='plugin.bar')
+        other._local = self.store._local
+        self.store.set('abc', 1)
+        other.set('abc', 2)
+        self.assertEqual(1, self.store.get('abc'))
+        self.assertEqual(2, other.get('abc'))
+        other.clear()
+        self.assertEqual(1, self.store.get('abc'))
+        self.assertIs(None, other.get('abc'))
+
+    def test_lru_eviction(self):
+        for i in range(5):
+            self.store.set('key%d' % i, i, now=i)
+        later = cache.ACCESS_RESOLUTION + 10
+        self.store.get('key0', now=later)
+        self.store.set('key5', 5, now=later + 1)
+        self.assertEqual(5, len(self.store))
+        self.assertEqual(0, self.store.get('key0', now=later + 2))
+        self.assertIs(None, self.store.get('key1', now=later + 2))
+
+    def test_get_without_write(self):
+        self.store.set('abc', 1, now=0)
+        changes = self.store.conn.total_changes
+        self.store.get('abc', now=cache.ACCESS_RESOLUTION - 1)
+        self.assertEqual(changes, self.store.conn.total_changes)
+        self.store.get('abc', now=cache.ACCESS_RESOLUTION)
+        self.assertEqual(changes + 1, self.store.conn.total_changes)
+
+    def test_wal(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        store = cache.CacheStore(os.path.join(tmpdir, 'cache.db'),
+                                 namespace='plugin.foo')
+        self.addCleanup(store.close)
+        self.assertEqual('wal', store.conn.execute(
+            'PRAGMA journal_mode').fetchone()[0])
+
+    def test_memoize(self):
+        calls = []
+
+        @self.store.memoize(ttl=100)
+        def double(x, y=1):
+            calls.append(x)
+            return x * 2 * y
+
+        self.assertEqual(4, double(2))
+        self.assertEqual(4, double(2))
+        self.assertEqual(8, double(2, y=2))
+        self.assertEqual(6, double(3))
+        self.assertEqual([2, 2, 3], calls)
+
+    def test_persistence(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, cache.CACHE_FILE)
+        first = cache.CacheStore(path, namespace='plugin.foo')
+        first.set('abc', [1, 2, 3])
+        first.close()
+        second = cache.CacheStore(path, namespace='plugin.foo')
+        self.addCleanup(second.close)
+        self.assertEqual([1, 2, 3], second.get('abc'))
+
+    @mock.patch('aussieaddonscommon.utils.get_addon_id')
+    @mock.patch('aussieaddonscommon.utils.get_file_dir')
+    def test_get_store(self, mock_get_file_dir, mock_get_addon_id):
+        mock_get_file_dir.return_value = '/foo'
+        mock_get_addon_id.return_value = 'plugin.foo'
+        self.addCleanup(setattr, cache, '_store', None)
+        cache._store = None
+        observed = cache.get_store()
+        self.assertEqual(os.path.join('/foo', cache.CACHE_FILE),
+                         observed.path)
+        self.assertEqual('plugin.foo', observed.ns)
+        self.assertIs(observed, cache.get_store())
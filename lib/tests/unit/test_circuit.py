@@ -0,0 +1,156 @@
+from __future__ import absolute_import, unicode_literals
+
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import requests
+
+import testtools
+
+from aussieaddonscommon import cache, circuit
+from aussieaddonscommon.exceptions import AussieAddonsException
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(response=response)
+
+
+class CircuitBreakerTests(testtools.TestCase):
+
+    def setUp(self):
+        super(CircuitBreakerTests, self).setUp()
+        self.breaker = circuit.CircuitBreaker('foo.bar', failure_threshold=3,
+                                              reset_timeout=60)
+
+    def test_opens(self):
+        for now in range(3):
+            self.breaker.before_request(now=now)
+            self.breaker.record_failure(now=now)
+        self.assertEqual(circuit.OPEN, self.breaker.state)
+        e = self.assertRaises(circuit.CircuitOpenError,
+                              self.breaker.before_request, now=30)
+        self.assertEqual(62, e.retry_at)
+        self.assertIsInstance(e, AussieAddonsException)
+
+    def test_success_resets(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(circuit.CLOSED, self.breaker.state)
+
+    def test_half_open(self):
+        for _ in range(3):
+            self.breaker.record_failure(now=0)
+        # One trial request is let through after the cool-down
+        self.breaker.before_request(now=60)
+        self.assertEqual(circuit.HALF_OPEN, self.breaker.state)
+        self.assertRaises(circuit.CircuitOpenError,
+                          self.breaker.before_request, now=61)
+        self.breaker.record_failure(now=61)
+        self.assertEqual(circuit.OPEN, self.breaker.state)
+        self.assertRaises(circuit.CircuitOpenError,
+                          self.breaker.before_request, now=100)
+        self.breaker.before_request(now=121)
+        self.breaker.record_success()
+        self.assertEqual(circuit.CLOSED, self.breaker.state)
+        self.breaker.before_request(now=122)
+
+    def test_is_failure(self):
+        self.assertIs(True, circuit.is_failure(AussieAddonsException('x')))
+        self.assertIs(True, circuit.is_failure(http_error(503)))
+        self.assertIs(False, circuit.is_failure(http_error(404)))
+        self.assertIs(False, circuit.is_failure(ValueError()))
+
+
+class CircuitRegistryTests(testtools.TestCase):
+
+    def test_shared(self):
+        registry = circuit.CircuitRegistry()
+        self.assertIs(registry.get('foo.bar'), registry.get('foo.bar'))
+        self.assertIsNot(registry.get('foo.bar'), registry.get('baz.bar'))
+
+    def test_persistence(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, cache.CACHE_FILE)
+        store = cache.CacheStore(path, namespace='test.addon')
+        registry = circuit.CircuitRegistry(failure_threshold=2, store=store)
+        registry.get('foo.bar').record_failure()
+        registry.get('foo.bar').record_failure()
+        store.close()
+
+        # The next invocation starts with the circuit open
+        store = cache.CacheStore(path, namespace='test.addon')
+        self.addCleanup(store.close)
+        registry = circuit.CircuitRegistry(failure_threshold=2, store=store)
+        self.assertRaises(circuit.CircuitOpenError,
+                          registry.get('foo.bar').before_request)
+        registry.reset()
+        registry.get('foo.bar').before_request()
+
+
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class SessionCircuitTests(testtools.TestCase):
+
+    def setUp(self):
+        super(SessionCircuitTests, self).setUp()
+        self.status = 503
+        self.server = fakes.FakeServer(
+            lambda path: (self.status, {}, 'body')).start()
+        self.addCleanup(self.server.stop)
+        self.registry = circuit.CircuitRegistry(failure_threshold=2,
+                                                reset_timeout=60)
+
+    def make_session(self):
+        return Session(max_retries=1, circuit_breaker=self.registry)
+
+    def test_fail_fast(self):
+        s = self.make_session()
+        for _ in range(2):
+            self.assertRaises(AussieAddonsException, s.get, self.server.url())
+        requests_made = len(self.server.paths)
+
+        # Another session in the same process shares the open circuit
+        start = time.time()
+        self.assertRaises(circuit.CircuitOpenError, self.make_session().get,
+                          self.server.url())
+        self.assertLess(time.time() - start, 0.05)
+        self.assertEqual(requests_made, len(self.server.paths))
+
+    def test_recovery(self):
+        s = self.make_session()
+        for _ in range(2):
+            self.assertRaises(AussieAddonsException, s.get, self.server.url())
+        self.status = 200
+        host = self.server.url().split('/')[2]
+        breaker = self.registry.get(host)
+        breaker.opened_at -= 60
+        self.assertEqual('body', s.get(self.server.url()).text)
+        self.assertEqual(circuit.CLOSED, breaker.state)
+
+    def test_client_errors(self):
+        self.status = 404
+        s = self.make_session()
+        for _ in range(3):
+            self.assertRaises(requests.exceptions.HTTPError, s.get,
+                              self.server.url())
+        self.assertEqual(3, len(self.server.paths))
+
+    def test_shared_registry(self):
+        self.addCleanup(setattr, circuit, '_registry', None)
+        circuit._registry = None
+        self.assertIs(circuit.get_registry(),
+                      Session(circuit_breaker=True).circuit_breaker)
+        self.assertIs(None, Session().circuit_breaker)
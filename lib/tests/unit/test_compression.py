@@ -0,0 +1,126 @@
+from __future__ import absolute_import, unicode_literals
+
+import gzip
+import io
+import json
+import zlib
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import testtools
+
+from aussieaddonscommon import compression
+from aussieaddonscommon import metrics
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+CATALOG = json.dumps([{'id': i, 'title': 'Episode %d' % i,
+                       'description': 'The same old description'}
+                      for i in range(2000)]).encode('utf-8')
+
+
+def gzipped(data):
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb') as f:
+        f.write(data)
+    return buf.getvalue()
+
+
+class AcceptEncodingTests(testtools.TestCase):
+
+    def test_default(self):
+        value = compression.accept_encoding()
+        self.assertIn('gzip', value)
+        self.assertIn('deflate', value)
+        self.assertLess(value.index('gzip'), value.index('deflate'))
+
+    def test_only_supported(self):
+        self.assertEqual('deflate, gzip', compression.accept_encoding(
+            ['deflate', 'compress', 'gzip']))
+
+    def test_none(self):
+        self.assertEqual('identity', compression.accept_encoding([]))
+        self.assertEqual('identity', compression.accept_encoding(['lzma']))
+
+
+class TransferStatsTests(testtools.TestCase):
+
+    def test_ratio(self):
+        stats = compression.TransferStats()
+        self.assertEqual(1.0, stats.ratio)
+        stats.add(100, 400)
+        stats.add(100, 400)
+        self.assertEqual(2, stats.responses)
+        self.assertEqual(0.25, stats.ratio)
+        self.assertEqual('2 responses, 200 bytes transferred, 800 bytes '
+                         'decoded (25%)', str(stats))
+
+
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class SessionCompressionTests(testtools.TestCase):
+
+    def setUp(self):
+        super(SessionCompressionTests, self).setUp()
+        self.server = fakes.FakeServer(self.handler).start()
+        self.addCleanup(self.server.stop)
+
+    def handler(self, path):
+        accepted = self.server.headers[-1].get('Accept-Encoding', '')
+        if path == '/deflate' and 'deflate' in accepted:
+            return 200, {'Content-Encoding': 'deflate'}, zlib.compress(
+                CATALOG)
+        if 'gzip' in accepted:
+            return 200, {'Content-Encoding': 'gzip'}, gzipped(CATALOG)
+        return 200, {}, CATALOG
+
+    def test_gzip(self):
+        session = Session()
+        response = session.get(self.server.url())
+        self.assertEqual(CATALOG, response.content)
+        self.assertIn('gzip', self.server.headers[0]['Accept-Encoding'])
+        stats = session.transfer_stats
+        self.assertEqual(len(gzipped(CATALOG)), stats.compressed)
+        self.assertEqual(len(CATALOG), stats.decoded)
+
+    def test_deflate(self):
+        session = Session()
+        response = session.get(self.server.url('/deflate'))
+        self.assertEqual(CATALOG, response.content)
+        self.assertEqual(len(zlib.compress(CATALOG)),
+                         session.transfer_stats.compressed)
+
+    def test_disabled(self):
+        session = Session(accept_encoding=[])
+        response = session.get(self.server.url())
+        self.assertEqual(CATALOG, response.content)
+        self.assertEqual('identity', self.server.headers[0]['Accept-Encoding'])
+        self.assertEqual(1.0, session.transfer_stats.ratio)
+
+    def test_iter_content(self):
+        session = Session()
+        chunks = list(session.iter_content(self.server.url(),
+                                           chunk_size=4096))
+        self.assertEqual(CATALOG, b''.join(chunks))
+        self.assertTrue(all(len(chunk) <= 4096 for chunk in chunks))
+        stats = session.transfer_stats
+        self.assertEqual(1, stats.responses)
+        self.assertEqual(len(gzipped(CATALOG)), stats.compressed)
+        self.assertEqual(len(CATALOG), stats.decoded)
+
+    def test_iter_content_closed_early(self):
+        session = Session()
+        chunks = session.iter_content(self.server.url(), chunk_size=4096)
+        self.assertEqual(4096, len(next(chunks)))
+        chunks.close()
+        self.assertEqual(4096, session.transfer_stats.decoded)
+
+    def test_metrics(self):
+        sink = mock.Mock()
+        Session(metrics_sinks=[sink]).get(self.server.url())
+        request_metrics = sink.call_args[0][0]
+        self.assertIsInstance(request_metrics, metrics.RequestMetrics)
+        self.assertEqual(len(gzipped(CATALOG)), request_metrics.bytes)
+        self.assertEqual(len(CATALOG), request_metrics.decoded)
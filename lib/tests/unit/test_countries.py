@@ -0,0 +1,54 @@
+from __future__ import absolute_import, unicode_literals
+
+try:
+    from importlib import reload
+except ImportError:
+    pass
+
+import testtools
+
+from aussieaddonscommon import countries
+
+
+class CountriesTests(testtools.TestCase):
+
+    def test_lazy_load(self):
+        reload(countries)
+        self.assertIs(None, countries._by_alpha2)
+        self.assertIs(None, countries._asn_starts)
+        self.assertEqual('Australia', countries.get_country_name('AU'))
+        self.assertIsNot(None, countries._by_alpha2)
+        self.assertIs(None, countries._asn_starts)
+
+    def test_get_country(self):
+        observed = countries.get_country('au')
+        self.assertEqual(('AU', 'AUS', '036', 'OC', 'Australia'),
+                         (observed.alpha2, observed.alpha3, observed.numeric,
+                          observed.continent, observed.name))
+        self.assertEqual('Oceania', observed.region)
+        self.assertIs(observed, countries.get_country('AUS'))
+        self.assertIs(None, countries.get_country('XX'))
+        self.assertIs(None, countries.get_country(None))
+
+    def test_get_country_name(self):
+        self.assertEqual('United States', countries.get_country_name('US'))
+        self.assertEqual('XX', countries.get_country_name('XX', 'XX'))
+
+    def test_get_region(self):
+        self.assertEqual('Europe', countries.get_region('GBR'))
+        self.assertIs(None, countries.get_region('XX'))
+
+    def test_get_asn_country(self):
+        self.assertEqual('AU', countries.get_asn_country(1221).alpha2)
+        self.assertEqual('AU', countries.get_asn_country('as45671').alpha2)
+        self.assertEqual(
+            'US',
+            countries.get_asn_country('AS33438 Highwinds Network').alpha2)
+        for asn in (1, 1222, 4294967295, 'foo', None):
+            self.assertIs(None, countries.get_asn_country(asn))
+
+    def test_countries_mapping(self):
+        self.assertEqual(249, len(countries.countries))
+        self.assertEqual('Australia', countries.countries['AU'])
+        self.assertEqual('Foo', countries.countries.get('XX', 'Foo'))
+        self.assertIn('NZ', countries.countries)
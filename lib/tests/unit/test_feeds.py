@@ -0,0 +1,182 @@
+from __future__ import absolute_import, unicode_literals
+
+import gzip
+import io
+
+import testtools
+
+from aussieaddonscommon import feeds
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+RSS = b'''<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/">
+  <channel>
+    <title>Channel</title>
+    <item>
+      <title>Fish &amp;amp; Chips</title>
+      <link>https://example.com/1</link>
+      <description><![CDATA[<p>It&#8217;s on &ndash; now</p>]]></description>
+      <guid>ep1</guid>
+      <pubDate>Mon, 01 Jan 2024 06:00:00 +1000</pubDate>
+      <category>News</category>
+      <category>Current Affairs</category>
+      <media:group>
+        <media:content url="https://cdn.example.com/1.m3u8" duration="60"/>
+        <media:content url="https://cdn.example.com/1.mp4"/>
+      </media:group>
+      <media:thumbnail url="https://cdn.example.com/1.jpg"/>
+      <enclosure url="https://cdn.example.com/1.mp3" type="audio/mpeg"/>
+    </item>
+    <item>
+      <title>Second</title>
+    </item>
+  </channel>
+</rss>'''
+
+XMLTV = b'''<?xml version="1.0" encoding="UTF-8"?>
+<tv>
+  <channel id="abc1"><display-name>ABC</display-name></channel>
+  <programme start="20240101060000 +1000" stop="20240101063000 +1000"
+             channel="abc1">
+    <title>News</title>
+    <sub-title>Morning &#x26; more</sub-title>
+    <desc>The news.</desc>
+    <category>News</category>
+    <episode-num system="xmltv_ns">0.1.</episode-num>
+    <icon src="https://cdn.example.com/news.png"/>
+  </programme>
+  <programme start="20240101063000 +1000" stop="20240101070000 +1000"
+             channel="abc1">
+    <title>Weather</title>
+  </programme>
+</tv>'''
+
+
+class UnescapeTests(testtools.TestCase):
+
+    def test_entities(self):
+        self.assertEqual('Fish & Chips ’ ’ é',
+                         feeds.unescape('Fish &amp; Chips &#8217; &#x2019; '
+                                        '&eacute;'))
+
+    def test_apos(self):
+        self.assertEqual("It's", feeds.unescape('It&apos;s'))
+
+    def test_unknown(self):
+        self.assertEqual('&bogus; &#xZZ; & alone',
+                         feeds.unescape('&bogus; &#xZZ; & alone'))
+
+    def test_single_pass(self):
+        self.assertEqual('&amp;', feeds.unescape('&amp;amp;'))
+
+    def test_plain(self):
+        self.assertEqual('Nothing here', feeds.unescape('Nothing here'))
+        self.assertIsNone(feeds.unescape(None))
+
+    def test_clean_text(self):
+        self.assertEqual('Bold & bright',
+                         feeds.clean_text(' <p><b>Bold</b> &amp; bright</p>'))
+
+
+class IterElementsTests(testtools.TestCase):
+
+    def test_sources(self):
+        for source in (RSS, io.BytesIO(RSS),
+                       [RSS[i:i + 7] for i in range(0, len(RSS), 7)]):
+            titles = [item.findtext('title') for item in
+                      feeds.iter_elements(source, 'item')]
+            self.assertEqual(['Fish &amp; Chips', 'Second'], titles)
+
+    def test_html_entities(self):
+        rss = (b'<rss><channel><item><title>Caf&eacute;&nbsp;&amp; '
+               b'&apos;Bar&apos;</title></item></channel></rss>')
+        for source in (rss, [rss[i:i + 3] for i in range(0, len(rss), 3)],
+                       [rss[i:i + 1] for i in range(len(rss))]):
+            titles = [item.findtext('title') for item in
+                      feeds.iter_elements(source, 'item')]
+            self.assertEqual(["Caf\xe9\xa0& 'Bar'"], titles)
+
+    def test_namespaced(self):
+        urls = [e.get('url') for e in feeds.iter_elements(
+            RSS, '{http://search.yahoo.com/mrss/}content')]
+        self.assertEqual(['https://cdn.example.com/1.m3u8',
+                          'https://cdn.example.com/1.mp4'], urls)
+
+    def test_clears_processed(self):
+        items = feeds.iter_elements(RSS, 'item')
+        first = next(items)
+        self.assertEqual(10, len(first))
+        second = next(items)
+        self.assertEqual(0, len(first))
+        self.assertIsNone(first.text)
+        self.assertEqual('Second', second.findtext('title'))
+
+
+class ParseTests(testtools.TestCase):
+
+    def test_parse_rss(self):
+        first, second = list(feeds.parse_rss(RSS))
+        self.assertEqual({
+            'title': 'Fish & Chips',
+            'link': 'https://example.com/1',
+            'description': 'It’s on – now',
+            'guid': 'ep1',
+            'pub_date': 'Mon, 01 Jan 2024 06:00:00 +1000',
+            'categories': ['News', 'Current Affairs'],
+            'thumbnail': 'https://cdn.example.com/1.jpg',
+            'enclosure': {'url': 'https://cdn.example.com/1.mp3',
+                          'type': 'audio/mpeg'},
+            'media': [{'url': 'https://cdn.example.com/1.m3u8',
+                       'duration': '60'},
+                      {'url': 'https://cdn.example.com/1.mp4'}],
+        }, first)
+        self.assertEqual('Second', second['title'])
+        self.assertIsNone(second['description'])
+        self.assertEqual([], second['media'])
+
+    def test_parse_xmltv(self):
+        first, second = list(feeds.parse_xmltv(XMLTV))
+        self.assertEqual({
+            'channel': 'abc1',
+            'start': '20240101060000 +1000',
+            'stop': '20240101063000 +1000',
+            'title': 'News',
+            'sub_title': 'Morning & more',
+            'desc': 'The news.',
+            'categories': ['News'],
+            'episode_num': '0.1.',
+            'icon': 'https://cdn.example.com/news.png',
+        }, first)
+        self.assertEqual('Weather', second['title'])
+        self.assertIsNone(second['icon'])
+
+
+class ResponseTests(testtools.TestCase):
+
+    def setUp(self):
+        super(ResponseTests, self).setUp()
+        self.server = fakes.FakeServer(self.handler).start()
+        self.addCleanup(self.server.stop)
+
+    def handler(self, path):
+        if path == '/gzip':
+            buf = io.BytesIO()
+            with gzip.GzipFile(fileobj=buf, mode='wb') as f:
+                f.write(XMLTV)
+            return 200, {'Content-Encoding': 'gzip'}, buf.getvalue()
+        return 200, {'Content-Type': 'application/rss+xml'}, RSS
+
+    def test_streamed_response(self):
+        response = Session().get(self.server.url(), stream=True)
+        titles = [item['title'] for item in feeds.parse_rss(response)]
+        self.assertEqual(['Fish & Chips', 'Second'], titles)
+
+    def test_compressed_response(self):
+        response = Session().get(self.server.url('/gzip'), stream=True)
+        channels = [p['channel'] for p in feeds.parse_xmltv(response)]
+        self.assertEqual(['abc1', 'abc1'], channels)
+
+    def test_iter_content(self):
+        chunks = Session().iter_content(self.server.url(), chunk_size=64)
+        self.assertEqual(2, len(list(feeds.parse_rss(chunks))))
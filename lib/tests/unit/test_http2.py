@@ -0,0 +1,129 @@
+from __future__ import absolute_import, unicode_literals
+
+import os
+import ssl
+import subprocess
+import sys
+import threading
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import requests
+
+import testtools
+
+from aussieaddonscommon import http2
+from aussieaddonscommon.exceptions import AussieAddonsException
+from aussieaddonscommon.session import Session
+from aussieaddonscommon.tls import TLSAdapter
+from tests.unit import fakes
+
+CERT_FILE = os.path.join(os.path.dirname(__file__), 'data', 'localhost.pem')
+
+
+def make_server(**kwargs):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(CERT_FILE)
+    return fakes.FakeH2Server(context, **kwargs).start()
+
+
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class HTTP2FallbackTests(testtools.TestCase):
+
+    @mock.patch.dict('sys.modules', {'httpx': None})
+    @mock.patch('aussieaddonscommon.http2.httpx', None)
+    def test_fallback(self):
+        s = Session(use_http2=True)
+        self.assertIsInstance(s.get_adapter('https://foo.bar/'), TLSAdapter)
+        self.assertRaises(ImportError, http2.HTTP2Adapter)
+
+    def test_lazy_import(self):
+        # httpx is slow to import, so isn't unless HTTP/2 is used
+        output = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys; from aussieaddonscommon import session; '
+            'print("httpx" in sys.modules)'],
+            cwd=os.path.join(os.path.dirname(__file__), '..', '..'))
+        self.assertEqual(b'False', output.strip())
+
+
+@testtools.skipUnless(http2.is_available(), 'httpx[http2] not installed')
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class HTTP2AdapterTests(testtools.TestCase):
+
+    def setUp(self):
+        super(HTTP2AdapterTests, self).setUp()
+        fakes.unset_ca_bundle(self)
+        self.session = Session(use_http2=True)
+        self.addCleanup(self.session.close)
+
+    def test_request(self):
+        server = make_server(body=b'{"ok": true}')
+        self.addCleanup(server.stop)
+        response = self.session.get(server.url('/api'))
+        self.assertEqual({'ok': True}, response.json())
+        self.assertEqual('HTTP/2', response.http_version)
+        self.assertEqual(server.url('/api'), response.url)
+
+    def test_multiplexing(self):
+        server = make_server(delay=0.1)
+        self.addCleanup(server.stop)
+        self.session.get(server.url())
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            self.session.get(server.url()).text)) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(['ok'] * 20, results)
+        self.assertEqual(1, server.connections)
+
+    def test_http_error(self):
+        server = make_server(status=404)
+        self.addCleanup(server.stop)
+        self.assertRaises(requests.exceptions.HTTPError, self.session.get,
+                          server.url())
+
+    @mock.patch('aussieaddonscommon.utils.log')
+    def test_unsupported_options(self, mock_log):
+        s = Session(use_http2=True, tls_options={'min_version': 'TLSv1.2'})
+        self.addCleanup(s.close)
+        self.assertIsInstance(s.get_adapter('https://foo.bar/'),
+                              http2.HTTP2Adapter)
+        self.assertIn('not supported over HTTP/2',
+                      mock_log.call_args[0][0])
+
+    def test_server_error_retried(self):
+        server = make_server(status=503)
+        self.addCleanup(server.stop)
+        s = Session(use_http2=True, max_retries=2)
+        self.addCleanup(s.close)
+        self.assertRaises(AussieAddonsException, s.get, server.url())
+        self.assertEqual(3, server.requests)
+
+    def test_connection_error(self):
+        server = make_server()
+        url = server.url()
+        server.stop()
+        s = Session(use_http2=True, max_retries=0)
+        self.assertRaises(AussieAddonsException, s.get, url)
+
+    def test_map_exception(self):
+        import httpx
+        request = requests.Request('GET', 'https://foo.bar/').prepare()
+        for error, expected in (
+                (httpx.ConnectTimeout('timed out'),
+                 requests.exceptions.ConnectTimeout),
+                (httpx.ReadTimeout('timed out'),
+                 requests.exceptions.ReadTimeout),
+                (httpx.ConnectError('[SSL: CERTIFICATE_VERIFY_FAILED]'),
+                 requests.exceptions.SSLError),
+                (httpx.ConnectError('refused'),
+                 requests.exceptions.ConnectionError)):
+            observed = http2._map_exception(error, request)
+            self.assertIsInstance(observed, expected)
+            self.assertIs(request, observed.request)
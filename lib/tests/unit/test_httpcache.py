@@ -0,0 +1,165 @@
+from __future__ import absolute_import, unicode_literals
+
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import requests
+
+import testtools
+
+from aussieaddonscommon import cache, httpcache
+from aussieaddonscommon.exceptions import AussieAddonsException
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+
+def respond(body, status=200, delay=0):
+    def handler(path):
+        time.sleep(delay)
+        return status, {'Content-Type': 'text/plain'}, body
+    return handler
+
+
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class ResponseCacheTests(testtools.TestCase):
+
+    def setUp(self):
+        super(ResponseCacheTests, self).setUp()
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.store = cache.CacheStore(os.path.join(tmpdir, 'cache.db'),
+                                      namespace='test.addon')
+        self.server = fakes.FakeServer(respond('first')).start()
+        self.addCleanup(self.server.stop)
+        self.url = self.server.url('/api/foo')
+
+    def make_session(self, **kwargs):
+        s = Session(max_retries=1,
+                    cache_policy=httpcache.CachePolicy(**kwargs),
+                    response_cache=httpcache.ResponseCache(self.store))
+        self.addCleanup(s.response_cache.join)
+        return s
+
+    def test_make_key(self):
+        self.assertEqual(
+            'http:http://foo.bar/?a=1&b=x+y',
+            httpcache.ResponseCache.make_key('http://foo.bar/',
+                                             {'a': 1, 'b': 'x y'}))
+
+    def test_make_key_headers(self):
+        make_key = httpcache.ResponseCache.make_key
+        url = 'http://foo.bar/'
+        self.assertEqual(make_key(url), make_key(url, headers={'X-Foo': '1'}))
+        alice = make_key(url, headers={'Authorization': 'Bearer alice'})
+        self.assertNotEqual(make_key(url), alice)
+        self.assertNotEqual(alice, make_key(
+            url, headers={'authorization': 'Bearer bob'}))
+        self.assertEqual(alice, make_key(
+            url, headers={'authorization': 'Bearer alice'}))
+        self.assertNotIn('alice', alice)
+
+    def test_credentials(self):
+        s = self.make_session(fresh_ttl=60)
+        s.get(self.url, headers={'Authorization': 'Bearer alice'})
+        self.server.handler = respond('second')
+        self.assertEqual('second', s.get(
+            self.url, headers={'Authorization': 'Bearer bob'}).text)
+        self.assertEqual('second', s.get(self.url).text)
+        self.assertEqual('first', s.get(
+            self.url, headers={'Authorization': 'Bearer alice'}).text)
+        self.assertEqual(3, len(self.server.paths))
+
+    def test_cookies(self):
+        s = self.make_session(fresh_ttl=60)
+        s.get(self.url)
+        self.server.handler = respond('logged in')
+        s.cookies.set('session', 'abc')
+        self.assertEqual('logged in', s.get(self.url).text)
+        self.assertEqual(2, len(self.server.paths))
+
+    def test_fresh(self):
+        s = self.make_session(fresh_ttl=60)
+        self.assertEqual('first', s.get(self.url).text)
+        self.server.handler = respond('second')
+        response = s.get(self.url)
+        self.assertEqual('first', response.text)
+        self.assertIs(True, response.from_cache)
+        self.assertIs(False, response.is_stale)
+        self.assertEqual(1, len(self.server.paths))
+
+    def test_params(self):
+        s = self.make_session(fresh_ttl=60)
+        s.get(self.url, params={'page': 1})
+        s.get(self.url, params={'page': 2})
+        s.get(self.url, params={'page': 1})
+        self.assertEqual(['/api/foo?page=1', '/api/foo?page=2'],
+                         self.server.paths)
+
+    def test_stale_while_revalidate(self):
+        s = self.make_session()
+        s.get(self.url)
+        # The server is now slow, but the stale copy is served at once
+        self.server.handler = respond('second', delay=0.5)
+        start = time.time()
+        response = s.get(self.url)
+        self.assertLess(time.time() - start, 0.25)
+        self.assertEqual('first', response.text)
+        self.assertIs(True, response.is_stale)
+        s.response_cache.join()
+        self.server.handler = respond('third')
+        self.assertEqual('second', s.get(self.url).text)
+
+    def test_stale_if_error(self):
+        s = self.make_session(stale_while_revalidate=False)
+        self.assertEqual('first', s.get(self.url).text)
+        self.server.handler = respond('down', status=503)
+        response = s.get(self.url)
+        self.assertEqual('first', response.text)
+        self.assertIs(True, response.is_stale)
+
+        uncached = Session(max_retries=1)
+        self.assertRaises(AussieAddonsException, uncached.get, self.url)
+
+    def test_stale_if_error_disabled(self):
+        s = self.make_session(stale_while_revalidate=False,
+                              stale_if_error=False)
+        s.get(self.url)
+        self.server.handler = respond('down', status=503)
+        self.assertRaises(AussieAddonsException, s.get, self.url)
+
+    def test_client_error_not_stale(self):
+        s = self.make_session(stale_while_revalidate=False)
+        s.get(self.url)
+        self.server.handler = respond('forbidden', status=403)
+        self.assertRaises(requests.exceptions.HTTPError, s.get, self.url)
+
+    def test_negative(self):
+        s = self.make_session(negative_ttl=60)
+        self.server.handler = respond('not found', status=404)
+        for _ in range(3):
+            e = self.assertRaises(requests.exceptions.HTTPError, s.get,
+                                  self.url)
+            self.assertEqual(404, e.response.status_code)
+        self.assertEqual(1, len(self.server.paths))
+
+    def test_negative_expiry(self):
+        s = self.make_session(negative_ttl=60)
+        self.server.handler = respond('not found', status=404)
+        self.assertRaises(requests.exceptions.HTTPError, s.get, self.url)
+        self.server.handler = respond('found')
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertEqual('found', s.get(self.url).text)
+
+    def test_post_not_cached(self):
+        s = self.make_session(fresh_ttl=60)
+        s.get(self.url)
+        s.post(self.url)
+        s.post(self.url)
+        self.assertEqual(3, len(self.server.paths))
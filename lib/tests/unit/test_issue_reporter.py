@@ -11,7 +11,7 @@ import testtools
 from future.moves.urllib.error import HTTPError, URLError
 from future.moves.urllib.request import Request
 
-from aussieaddonscommon import issue_reporter
+from aussieaddonscommon import issue_reporter, ledger
 from tests.unit import fakes
 
 issue_reporter.GITHUB_API_TOKEN = 'abc123'
@@ -70,37 +70,39 @@ class IssueReporterTests(testtools.TestCase):
         self.assertIs(
             issue_reporter.is_not_latest_version(current, latest), False)
 
-    @mock.patch('aussieaddonscommon.issue_reporter.io.open')
-    @mock.patch('aussieaddonscommon.utils.get_file_dir')
-    @mock.patch('os.path.isfile')
-    def test_not_already_reported(self, mock_isfile, mock_get_file_dir,
-                                  mock_open):
-        mock_get_file_dir.return_value = ''
-        mock_isfile.return_value = True
-        mock_open.return_value = io.BytesIO(fakes.KODI_LOG.encode('utf-8'))
-        observed = issue_reporter.not_already_reported(fakes.KODI_LOG)
-        self.assertEqual(False, observed)
-        observed = issue_reporter.not_already_reported(fakes.KODI_LOG_FILTERED)
-        self.assertEqual(True, observed)
-
-    @mock.patch('aussieaddonscommon.utils.get_file_dir')
-    def test_save_last_error_report(self, mock_get_file_dir):
-        mock_get_file_dir.return_value = '/'
-        with mock.patch('aussieaddonscommon.issue_reporter.io.open',
-                        mock.mock_open()) as mock_open:
-            issue_reporter.save_last_error_report(fakes.KODI_LOG)
-            handle = mock_open()
-            handle.write.assert_any_call(fakes.KODI_LOG)
-
-    @mock.patch('aussieaddonscommon.utils.get_file_dir')
-    def test_save_last_error_report_read_bytes(self, mock_get_file_dir):
-        mock_get_file_dir.return_value = '/'
-        report = io.BytesIO(fakes.KODI_LOG.encode('utf-8'))
-        with mock.patch('aussieaddonscommon.issue_reporter.io.open',
-                        mock.mock_open()) as mock_open:
-            issue_reporter.save_last_error_report(report.read())
-            handle = mock_open()
-            handle.write.assert_any_call(fakes.KODI_LOG.encode('utf-8'))
+    @mock.patch('aussieaddonscommon.ledger.get_ledger')
+    def test_not_already_reported(self, mock_get_ledger):
+        report_ledger = ledger.ReportLedger(':memory:')
+        mock_get_ledger.return_value = report_ledger
+        self.assertEqual(True, issue_reporter.not_already_reported('abc'))
+        report_ledger.record_report('abc')
+        self.assertEqual(False, issue_reporter.not_already_reported('abc'))
+        self.assertEqual(True, issue_reporter.not_already_reported('def'))
+
+    @mock.patch('aussieaddonscommon.ledger.get_ledger')
+    def test_not_already_reported_error(self, mock_get_ledger):
+        mock_get_ledger.side_effect = OSError('read only')
+        self.assertEqual(False, issue_reporter.not_already_reported('abc'))
+
+    @mock.patch('aussieaddonscommon.ledger.get_ledger')
+    def test_save_last_error_report(self, mock_get_ledger):
+        report_ledger = ledger.ReportLedger(':memory:')
+        mock_get_ledger.return_value = report_ledger
+        observed = issue_reporter.save_last_error_report(
+            'abc', fakes.EXC_VALUE_FORMATTED)
+        self.assertEqual(':memory:', observed)
+        entry = report_ledger.get('abc')
+        self.assertEqual(fakes.EXC_VALUE_FORMATTED, entry['summary'])
+        self.assertIsNotNone(entry['reported_at'])
+
+    @mock.patch('aussieaddonscommon.ledger.get_ledger')
+    def test_record_error(self, mock_get_ledger):
+        report_ledger = ledger.ReportLedger(':memory:')
+        mock_get_ledger.return_value = report_ledger
+        issue_reporter.record_error('abc', 'Foo')
+        issue_reporter.record_error('abc')
+        self.assertEqual(2, report_ledger.get('abc')['count'])
+        self.assertEqual(True, issue_reporter.not_already_reported('abc'))
 
     @mock.patch('aussieaddonscommon.issue_reporter.urlopen')
     def test_get_org_repos(self, mock_urlopen):
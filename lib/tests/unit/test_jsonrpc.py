@@ -0,0 +1,118 @@
+from __future__ import absolute_import, unicode_literals
+
+import json
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import testtools
+
+from aussieaddonscommon import jsonrpc
+from tests.unit import fakes
+
+
+class JSONRPCClientTests(testtools.TestCase):
+
+    def setUp(self):
+        super(JSONRPCClientTests, self).setUp()
+        self.jsonrpc = fakes.FakeJSONRPC(
+            {'debug.showloginfo': True, 'locale.timezone': 'Australia/Perth'},
+            methods={
+                'Application.GetProperties': lambda params: dict(
+                    (p, 100) for p in params['properties']),
+                'Player.GetActivePlayers': [{'playerid': 1,
+                                             'type': 'video'}],
+                'Settings.SetSettingValue': True,
+            })
+        patcher = mock.patch('xbmc.executeJSONRPC', self.jsonrpc)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = jsonrpc.JSONRPCClient()
+
+    def test_call(self):
+        self.assertEqual({'volume': 100}, self.client.call(
+            'Application.GetProperties', {'properties': ['volume']}))
+        request = json.loads(self.jsonrpc.calls[0])
+        self.assertEqual('2.0', request['jsonrpc'])
+        self.assertEqual('Application.GetProperties', request['method'])
+
+    def test_error(self):
+        e = self.assertRaises(jsonrpc.JSONRPCError, self.client.call,
+                              'Foo.GetBar')
+        self.assertEqual(-32601, e.code)
+        self.assertEqual('Foo.GetBar', e.method)
+        self.assertEqual('Foo.GetBar: Method not found.', str(e))
+
+    def test_batch(self):
+        with self.client.batch() as batch:
+            debug = batch.call('Settings.GetSettingValue',
+                               {'setting': 'debug.showloginfo'})
+            players = batch.call('Player.GetActivePlayers')
+            missing = batch.call('Settings.GetSettingValue',
+                                 {'setting': 'foo'})
+        self.assertEqual(1, len(self.jsonrpc.calls))
+        self.assertEqual({'value': True}, debug.result)
+        self.assertEqual(1, players.result[0]['playerid'])
+        self.assertRaises(jsonrpc.JSONRPCError, lambda: missing.result)
+
+    def test_batch_out_of_order(self):
+        real_call = self.jsonrpc.__call__
+
+        def reversed_batch(query):
+            return json.dumps(list(reversed(json.loads(real_call(query)))))
+
+        with mock.patch('xbmc.executeJSONRPC', reversed_batch):
+            values = self.client.get_setting_values(
+                ['debug.showloginfo', 'locale.timezone'])
+        self.assertEqual({'debug.showloginfo': True,
+                          'locale.timezone': 'Australia/Perth'}, values)
+
+    def test_batch_unsupported(self):
+        self.jsonrpc.batch = False
+        values = self.client.get_setting_values(
+            ['debug.showloginfo', 'locale.timezone', 'foo'])
+        self.assertEqual({'debug.showloginfo': True,
+                          'locale.timezone': 'Australia/Perth'}, values)
+        self.assertEqual(4, len(self.jsonrpc.calls))
+
+    def test_not_executed(self):
+        call = self.client.batch().call('Player.GetActivePlayers')
+        self.assertRaises(jsonrpc.JSONRPCError, lambda: call.result)
+
+    def test_cache(self):
+        self.client.get_setting_value('debug.showloginfo')
+        self.client.get_setting_value('debug.showloginfo')
+        self.assertEqual(1, len(self.jsonrpc.calls))
+        self.client.get_setting_value('debug.showloginfo', cache=False)
+        self.assertEqual(2, len(self.jsonrpc.calls))
+        # Only the uncached call goes out in a batch
+        values = self.client.get_setting_values(
+            ['debug.showloginfo', 'locale.timezone'])
+        self.assertEqual(2, len(values))
+        self.assertEqual(3, len(self.jsonrpc.calls))
+        self.assertEqual('Settings.GetSettingValue',
+                         json.loads(self.jsonrpc.calls[2])['method'])
+
+    def test_cache_expiry(self):
+        with mock.patch('time.time') as mock_time:
+            mock_time.return_value = 100
+            self.client.get_setting_value('debug.showloginfo')
+            mock_time.return_value = 100 + jsonrpc.CACHE_TTL + 1
+            self.client.get_setting_value('debug.showloginfo')
+        self.assertEqual(2, len(self.jsonrpc.calls))
+
+    def test_not_cached(self):
+        for _ in range(2):
+            self.client.get_active_players()
+            self.client.call('Settings.SetSettingValue',
+                             {'setting': 'foo', 'value': 1})
+        self.assertEqual(4, len(self.jsonrpc.calls))
+        self.client.get_setting_value('debug.showloginfo')
+        self.client.clear_cache()
+        self.client.get_setting_value('debug.showloginfo')
+        self.assertEqual(6, len(self.jsonrpc.calls))
+
+    def test_get_client(self):
+        self.assertIs(jsonrpc.get_client(), jsonrpc.get_client())
@@ -0,0 +1,119 @@
+from __future__ import absolute_import, unicode_literals
+
+import os
+import shutil
+import tempfile
+import threading
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import testtools
+
+from aussieaddonscommon import ledger
+from tests.unit import fakes
+
+
+class FingerprintTests(testtools.TestCase):
+
+    def test_fingerprint(self):
+        observed = ledger.fingerprint(fakes.FakeException, fakes.EXC_VALUE,
+                                      fakes.TB)
+        self.assertEqual(16, len(observed))
+        self.assertEqual(observed, ledger.fingerprint(
+            fakes.FakeException, fakes.FakeException('Another AFL 503 error'),
+            fakes.FakeTraceback([fakes.frame1, fakes.frame2], [10, 30])))
+        self.assertNotEqual(observed, ledger.fingerprint(
+            fakes.FakeException, fakes.EXC_VALUE,
+            fakes.FakeTraceback([fakes.frame2, fakes.frame1], [1, 3])))
+        self.assertNotEqual(observed, ledger.fingerprint(
+            ValueError, fakes.EXC_VALUE, fakes.TB))
+
+
+class ReportLedgerTests(testtools.TestCase):
+
+    def setUp(self):
+        super(ReportLedgerTests, self).setUp()
+        self.ledger = ledger.ReportLedger(':memory:', max_entries=5,
+                                          min_interval=100)
+
+    def test_record_seen(self):
+        self.assertIs(None, self.ledger.get('abc'))
+        self.ledger.record_seen('abc', 'Foo', now=10)
+        self.ledger.record_seen('abc', now=20)
+        self.assertEqual({'summary': 'Foo', 'count': 2, 'first_seen': 10,
+                          'last_seen': 20, 'reported_at': None},
+                         self.ledger.get('abc'))
+
+    def test_rate_limit(self):
+        self.assertIs(True, self.ledger.is_allowed('abc', now=0))
+        self.ledger.record_seen('abc', now=0)
+        self.assertIs(True, self.ledger.is_allowed('abc', now=0))
+        self.ledger.record_report('abc', now=10)
+        self.assertIs(False, self.ledger.is_allowed('abc', now=50))
+        self.assertIs(True, self.ledger.is_allowed('def', now=50))
+        self.assertIs(True, self.ledger.is_allowed('abc', now=110))
+
+    def test_alternating_errors(self):
+        # Previously only the last report was remembered, so alternating
+        # between two errors allowed every occurrence to be reported
+        for now in range(10):
+            fp = 'abc' if now % 2 else 'def'
+            if self.ledger.is_allowed(fp, now=now):
+                self.ledger.record_report(fp, now=now)
+        self.assertEqual(1, self.ledger.get('abc')['reported_at'])
+        self.assertEqual(0, self.ledger.get('def')['reported_at'])
+
+    def test_eviction(self):
+        for i in range(8):
+            self.ledger.record_seen('fp%d' % i, now=i)
+        self.ledger.record_seen('fp0', now=100)
+        remaining = [r[0] for r in self.ledger.conn.execute(
+            'SELECT fingerprint FROM reports ORDER BY fingerprint')]
+        self.assertEqual(['fp0', 'fp5', 'fp6', 'fp7'], remaining[:1] +
+                         remaining[-3:])
+        self.assertEqual(5, len(remaining))
+
+    def test_persistence(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, ledger.LEDGER_FILE)
+        first = ledger.ReportLedger(path)
+        first.record_report('abc')
+        first.close()
+        self.assertIs(False, ledger.ReportLedger(path).is_allowed('abc'))
+
+    def test_threads(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        shared = ledger.ReportLedger(os.path.join(tmpdir, ledger.LEDGER_FILE))
+        shared.record_seen('abc')
+        errors = []
+
+        def report():
+            try:
+                shared.record_report('abc')
+                self.assertIs(False, shared.is_allowed('abc'))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                shared.close()
+
+        thread = threading.Thread(target=report)
+        thread.start()
+        thread.join()
+        self.assertEqual([], errors)
+        self.assertEqual(1, shared.get('abc')['count'])
+        self.assertIsNotNone(shared.get('abc')['reported_at'])
+
+    @mock.patch('aussieaddonscommon.utils.get_file_dir')
+    def test_get_ledger(self, mock_get_file_dir):
+        mock_get_file_dir.return_value = '/foo'
+        self.addCleanup(setattr, ledger, '_ledger', None)
+        ledger._ledger = None
+        observed = ledger.get_ledger()
+        self.assertEqual(os.path.join('/foo', ledger.LEDGER_FILE),
+                         observed.path)
+        self.assertIs(observed, ledger.get_ledger())
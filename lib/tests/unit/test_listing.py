@@ -0,0 +1,111 @@
+# This Python file uses the following encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import testtools
+
+from future.moves.urllib.parse import parse_qsl
+
+from aussieaddonscommon import listing, utils
+from tests.unit import fakes
+
+BASE_URL = 'plugin://plugin.video.foo/'
+
+
+def make_items(count):
+    for i in range(count):
+        yield {'label': 'Episode %d' % i,
+               'params': {'action': 'play', 'id': i}}
+
+
+class UrlEncoderTests(testtools.TestCase):
+
+    def test_matches_make_url(self):
+        encoder = listing.UrlEncoder()
+        for params in (fakes.PLUGIN_URL_DICT,
+                       {'title': fakes.UNICODE_STRING_WITH_ACCENTS},
+                       {'q': 'a&b=c d/e'}):
+            self.assertEqual(utils.make_url(params), encoder.encode(params))
+
+    def test_non_string_values(self):
+        encoder = listing.UrlEncoder()
+        self.assertEqual({'id': '5', 'live': 'True'},
+                         dict(parse_qsl(encoder.encode({'id': 5,
+                                                        'live': True}))))
+
+    def test_encode_all(self):
+        encoder = listing.UrlEncoder()
+        self.assertEqual(['a=1', 'a=2'], encoder.encode_all([{'a': 1},
+                                                             {'a': 2}]))
+
+
+class ListingBuilderTests(testtools.TestCase):
+
+    def setUp(self):
+        super(ListingBuilderTests, self).setUp()
+        self.builder = listing.ListingBuilder(handle=5, base_url=BASE_URL)
+
+    def test_build_item(self):
+        with mock.patch('xbmcgui.ListItem.setProperty') as mock_property, \
+                mock.patch('xbmcgui.ListItem.setArt') as mock_art, \
+                mock.patch('xbmcgui.ListItem.setInfo') as mock_info:
+            url, li, is_folder = self.builder.build_item({
+                'label': 'Caf\xe9 &amp; Bar',
+                'params': fakes.PLUGIN_URL_DICT,
+                'is_playable': True,
+                'art': {'thumb': 'http://foo/thumb.jpg'},
+                'info': {'plot': 'Foo'},
+                'properties': {'foo': 'bar'}})
+            mock_property.assert_any_call('IsPlayable', 'true')
+            mock_property.assert_any_call('foo', 'bar')
+            mock_art.assert_called_once_with({'thumb': 'http://foo/thumb.jpg'})
+            mock_info.assert_called_once_with('video', {'plot': 'Foo'})
+        self.assertEqual(BASE_URL + fakes.PLUGIN_URL_STRING, url)
+        self.assertIs(False, is_folder)
+
+    def test_build_item_url(self):
+        url, li, is_folder = self.builder.build_item(
+            {'label': 'Foo', 'url': 'http://foo/video.mp4'})
+        self.assertEqual('http://foo/video.mp4', url)
+        self.assertIs(True, is_folder)
+
+    def test_label_normalizer(self):
+        normalize = listing.LabelNormalizer()
+        self.assertEqual('Cafe & Bar', normalize('Caf\xe9 &amp; Bar'))
+        self.assertEqual('', normalize(None))
+        with mock.patch('aussieaddonscommon.utils.descape') as mock_descape:
+            normalize('Cafe')
+            normalize('Cafe')
+            mock_descape.assert_called_once_with('Cafe')
+
+    @mock.patch('xbmcplugin.addDirectoryItems')
+    @mock.patch('xbmcplugin.addDirectoryItem')
+    def test_add_items_list(self, mock_add_item, mock_add_items):
+        count = self.builder.add_items(list(make_items(10)))
+        self.assertEqual(10, count)
+        mock_add_items.assert_called_once_with(5, mock.ANY, 10)
+        items = mock_add_items.call_args[0][1]
+        self.assertEqual(BASE_URL + '?action=play&id=9', items[9][0])
+        mock_add_item.assert_not_called()
+
+    @mock.patch('xbmcplugin.addDirectoryItems')
+    def test_add_items_streamed(self, mock_add_items):
+        count = self.builder.add_items(make_items(25), chunk_size=10)
+        self.assertEqual(25, count)
+        self.assertEqual([10, 10, 5], [len(c[0][1]) for c in
+                                       mock_add_items.call_args_list])
+
+    @mock.patch('xbmcplugin.endOfDirectory')
+    @mock.patch('xbmcplugin.setContent')
+    @mock.patch('xbmcplugin.addDirectoryItems')
+    def test_add_items_function(self, mock_add_items, mock_set_content,
+                                mock_end):
+        with mock.patch('sys.argv', [BASE_URL, '7', '']):
+            listing.add_items(make_items(3), content='episodes')
+        mock_add_items.assert_called_once_with(7, mock.ANY, 0)
+        mock_set_content.assert_called_once_with(7, 'episodes')
+        mock_end.assert_called_once_with(7, succeeded=True, cacheToDisc=True)
@@ -0,0 +1,133 @@
+from __future__ import absolute_import, unicode_literals
+
+import json
+import os
+import shutil
+import tempfile
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import requests
+
+import testtools
+
+from aussieaddonscommon import metrics
+from aussieaddonscommon.exceptions import AussieAddonsException
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+BODY = '{"foo": "bar"}'
+
+
+def make_metrics(host, total, error=None, reused=False, nbytes=100):
+    m = metrics.RequestMetrics('GET', 'http://%s/foo' % host, started=0)
+    m.total = total
+    m.error = error
+    m.reused = reused
+    m.bytes = nbytes
+    return m
+
+
+class SinkTests(testtools.TestCase):
+
+    def test_summary(self):
+        sink = metrics.SummarySink()
+        sink(make_metrics('foo.bar', 0.1))
+        sink(make_metrics('foo.bar', 0.3, reused=True))
+        sink(make_metrics('slow.bar', 2.0, error='Timed out'))
+        self.assertEqual([
+            'slow.bar: 1 requests (1 failed, 0 reused), 2000ms total, '
+            '2000ms slowest, 100 bytes, 0 retries',
+            'foo.bar: 2 requests (0 failed, 1 reused), 400ms total, '
+            '300ms slowest, 200 bytes, 0 retries'], sink.summary())
+
+    def test_json_lines(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        sink = metrics.JSONLinesSink(os.path.join(tmpdir, 'metrics.jsonl'))
+        sink(make_metrics('foo.bar', 0.1))
+        sink(make_metrics('foo.bar', 0.2))
+        with open(sink.path) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([0.1, 0.2], [line['total'] for line in lines])
+        self.assertEqual('foo.bar', lines[0]['host'])
+
+    @mock.patch('aussieaddonscommon.utils.log')
+    def test_log(self, mock_log):
+        m = make_metrics('foo.bar', 0.25)
+        m.status = 200
+        m.ttfb = 0.1
+        metrics.LogSink()(m)
+        mock_log.assert_called_once_with(
+            'GET http://foo.bar/foo 200: 250ms total, 100ms to first byte, '
+            '100 bytes, 0 retries, new connection')
+
+
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class SessionMetricsTests(testtools.TestCase):
+
+    def setUp(self):
+        super(SessionMetricsTests, self).setUp()
+        self.responses = []
+        self.server = fakes.FakeServer(self.handler, keep_alive=True).start()
+        self.addCleanup(self.server.stop)
+        self.recorded = []
+        self.session = Session(metrics_sinks=[self.recorded.append])
+
+    def handler(self, path):
+        if self.responses:
+            return self.responses.pop(0)
+        return 200, {'Content-Type': 'application/json'}, BODY
+
+    def test_metrics(self):
+        self.session.get(self.server.url('/foo'))
+        self.session.get(self.server.url('/foo'))
+        first, second = self.recorded
+        self.assertEqual(200, first.status)
+        self.assertEqual(len(BODY), first.bytes)
+        self.assertEqual((False, True), (first.reused, second.reused))
+        self.assertEqual(0, first.retries)
+        self.assertLessEqual(first.ttfb, first.total)
+        self.assertIs(None, first.error)
+
+    def test_retries(self):
+        self.responses = [(503, {}, 'down'), (503, {}, 'down')]
+        self.session.get(self.server.url('/foo'))
+        self.assertEqual(2, self.recorded[0].retries)
+        self.assertEqual(200, self.recorded[0].status)
+
+    def test_http_error(self):
+        self.responses = [(404, {}, 'not found')]
+        self.assertRaises(requests.exceptions.HTTPError, self.session.get,
+                          self.server.url('/foo'))
+        self.assertEqual(404, self.recorded[0].status)
+        self.assertIn('404', self.recorded[0].error)
+
+    def test_connection_error(self):
+        url = self.server.url('/foo')
+        self.server.stop()
+        s = Session(max_retries=0, metrics_sinks=[self.recorded.append])
+        self.assertRaises(AussieAddonsException, s.get, url)
+        self.assertIs(None, self.recorded[0].status)
+        self.assertIsNotNone(self.recorded[0].error)
+
+    def test_hooks_kept(self):
+        session_hook = mock.Mock(side_effect=lambda r, **kwargs: r)
+        request_hook = mock.Mock(side_effect=lambda r, **kwargs: r)
+        self.session.hooks['response'].append(session_hook)
+        self.session.get(self.server.url('/foo'))
+        self.session.get(self.server.url('/foo'),
+                         hooks={'response': request_hook})
+        self.assertEqual(1, session_hook.call_count)
+        self.assertEqual(1, request_hook.call_count)
+        self.assertEqual(2, len(self.recorded))
+
+    @mock.patch('aussieaddonscommon.utils.log')
+    def test_failing_sink(self, mock_log):
+        self.session.metrics_sinks.insert(0, mock.Mock(
+            side_effect=ValueError('foo')))
+        self.assertEqual(BODY, self.session.get(self.server.url()).text)
+        self.assertEqual(1, len(self.recorded))
@@ -0,0 +1,85 @@
+from __future__ import absolute_import, unicode_literals
+
+import errno
+import os
+import shutil
+import tempfile
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import testtools
+
+from aussieaddonscommon import paths
+from tests.unit import fakes
+
+
+class PathsTests(testtools.TestCase):
+
+    def setUp(self):
+        super(PathsTests, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def test_makedirs(self):
+        path = os.path.join(self.tmpdir, 'foo', 'bar')
+        self.assertEqual(path, paths.makedirs(path))
+        self.assertTrue(os.path.isdir(path))
+        self.assertEqual(path, paths.makedirs(path))
+
+    @mock.patch('os.makedirs')
+    def test_makedirs_race(self, mock_makedirs):
+        # Another invocation created it between our check and mkdir
+        mock_makedirs.side_effect = OSError(errno.EEXIST, 'File exists')
+        self.assertEqual(self.tmpdir, paths.makedirs(self.tmpdir))
+        path = os.path.join(self.tmpdir, 'missing')
+        self.assertRaises(OSError, paths.makedirs, path)
+
+    def test_atomic_write(self):
+        path = os.path.join(self.tmpdir, 'foo.json')
+        paths.atomic_write(path, b'first')
+        paths.atomic_write(path, b'second')
+        with open(path, 'rb') as f:
+            self.assertEqual(b'second', f.read())
+        self.assertEqual(['foo.json'], os.listdir(self.tmpdir))
+
+    def test_atomic_write_failure(self):
+        path = os.path.join(self.tmpdir, 'foo.json')
+        paths.atomic_write(path, b'first')
+        with mock.patch('os.fsync') as mock_fsync:
+            mock_fsync.side_effect = OSError(errno.EIO, 'I/O error')
+            self.assertRaises(OSError, paths.atomic_write, path, b'second')
+        self.assertEqual(['foo.json'], os.listdir(self.tmpdir))
+        with open(path, 'rb') as f:
+            self.assertEqual(b'first', f.read())
+
+    def test_open_mapped(self):
+        path = os.path.join(self.tmpdir, 'foo.xml')
+        paths.atomic_write(path, b'<foo>bar</foo>')
+        with paths.open_mapped(path) as data:
+            self.assertEqual(5, data.find(b'bar'))
+            self.assertEqual(b'<foo>', data[:5])
+        empty = os.path.join(self.tmpdir, 'empty')
+        paths.atomic_write(empty, b'')
+        with paths.open_mapped(empty) as data:
+            self.assertEqual(b'', data[:])
+
+    @mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+    @mock.patch('xbmc.translatePath')
+    def test_addon_paths(self, mock_translate_path):
+        mock_translate_path.side_effect = lambda p: p.replace(
+            'special://', self.tmpdir + '/')
+        addon_paths = paths.AddonPaths()
+        self.assertEqual(os.path.join(self.tmpdir, 'temp/', 'test.addon'),
+                         addon_paths.temp)
+        self.assertEqual(
+            os.path.join(self.tmpdir, 'profile/addon_data/test.addon/'),
+            addon_paths.profile)
+        self.assertEqual(os.path.join(addon_paths.temp, 'cache'),
+                         addon_paths.cache)
+        for path in (addon_paths.temp, addon_paths.profile,
+                     addon_paths.cache):
+            self.assertTrue(os.path.isdir(path))
+        self.assertEqual(2, mock_translate_path.call_count)
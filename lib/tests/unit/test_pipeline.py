@@ -0,0 +1,128 @@
+from __future__ import absolute_import, unicode_literals
+
+import threading
+import time
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import testtools
+
+from aussieaddonscommon import pipeline
+from tests.unit import fakes
+
+
+def slow(seconds, func=lambda x: x):
+    def wrapper(item):
+        time.sleep(seconds)
+        return func(item)
+    return wrapper
+
+
+class PipelineTests(testtools.TestCase):
+
+    def test_stages(self):
+        pipe = (pipeline.Pipeline(range(10))
+                .map(lambda x: x * 2, name='double')
+                .filter(lambda x: x % 3, name='filter')
+                .flat_map(lambda x: [x, -x], name='pairs'))
+        self.assertEqual([2, -2, 4, -4, 8, -8, 10, -10, 14, -14, 16, -16],
+                         list(pipe))
+        self.assertEqual(['double', 'filter', 'pairs'],
+                         [s.name for s in pipe.stats])
+        self.assertEqual([10, 6, 12], [s.items for s in pipe.stats])
+        self.assertTrue(all(s.first is not None for s in pipe.stats))
+
+    def test_streams(self):
+        produced = []
+
+        def source():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        pipe = pipeline.Pipeline(source()).map(lambda x: x + 1)
+        self.assertEqual(1, next(iter(pipe)))
+        self.assertEqual([0], produced)
+
+    def test_workers(self):
+        pipe = pipeline.Pipeline(range(8)).map(
+            slow(0.05, lambda x: x * 10), workers=4, name='fetch')
+        started = time.time()
+        self.assertEqual([0, 10, 20, 30, 40, 50, 60, 70], list(pipe))
+        self.assertLess(time.time() - started, 0.3)
+        self.assertEqual(8, pipe.stats[0].items)
+        self.assertGreaterEqual(pipe.stats[0].busy, 0.35)
+
+    def test_backpressure(self):
+        produced = []
+
+        def source():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        items = iter(pipeline.Pipeline(source()).map(
+            lambda x: x, workers=2, queue_size=4))
+        self.assertEqual(0, next(items))
+        time.sleep(0.2)
+        # The queue, the item the feeder is holding and the one taken
+        self.assertLessEqual(len(produced), 6)
+        self.assertEqual(list(range(1, 100)), list(items))
+
+    def test_worker_error(self):
+        def fail(x):
+            if x == 3:
+                raise ValueError('Bad item')
+            return x
+
+        items = iter(pipeline.Pipeline(range(10)).map(fail, workers=2))
+        self.assertEqual([0, 1, 2], [next(items) for _ in range(3)])
+        self.assertRaises(ValueError, next, items)
+
+    def test_source_error(self):
+        def source():
+            yield 1
+            raise ValueError('Bad feed')
+
+        items = iter(pipeline.Pipeline(source()).map(lambda x: x,
+                                                     workers=2))
+        self.assertEqual(1, next(items))
+        self.assertRaises(ValueError, next, items)
+
+    def test_stop_early(self):
+        threads = threading.active_count()
+        items = iter(pipeline.Pipeline(range(1000)).map(
+            lambda x: x, workers=3, queue_size=2))
+        next(items)
+        items.close()
+        deadline = time.time() + 2
+        while threading.active_count() > threads and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(threads, threading.active_count())
+
+    def test_generator_stage(self):
+        def pairs(items):
+            items = iter(items)
+            for first in items:
+                yield first, next(items)
+
+        pipe = (pipeline.Pipeline(range(6))
+                .map(slow(0.02), name='fetch')
+                .stage(pairs, name='pairs'))
+        self.assertEqual([(0, 1), (2, 3), (4, 5)], list(pipe))
+        fetch, pairs_stats = pipe.stats
+        self.assertGreaterEqual(fetch.busy, 0.1)
+        # Waiting on fetch isn't counted against pairs
+        self.assertLess(pairs_stats.busy, 0.05)
+
+    @mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+    @mock.patch('aussieaddonscommon.utils.log')
+    def test_log_stats(self, mock_log):
+        pipe = pipeline.Pipeline(range(3)).map(lambda x: x, name='copy')
+        list(pipe)
+        pipe.log_stats()
+        message = mock_log.call_args[0][0]
+        self.assertTrue(message.startswith('Pipeline copy: 3 items, '))
@@ -0,0 +1,126 @@
+from __future__ import absolute_import, unicode_literals
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import testtools
+
+from aussieaddonscommon import cache
+from aussieaddonscommon import httpcache
+from aussieaddonscommon import prefetch
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class PrefetcherTests(testtools.TestCase):
+
+    def setUp(self):
+        super(PrefetcherTests, self).setUp()
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.store = cache.CacheStore(os.path.join(tmpdir, 'cache.db'),
+                                      namespace='test.addon')
+        self.delay = 0
+        self.active = 0
+        self.most_active = 0
+        self.lock = threading.Lock()
+        self.server = fakes.FakeServer(self.handler).start()
+        self.addCleanup(self.server.stop)
+
+    def handler(self, path):
+        with self.lock:
+            self.active += 1
+            self.most_active = max(self.most_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return 200, {}, 'x' * 1000
+
+    def make_session(self):
+        return Session(
+            cache_policy=httpcache.CachePolicy(fresh_ttl=60),
+            response_cache=httpcache.ResponseCache(self.store))
+
+    def test_fills_cache(self):
+        prefetcher = prefetch.Prefetcher(self.make_session())
+        prefetcher.add(self.server.url('/shows'), params={'page': 2})
+        prefetcher.add(self.server.url('/episodes'))
+        prefetcher.finish()
+        self.assertEqual(2, prefetcher.fetched)
+        self.assertEqual(2000, prefetcher.bytes)
+
+        # As in the next invocation
+        session = self.make_session()
+        response = session.get(self.server.url('/shows'), params={'page': 2})
+        self.assertTrue(response.from_cache)
+        self.assertEqual(2, len(self.server.paths))
+
+    def test_concurrency(self):
+        self.delay = 0.05
+        prefetcher = prefetch.Prefetcher(self.make_session(), concurrency=2)
+        for i in range(6):
+            prefetcher.add(self.server.url('/%d' % i))
+        prefetcher.finish()
+        self.assertEqual(6, prefetcher.fetched)
+        self.assertEqual(2, self.most_active)
+
+    def test_priority(self):
+        self.delay = 0.02
+        prefetcher = prefetch.Prefetcher(self.make_session(), concurrency=1)
+        prefetcher.add(self.server.url('/first'))
+        prefetcher.add(self.server.url('/later'), priority=5)
+        prefetcher.add(self.server.url('/sooner'), priority=1)
+        prefetcher.finish()
+        self.assertEqual(['/first', '/sooner', '/later'], self.server.paths)
+
+    def test_byte_budget(self):
+        self.delay = 0.02
+        prefetcher = prefetch.Prefetcher(self.make_session(), concurrency=1,
+                                         byte_budget=1500)
+        for i in range(5):
+            prefetcher.add(self.server.url('/%d' % i))
+        prefetcher.finish()
+        self.assertEqual(2, prefetcher.fetched)
+        self.assertFalse(prefetcher.add(self.server.url('/more')))
+
+    def test_skips_fresh(self):
+        session = self.make_session()
+        session.get(self.server.url('/shows'))
+        prefetcher = prefetch.Prefetcher(session)
+        prefetcher.add(self.server.url('/shows'))
+        self.assertFalse(prefetcher.add(self.server.url('/shows')))
+        prefetcher.finish()
+        self.assertEqual(0, prefetcher.fetched)
+        self.assertEqual(1, len(self.server.paths))
+
+    def test_cancel(self):
+        self.delay = 0.1
+        prefetcher = prefetch.Prefetcher(self.make_session(), concurrency=1)
+        for i in range(5):
+            prefetcher.add(self.server.url('/%d' % i))
+        prefetcher.finish(timeout=0.05)
+        prefetcher.join()
+        self.assertEqual(1, prefetcher.fetched)
+        self.assertFalse(prefetcher.add(self.server.url('/more')))
+
+    def test_failure(self):
+        self.server.handler = lambda path: (500, {}, 'broken')
+        session = Session(
+            max_retries=0, cache_policy=httpcache.CachePolicy(fresh_ttl=60),
+            response_cache=httpcache.ResponseCache(self.store))
+        prefetcher = prefetch.Prefetcher(session)
+        prefetcher.add(self.server.url('/shows'))
+        prefetcher.finish()
+        self.assertEqual(1, prefetcher.failed)
+
+    def test_needs_cache(self):
+        self.assertRaises(ValueError, prefetch.Prefetcher, Session())
@@ -0,0 +1,138 @@
+from __future__ import absolute_import, unicode_literals
+
+import multiprocessing
+import shutil
+import tempfile
+import time
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import requests
+
+import testtools
+
+from aussieaddonscommon import ratelimit
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+
+def reserve_many(state_dir, count, queue):
+    limiter = ratelimit.RateLimiter({'foo.bar': (10, 1)}, state_dir=state_dir)
+    queue.put([limiter.reserve('foo.bar', now=100) for _ in range(count)])
+
+
+class ParseRetryAfterTests(testtools.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(120, ratelimit.parse_retry_after('120'))
+        self.assertEqual(30, ratelimit.parse_retry_after(
+            'Wed, 21 Oct 2015 07:28:30 GMT', now=1445412480))
+        self.assertEqual(0, ratelimit.parse_retry_after(
+            'Wed, 21 Oct 2015 07:28:00 GMT', now=1445412490))
+        self.assertIs(None, ratelimit.parse_retry_after('soon'))
+        self.assertIs(None, ratelimit.parse_retry_after(None))
+
+
+class TokenBucketTests(testtools.TestCase):
+
+    def test_burst_then_rate(self):
+        bucket = ratelimit.TokenBucket(2, burst=2)
+        self.assertEqual([0, 0, 0.5, 1.0],
+                         [bucket.reserve(10) for _ in range(4)])
+        # After a second the queue has drained by two requests
+        self.assertEqual(0.5, bucket.reserve(11))
+        self.assertEqual(0, bucket.reserve(20))
+
+    def test_block(self):
+        bucket = ratelimit.TokenBucket(2, burst=5)
+        bucket.reserve(0)
+        bucket.block(30)
+        # Requests resume at the given rate, without bursting
+        self.assertEqual([30.5, 31.0], [bucket.reserve(0), bucket.reserve(0)])
+        self.assertEqual(1.5, bucket.reserve(30))
+
+    def test_unlimited(self):
+        bucket = ratelimit.TokenBucket(float('inf'), 1)
+        self.assertEqual([0] * 5, [bucket.reserve(0) for _ in range(5)])
+        bucket.block(10)
+        self.assertEqual(6, bucket.reserve(4))
+
+
+class RateLimiterTests(testtools.TestCase):
+
+    def test_rates(self):
+        limiter = ratelimit.RateLimiter({'foo.bar': 1, 'baz.bar': (2, 1)},
+                                        default=10)
+        self.assertEqual([0, 1], [limiter.reserve('foo.bar', now=0)
+                                  for _ in range(2)])
+        self.assertEqual([0, 0.5], [limiter.reserve('baz.bar', now=0)
+                                    for _ in range(2)])
+        self.assertEqual(0, limiter.reserve('other.bar', now=0))
+        self.assertEqual(0, ratelimit.RateLimiter().reserve('foo', now=0))
+
+    def test_cross_process(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        queue = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=reserve_many,
+                                             args=(tmpdir, 5, queue))
+                     for _ in range(3)]
+        for process in processes:
+            process.start()
+        waits = []
+        for process in processes:
+            waits.extend(queue.get(timeout=10))
+        for process in processes:
+            process.join()
+        # Every process shares the one bucket, so no two get the same slot
+        self.assertEqual([round(i * 0.1, 6) for i in range(15)],
+                         sorted(round(w, 6) for w in waits))
+
+    @mock.patch('os.fsync')
+    def test_state_not_synced(self, mock_fsync):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        limiter = ratelimit.RateLimiter({'foo.bar': (10, 1)},
+                                        state_dir=tmpdir)
+        limiter.reserve('foo.bar', now=100)
+        self.assertEqual(0.1, round(ratelimit.RateLimiter(
+            {'foo.bar': (10, 1)}, state_dir=tmpdir).reserve(
+                'foo.bar', now=100), 6))
+        mock_fsync.assert_not_called()
+
+    def test_record_error(self):
+        limiter = ratelimit.RateLimiter()
+        response = requests.Response()
+        response.status_code = 429
+        response.headers['Retry-After'] = '30'
+        error = requests.exceptions.HTTPError(response=response)
+        with mock.patch('aussieaddonscommon.utils.log'):
+            limiter.record_error('foo.bar', error)
+        self.assertAlmostEqual(30, limiter.reserve('foo.bar'), delta=1)
+        self.assertEqual(0, limiter.reserve('baz.bar'))
+
+
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class SessionRateLimitTests(testtools.TestCase):
+
+    def test_session(self):
+        responses = [(429, {'Retry-After': '2'}, 'slow down')] * 2
+        server = fakes.FakeServer(lambda path: responses.pop(0) if responses
+                                  else (200, {}, 'ok')).start()
+        self.addCleanup(server.stop)
+        sleeps = []
+        limiter = ratelimit.RateLimiter(default=(100, 1), sleep=sleeps.append)
+        s = Session(rate_limiter=limiter)
+        # Retried once after waiting out Retry-After, then given up on
+        start = time.time()
+        self.assertRaises(requests.exceptions.HTTPError, s.get, server.url())
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(1, len(sleeps))
+        self.assertAlmostEqual(2, sleeps[0], delta=0.2)
+        # The next request waits its turn as well, then succeeds
+        self.assertEqual('ok', s.get(server.url()).text)
+        self.assertEqual(3, len(server.paths))
+        self.assertEqual(2, len(sleeps))
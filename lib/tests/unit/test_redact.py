@@ -0,0 +1,119 @@
+from __future__ import absolute_import, unicode_literals
+
+import random
+import re
+import time
+
+import testtools
+
+from aussieaddonscommon import redact
+from tests.unit import fakes
+
+
+def make_corpus(lines=20000, seed=1):
+    """Build a large log with secrets sprinkled through ordinary lines"""
+    rnd = random.Random(seed)
+    secrets = []
+    out = []
+    for i in range(lines):
+        kind = rnd.randint(0, 9)
+        secret = 'secret%dx%d' % (i, rnd.randint(1000, 9999))
+        if kind == 0:
+            line = 'Accessing https://bob%d:%s@example.com/api' % (i, secret)
+        elif kind == 1:
+            line = '<settings><pass>%s</pass></settings>' % secret
+        elif kind == 2:
+            line = 'GET /api?access_token=%s&page=2' % secret
+        elif kind == 3:
+            line = 'Authorization: Bearer %s' % secret
+        elif kind == 4:
+            line = 'config {"api_key": "%s"}' % secret
+        elif kind == 5:
+            secret = '%s@example.com.au' % secret
+            line = 'Logged in as %s' % secret
+        else:
+            line = ('DEBUG: CVideoPlayer::OpenFile: plugin://plugin.video.foo/'
+                    '?action=list&page=%d' % i)
+            secret = None
+        if secret:
+            secrets.append(secret)
+        out.append('2019-09-01 12:00:00.000 T:1234 %s' % line)
+    return '\n'.join(out), secrets
+
+
+class RedactTests(testtools.TestCase):
+
+    def test_default_rules(self):
+        redactor = redact.Redactor()
+        self.assertEqual(fakes.KODI_LOG_FILTERED,
+                         redactor.redact(fakes.KODI_LOG))
+
+    def test_extra_rules(self):
+        cases = [
+            ('url?access_token=abc123&x=1',
+             'url?access_token=[FILTERED_TOKEN]&x=1'),
+            ('"refreshToken": "abc.def-ghi"',
+             '"refreshToken": "[FILTERED_TOKEN]"'),
+            ('accessToken=abc&x=1', 'accessToken=[FILTERED_TOKEN]&x=1'),
+            ('https://foo.bar/?token=abc123&x=1',
+             'https://foo.bar/?token=[FILTERED_TOKEN]&x=1'),
+            ('POST a=1&TOKEN=abc', 'POST a=1&TOKEN=[FILTERED_TOKEN]'),
+            ('csrf_token=abc', 'csrf_token=[FILTERED_TOKEN]'),
+            ('mytoken=abc', 'mytoken=abc'),
+            ('ACCESS_TOKEN: abc', 'ACCESS_TOKEN: [FILTERED_TOKEN]'),
+            ('{"apiKey": "XYZ"}', '{"apiKey": "[FILTERED_API_KEY]"}'),
+            ('xApiKey=XYZ', 'xApiKey=[FILTERED_API_KEY]'),
+            ('"clientSecret": "XYZ"', '"clientSecret": "[FILTERED_API_KEY]"'),
+            ('"refresh_token": "abc.def-ghi"',
+             '"refresh_token": "[FILTERED_TOKEN]"'),
+            ('apikey=XYZ', 'apikey=[FILTERED_API_KEY]'),
+            ("{'api_key': 'XYZ'}", "{'api_key': '[FILTERED_API_KEY]'}"),
+            ('mail foo.bar+kodi@mail.example.com now',
+             'mail [FILTERED_EMAIL] now'),
+            ('Authorization: Bearer eyJhbGciOi.x.y',
+             'Authorization: [FILTERED_AUTH]'),
+            ('"authorization": "token abc"',
+             '"authorization": "[FILTERED_AUTH]"'),
+            ('nothing to see here', 'nothing to see here'),
+        ]
+        for text, expected in cases:
+            self.assertEqual(expected, redact.redact(text))
+
+    def test_add_rule(self):
+        redactor = redact.Redactor()
+        redactor.add_rule(r'(pin=)\d+', r'\1[FILTERED_PIN]')
+        self.assertEqual('pin=[FILTERED_PIN] <user>[FILTERED_USER]</user>',
+                         redactor.redact('pin=1234 <user>bob</user>'))
+
+    def test_multiline(self):
+        text = ('a line\nRefreshToken=abc\nanother\n'
+                'Authorization: Bearer xyz\n<pass>pw</pass>')
+        self.assertEqual('a line\nRefreshToken=[FILTERED_TOKEN]\nanother\n'
+                         'Authorization: [FILTERED_AUTH]\n'
+                         '<pass>[FILTERED_PASSWORD]</pass>',
+                         redact.redact(text))
+
+    def test_add_rule_literals(self):
+        redactor = redact.Redactor()
+        redactor.add_rule(r'(pin=)\d+', r'\1[FILTERED_PIN]', ('pin',))
+        self.assertEqual('PIN=[FILTERED_PIN]\nspin', redactor.redact(
+            'PIN=1234\nspin'))
+
+    def test_corpus(self):
+        corpus, secrets = make_corpus()
+        redactor = redact.get_default_redactor()
+        observed = redactor.redact(corpus)
+        self.assertEqual(len(secrets), len(re.findall(r'secret\d+x', corpus)))
+        self.assertEqual([], re.findall(r'secret\d+x', observed))
+        self.assertEqual(corpus.count('\n'), observed.count('\n'))
+        self.assertIn('plugin://plugin.video.foo/?action=list&page=', observed)
+
+    def test_linear_time(self):
+        # These inputs caused the old '.+?' patterns to rescan the rest of
+        # the line from every starting position
+        redactor = redact.get_default_redactor()
+        for chunk in ('//a:', '<user>', 'a.', 'a@a.', 'x' * 50 + ' '):
+            text = chunk * (200000 // len(chunk))
+            start = time.time()
+            redactor.redact(text)
+            self.assertLess(time.time() - start, 2)
@@ -0,0 +1,243 @@
+from __future__ import absolute_import, unicode_literals
+
+import os
+import shutil
+import socket
+import ssl
+import tempfile
+import time
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import testtools
+
+from aussieaddonscommon import cache
+from aussieaddonscommon import resolver
+from aussieaddonscommon.exceptions import AussieAddonsException
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+CERT_FILE = os.path.join(os.path.dirname(__file__), 'data', 'localhost.pem')
+
+
+def addrinfo(ip, port):
+    family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+    sockaddr = (ip, port, 0, 0) if family == socket.AF_INET6 else (ip, port)
+    return (family, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', sockaddr)
+
+
+class StubDNS(object):
+    """getaddrinfo answering from a dict of host names to addrinfo lists"""
+    def __init__(self, answers):
+        self.answers = answers
+        self.queries = []
+
+    def __call__(self, host, port, family=0, socktype=0):
+        self.queries.append(host)
+        if host not in self.answers:
+            raise socket.gaierror(socket.EAI_NONAME, 'Name not known')
+        return self.answers[host]
+
+
+def blackhole(test, ip='127.0.0.1'):
+    """Return a port on ip that never accepts connections
+
+    The listener's backlog is filled, so further connection attempts hang
+    like those to a host on a broken route.
+    """
+    family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+    listener = socket.socket(family)
+    listener.bind((ip, 0))
+    listener.listen(0)
+    port = listener.getsockname()[1]
+    filler = socket.socket(family)
+    filler.connect((ip, port))
+    test.addCleanup(listener.close)
+    test.addCleanup(filler.close)
+    return port
+
+
+def has_ipv6():
+    try:
+        sock = socket.socket(socket.AF_INET6)
+        sock.bind(('::1', 0))
+        sock.close()
+    except (socket.error, AttributeError):
+        return False
+    return True
+
+
+class InterleaveTests(testtools.TestCase):
+
+    def test_alternates_families(self):
+        addresses = [addrinfo('::1', 1), addrinfo('::2', 1),
+                     addrinfo('10.0.0.1', 1), addrinfo('10.0.0.2', 1),
+                     addrinfo('10.0.0.3', 1)]
+        self.assertEqual(['::1', '10.0.0.1', '::2', '10.0.0.2', '10.0.0.3'],
+                         [a[4][0] for a in resolver.interleave(addresses)])
+
+
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class LookupTests(testtools.TestCase):
+
+    def setUp(self):
+        super(LookupTests, self).setUp()
+        self.dns = StubDNS({'api.foo.bar': [addrinfo('10.0.0.1', 443)]})
+
+    def test_cached(self):
+        r = resolver.Resolver(getaddrinfo=self.dns)
+        first = r.lookup('api.foo.bar', 443, now=1000)
+        self.assertEqual(first, r.lookup('api.foo.bar', 443, now=1100))
+        self.assertEqual(1, len(self.dns.queries))
+        self.assertIn('api.foo.bar', r.timings)
+        self.assertEqual(1, r.stats['cache_hits'])
+        r.lookup('api.foo.bar', 443, now=1000 + resolver.DNS_TTL)
+        self.assertEqual(2, len(self.dns.queries))
+
+    def test_persisted(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        store = cache.CacheStore(os.path.join(tmpdir, 'cache.db'),
+                                 namespace='test.addon')
+        resolver.Resolver(store, getaddrinfo=self.dns).lookup(
+            'api.foo.bar', 443)
+        # As in the next add-on invocation
+        addresses = resolver.Resolver(store, getaddrinfo=self.dns).lookup(
+            'api.foo.bar', 443)
+        self.assertEqual([addrinfo('10.0.0.1', 443)], addresses)
+        self.assertEqual(1, len(self.dns.queries))
+
+    def test_stale_after_failure(self):
+        r = resolver.Resolver(getaddrinfo=self.dns)
+        r.lookup('api.foo.bar', 443, now=1000)
+        del self.dns.answers['api.foo.bar']
+        self.assertEqual([addrinfo('10.0.0.1', 443)],
+                         r.lookup('api.foo.bar', 443, now=2000))
+        self.assertEqual(1, r.stats['stale'])
+        self.assertRaises(socket.gaierror, r.lookup, 'api.foo.bar', 443,
+                          now=1001 + resolver.DNS_TTL + resolver.STALE_TTL)
+
+    def test_unknown(self):
+        r = resolver.Resolver(getaddrinfo=self.dns)
+        self.assertRaises(socket.gaierror, r.lookup, 'foo.bar', 443)
+
+
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class ConnectTests(testtools.TestCase):
+
+    def setUp(self):
+        super(ConnectTests, self).setUp()
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(5)
+        self.addCleanup(self.listener.close)
+        self.port = self.listener.getsockname()[1]
+
+    def connect(self, addresses, timeout=5, attempt_delay=0.05):
+        dns = StubDNS({'api.foo.bar': addresses})
+        r = resolver.Resolver(attempt_delay=attempt_delay, getaddrinfo=dns)
+        started = time.time()
+        sock = r.connect(('api.foo.bar', self.port), timeout)
+        self.addCleanup(sock.close)
+        return r, sock, time.time() - started
+
+    def test_connect(self):
+        r, sock, _ = self.connect([addrinfo('127.0.0.1', self.port)])
+        self.assertEqual(('127.0.0.1', self.port), sock.getpeername())
+        self.assertEqual(5, sock.gettimeout())
+        self.assertEqual(0, r.stats['fallbacks'])
+
+    def test_broken_route(self):
+        if has_ipv6():
+            dead = addrinfo('::1', blackhole(self, '::1'))
+        else:
+            dead = addrinfo('127.0.0.1', blackhole(self))
+        r, sock, elapsed = self.connect(
+            [dead, addrinfo('127.0.0.1', self.port)])
+        self.assertEqual(('127.0.0.1', self.port), sock.getpeername())
+        self.assertLess(elapsed, 1)
+        self.assertEqual(1, r.stats['fallbacks'])
+
+    def test_refused(self):
+        refused = socket.socket()
+        refused.bind(('127.0.0.1', 0))
+        port = refused.getsockname()[1]
+        refused.close()
+        _, sock, elapsed = self.connect(
+            [addrinfo('127.0.0.1', port), addrinfo('127.0.0.1', self.port)],
+            attempt_delay=5)
+        self.assertEqual(('127.0.0.1', self.port), sock.getpeername())
+        self.assertLess(elapsed, 1)
+
+    def test_timeout(self):
+        r = resolver.Resolver(attempt_delay=0.05, getaddrinfo=StubDNS(
+            {'api.foo.bar': [addrinfo('127.0.0.1', blackhole(self))]}))
+        started = time.time()
+        self.assertRaises(socket.timeout, r.connect,
+                          ('api.foo.bar', self.port), 0.2)
+        self.assertLess(time.time() - started, 1)
+
+    def test_high_descriptors(self):
+        # select.select can't wait on descriptors of 1024 and above
+        fds = []
+        self.addCleanup(lambda: [os.close(fd) for fd in fds])
+        try:
+            while not fds or fds[-1] < 1024:
+                fds.append(os.open(os.devnull, os.O_RDONLY))
+        except OSError:
+            self.skipTest('Too few file descriptors allowed')
+        _, sock, _ = self.connect([addrinfo('127.0.0.1', self.port)])
+        self.assertGreater(sock.fileno(), 1024)
+        self.assertEqual(('127.0.0.1', self.port), sock.getpeername())
+
+    @mock.patch('aussieaddonscommon.resolver.selectors', None)
+    def test_poll(self):
+        self.test_refused()
+
+    def test_ip_address(self):
+        r = resolver.Resolver(getaddrinfo=StubDNS({}))
+        sock = r.connect(('127.0.0.1', self.port))
+        self.addCleanup(sock.close)
+        self.assertEqual(0, r.stats['lookups'])
+
+
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class SessionResolverTests(testtools.TestCase):
+
+    def make_resolver(self, port):
+        return resolver.Resolver(getaddrinfo=StubDNS(
+            {'api.foo.bar': [addrinfo('127.0.0.1', port)]}))
+
+    def test_http(self):
+        server = fakes.FakeServer(lambda path: (200, {}, 'ok'),
+                                  keep_alive=True).start()
+        self.addCleanup(server.stop)
+        port = server.httpd.server_address[1]
+        r = self.make_resolver(port)
+        session = Session(resolver=r)
+        url = 'http://api.foo.bar:%d/' % port
+        self.assertEqual('ok', session.get(url).text)
+        self.assertEqual('ok', session.get(url).text)
+        self.assertEqual(1, r.stats['lookups'])
+        self.assertEqual(1, r.stats['connects'])
+
+    def test_https(self):
+        fakes.unset_ca_bundle(self)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(CERT_FILE)
+        server = fakes.FakeServer(lambda path: (200, {}, 'ok'),
+                                  context).start()
+        self.addCleanup(server.stop)
+        port = server.httpd.server_address[1]
+        r = self.make_resolver(port)
+        response = Session(resolver=r).get('https://api.foo.bar:%d/' % port)
+        self.assertEqual('ok', response.text)
+        self.assertEqual(1, r.stats['connects'])
+
+    def test_unknown_host(self):
+        session = Session(resolver=self.make_resolver(80))
+        self.assertRaises(AussieAddonsException, session.get,
+                          'http://foo.bar/')
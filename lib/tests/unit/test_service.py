@@ -0,0 +1,135 @@
+from __future__ import absolute_import, unicode_literals
+
+import json
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import requests
+
+import testtools
+
+from aussieaddonscommon import service
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+
+@mock.patch('xbmcgui.Window', fakes.FakeWindow)
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class ServiceTests(testtools.TestCase):
+
+    def setUp(self):
+        super(ServiceTests, self).setUp()
+        fakes.FakeWindow.properties.clear()
+        self.server = fakes.FakeServer(self.handler).start()
+        self.addCleanup(self.server.stop)
+
+    def handler(self, path):
+        if path == '/missing':
+            return 404, {}, 'Not found'
+        if path == '/forbidden':
+            return 403, {}, 'Forbidden'
+        return 200, {'Content-Type': 'application/json'}, '{"id": 1}'
+
+    def start_service(self):
+        svc = service.Service(Session(), addon_id='test.addon').start()
+        self.addCleanup(svc.stop)
+        return svc
+
+    def test_ping(self):
+        self.start_service()
+        self.assertTrue(service.ServiceClient('test.addon').call('ping'))
+
+    def test_get(self):
+        self.start_service()
+        client = service.ServiceClient('test.addon')
+        for _ in range(2):
+            response = client.get(self.server.url('/shows'),
+                                  params={'page': 1})
+            self.assertEqual({'id': 1}, response.json())
+            self.assertEqual('application/json',
+                             response.headers['Content-Type'])
+        self.assertEqual(['/shows?page=1'], self.server.paths)
+
+    def test_get_error(self):
+        self.start_service()
+        client = service.ServiceClient('test.addon')
+        e = self.assertRaises(requests.exceptions.HTTPError, client.get,
+                              self.server.url('/missing'))
+        self.assertEqual(404, e.response.status_code)
+
+    def test_get_error_remembered(self):
+        self.start_service()
+        client = service.ServiceClient('test.addon')
+        for _ in range(2):
+            self.assertRaises(requests.exceptions.HTTPError, client.get,
+                              self.server.url('/missing'))
+        self.assertEqual(['/missing'], self.server.paths)
+
+    def test_get_error_not_remembered(self):
+        self.start_service()
+        client = service.ServiceClient('test.addon')
+        for _ in range(2):
+            e = self.assertRaises(requests.exceptions.HTTPError, client.get,
+                                  self.server.url('/forbidden'))
+            self.assertEqual(403, e.response.status_code)
+        self.assertEqual(['/forbidden'] * 2, self.server.paths)
+
+    def test_registered(self):
+        svc = self.start_service()
+        catalog = mock.Mock(return_value=['one', 'two'])
+        svc.register('catalog', catalog, ttl=60)
+        client = service.ServiceClient('test.addon')
+        for _ in range(3):
+            self.assertEqual(['one', 'two'],
+                             client.call('catalog', channel='abc'))
+        catalog.assert_called_once_with(channel='abc')
+        svc.forget('catalog')
+        client.call('catalog', channel='abc')
+        self.assertEqual(2, catalog.call_count)
+
+    def test_errors(self):
+        svc = self.start_service()
+        svc.register('broken', mock.Mock(side_effect=ValueError('Bad')))
+        client = service.ServiceClient('test.addon')
+        e = self.assertRaises(service.ServiceError, client.call, 'broken')
+        self.assertEqual('Bad', str(e))
+        self.assertRaises(service.ServiceError, client.call, 'missing')
+
+    def test_secret(self):
+        self.start_service()
+        window = fakes.FakeWindow(service.HOME_WINDOW)
+        name = service.PROPERTY.format('test.addon')
+        data = json.loads(window.getProperty(name))
+        data['secret'] = 'guess'
+        window.setProperty(name, json.dumps(data))
+        e = self.assertRaises(service.ServiceError,
+                              service.ServiceClient('test.addon').call,
+                              'ping')
+        self.assertEqual('Not authorised', str(e))
+
+    def test_not_running(self):
+        client = service.ServiceClient('test.addon')
+        self.assertRaises(service.ServiceUnavailable, client.call, 'ping')
+        self.assertEqual(3, client.call_or_direct('add', lambda a, b: a + b,
+                                                  a=1, b=2))
+        response = client.get(self.server.url('/shows'))
+        self.assertEqual({'id': 1}, response.json())
+
+    def test_stopped(self):
+        svc = self.start_service()
+        svc.stop()
+        self.assertEqual({}, fakes.FakeWindow.properties[service.HOME_WINDOW])
+        self.assertRaises(service.ServiceUnavailable,
+                          service.ServiceClient('test.addon').call, 'ping')
+
+    def test_run(self):
+        svc = service.Service(Session(), addon_id='test.addon')
+        monitor = mock.Mock()
+        monitor.waitForAbort.side_effect = [False, True]
+        with mock.patch('xbmc.Monitor', return_value=monitor):
+            svc.run()
+        self.assertEqual(2, monitor.waitForAbort.call_count)
+        self.assertEqual({}, fakes.FakeWindow.properties[service.HOME_WINDOW])
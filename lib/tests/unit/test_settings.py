@@ -0,0 +1,89 @@
+from __future__ import absolute_import, unicode_literals
+
+import json
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import testtools
+
+from aussieaddonscommon import settings
+from aussieaddonscommon import utils
+from tests.unit import fakes
+
+
+class SettingsTests(testtools.TestCase):
+
+    def setUp(self):
+        super(SettingsTests, self).setUp()
+        self.jsonrpc = fakes.FakeJSONRPC({'debug.showloginfo': True,
+                                          'locale.timezone': 'Australia/Perth',
+                                          'network.usehttpproxy': False,
+                                          'foo.bar': 3})
+        patcher = mock.patch('xbmc.executeJSONRPC', self.jsonrpc)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batched_fetch(self):
+        snapshot = settings.SettingsSnapshot()
+        self.assertIs(True, snapshot.get('debug.showloginfo'))
+        self.assertEqual('Australia/Perth', snapshot.get('locale.timezone'))
+        self.assertIs(False, snapshot.get('network.usehttpproxy'))
+        self.assertEqual('x', snapshot.get('debug.extralogging', 'x'))
+        self.assertEqual(1, len(self.jsonrpc.calls))
+        self.assertEqual(len(settings.SNAPSHOT_SETTINGS),
+                         len(json.loads(self.jsonrpc.calls[0])))
+
+    def test_setting_outside_snapshot(self):
+        snapshot = settings.SettingsSnapshot()
+        self.assertEqual(3, snapshot.get('foo.bar'))
+        self.assertEqual(3, snapshot.get('foo.bar'))
+        self.assertEqual(2, len(self.jsonrpc.calls))
+
+    def test_no_batch_support(self):
+        self.jsonrpc.batch = False
+        snapshot = settings.SettingsSnapshot()
+        self.assertIs(True, snapshot.get('debug.showloginfo'))
+        self.assertEqual(1 + len(settings.SNAPSHOT_SETTINGS),
+                         len(self.jsonrpc.calls))
+
+    def test_invalidate(self):
+        snapshot = settings.SettingsSnapshot()
+        snapshot.get('debug.showloginfo')
+        self.jsonrpc.values['debug.showloginfo'] = False
+        self.assertIs(True, snapshot.get('debug.showloginfo'))
+        snapshot.invalidate()
+        self.assertIs(False, snapshot.get('debug.showloginfo'))
+
+    @mock.patch('xbmcgui.Window', fakes.FakeWindow)
+    def test_monitor(self):
+        fakes.FakeWindow.properties.clear()
+        snapshot = settings.SettingsSnapshot()
+        snapshot.get('debug.showloginfo')
+        monitor = settings.SettingsMonitor(snapshot)
+        self.jsonrpc.values['debug.showloginfo'] = False
+        with mock.patch('threading.Thread') as mock_thread:
+            monitor.onSettingsChanged()
+            mock_thread.return_value.start.assert_called_once_with()
+        monitor._refresh()
+        self.assertIs(False, snapshot._values['debug.showloginfo'])
+
+    @mock.patch('xbmcgui.Window', fakes.FakeWindow)
+    def test_monitor_is_debug(self):
+        fakes.FakeWindow.properties.clear()
+        settings.reset()
+        self.addCleanup(settings.reset)
+        self.assertIs(True, utils.is_debug())
+        self.jsonrpc.values['debug.showloginfo'] = False
+        self.assertIs(True, utils.is_debug())
+        with mock.patch('threading.Thread'):
+            settings.SettingsMonitor(settings.get_snapshot()
+                                     ).onSettingsChanged()
+        self.assertIs(False, utils.is_debug())
+
+    def test_get_snapshot(self):
+        settings.reset()
+        self.addCleanup(settings.reset)
+        self.assertIs(settings.get_snapshot(), settings.get_snapshot())
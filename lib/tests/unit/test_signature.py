@@ -0,0 +1,105 @@
+# This Python file uses the following encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+
+import testtools
+
+from aussieaddonscommon import signature, utils
+from tests.unit import fakes
+
+
+class Unprintable(object):
+    def __str__(self):
+        raise ValueError('nope')
+
+    __unicode__ = __str__
+
+    def __repr__(self):
+        return '<Unprintable>'
+
+
+class SignatureTests(testtools.TestCase):
+
+    def test_normalize_message(self):
+        cases = [
+            ('HTTP Error 404: Not Found', 'HTTP Error 404: Not Found'),
+            ('Failed to fetch https://api.foo.com/v1/items/123?x=1 now',
+             'Failed to fetch <url:api.foo.com> now'),
+            ('<Foo object at 0x7f3a2b1c0d90>', '<Foo object at <addr>>'),
+            ('video 1234567 missing', 'video <num> missing'),
+            ('id 0f8fad5b-d9cb-469f-a165-70867728950e',
+             'id <uuid>'),
+            ('token 5f4dcc3b5aa765d61d8327deb882cf99',
+             'token <hex>'),
+            ('deadbeefdeadbeefdeadbeef', 'deadbeefdeadbeefdeadbeef'),
+        ]
+        for message, expected in cases:
+            self.assertEqual(expected, signature.normalize_message(message))
+
+    def test_format_args(self):
+        self.assertEqual('foo, 1, None', signature.format_args(
+            Exception, Exception('foo', 1, None)))
+        self.assertEqual('<Unprintable>', signature.format_args(
+            Exception, Exception(Unprintable())))
+        self.assertEqual('cafe', signature.format_args(
+            Exception, Exception(b'caf\xc3\xa9')))
+        try:
+            u'<xml>Klüft</xml>'.encode('ascii')
+        except UnicodeEncodeError as e:
+            self.assertEqual(
+                "ascii, 7, 8, ordinal not in range(128)",
+                signature.format_args(UnicodeEncodeError, e))
+
+    def test_signature(self):
+        observed = signature.ErrorSignature(
+            fakes.FakeException, fakes.EXC_VALUE, fakes.TB)
+        self.assertEqual(fakes.EXC_VALUE_FORMATTED, observed.title)
+        self.assertEqual(fakes.EXC_FORMATTED_SUMMARY, observed.summary)
+        self.assertEqual(16, len(observed.digest))
+
+    def test_digest_is_stable(self):
+        first = signature.ErrorSignature(
+            fakes.FakeException,
+            fakes.FakeException('Error fetching http://foo/1234567'),
+            fakes.FakeTraceback([fakes.frame1, fakes.frame2], [1, 3]))
+        second = signature.ErrorSignature(
+            fakes.FakeException,
+            fakes.FakeException('Error fetching http://foo/7654321'),
+            fakes.FakeTraceback([fakes.frame1, fakes.frame2], [11, 13]))
+        self.assertEqual(first.digest, second.digest)
+        self.assertNotEqual(first.message, second.message)
+        third = signature.ErrorSignature(
+            fakes.FakeException,
+            fakes.FakeException('Error fetching http://bar/1234567'),
+            fakes.FakeTraceback([fakes.frame1, fakes.frame2], [1, 3]))
+        self.assertNotEqual(first.digest, third.digest)
+
+    def test_deep_traceback(self):
+        depth = 50
+        frames = [fakes.FakeFrame(fakes.FakeCode('f%d.py' % i, 'fn%d' % i),
+                                  {}) for i in range(depth)]
+        tb = fakes.FakeTraceback(frames, list(range(depth)))
+        observed = signature.ErrorSignature(fakes.FakeException,
+                                            fakes.EXC_VALUE, tb)
+        self.assertEqual(('f0.py', 0, 'fn0'), observed.first_frame)
+        self.assertEqual([('f47.py', 47, 'fn47'), ('f48.py', 48, 'fn48'),
+                          ('f49.py', 49, 'fn49')], list(observed.frames))
+
+    def test_no_traceback(self):
+        observed = signature.ErrorSignature(ValueError, ValueError('foo'),
+                                            None)
+        self.assertEqual('ValueError: foo', observed.summary)
+
+    def test_format_error_summary_non_string_args(self):
+        try:
+            raise KeyError(42)
+        except KeyError:
+            observed = utils.format_error_summary()
+        self.assertEqual('test_signature.py', observed.split(' ')[0])
+        self.assertTrue(observed.endswith(' - KeyError: 42'))
+
+    def test_format_error_summary_unicode_error(self):
+        try:
+            u'Klüft'.encode('ascii')
+        except UnicodeEncodeError:
+            observed = utils.format_error_summary()
+        self.assertIn('UnicodeEncodeError: ascii, 2, 3', observed)
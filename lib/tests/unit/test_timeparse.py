@@ -0,0 +1,211 @@
+from __future__ import absolute_import, unicode_literals
+
+import datetime
+import threading
+
+import testtools
+
+from aussieaddonscommon import feeds
+from aussieaddonscommon import timeparse
+from tests.unit import test_feeds
+
+
+def utc(*args):
+    return datetime.datetime(*args, tzinfo=timeparse.UTC)
+
+
+class ZoneTests(testtools.TestCase):
+
+    def test_fixed_offset(self):
+        tz = timeparse.fixed_offset(-90)
+        self.assertIs(tz, timeparse.fixed_offset(-90))
+        self.assertEqual('-01:30', tz.tzname(None))
+        self.assertEqual(datetime.timedelta(minutes=-90), tz.utcoffset(None))
+
+    def test_sydney_standard(self):
+        dt = datetime.datetime(2024, 6, 1, 12, tzinfo=timeparse.SYDNEY)
+        self.assertEqual('AEST', dt.tzname())
+        self.assertEqual(utc(2024, 6, 1, 2), dt)
+
+    def test_sydney_daylight_saving(self):
+        dt = datetime.datetime(2024, 1, 1, 12, tzinfo=timeparse.SYDNEY)
+        self.assertEqual('AEDT', dt.tzname())
+        self.assertEqual(utc(2024, 1, 1, 1), dt)
+
+    def test_sydney_transitions(self):
+        # 2024 starts 6 October, 2025 ends 6 April
+        for utc_time, local, name in (
+                (utc(2024, 10, 5, 15, 59), (2024, 10, 6, 1, 59), 'AEST'),
+                (utc(2024, 10, 5, 16, 0), (2024, 10, 6, 3, 0), 'AEDT'),
+                (utc(2025, 4, 5, 15, 30), (2025, 4, 6, 2, 30), 'AEDT'),
+                (utc(2025, 4, 5, 16, 30), (2025, 4, 6, 2, 30), 'AEST'),
+                (utc(2025, 4, 5, 17, 0), (2025, 4, 6, 3, 0), 'AEST')):
+            dt = utc_time.astimezone(timeparse.SYDNEY)
+            self.assertEqual(local, dt.timetuple()[:5])
+            self.assertEqual(name, dt.tzname())
+            self.assertEqual(utc_time, dt.astimezone(timeparse.UTC))
+
+    def test_sydney_gap(self):
+        # 2:00 to 2:59 on 6 October 2024 don't exist, and are taken as AEST
+        # before the change, or AEDT after it with fold set
+        for minute in (0, 30, 59):
+            dt = datetime.datetime(2024, 10, 6, 2, minute,
+                                   tzinfo=timeparse.SYDNEY)
+            self.assertEqual('AEST', dt.tzname())
+            # Times in the gap never compare equal across zones
+            self.assertEqual(utc(2024, 10, 5, 16, minute),
+                             dt.astimezone(timeparse.UTC))
+            if hasattr(dt, 'fold'):
+                dt = dt.replace(fold=1)
+                self.assertEqual('AEDT', dt.tzname())
+                self.assertEqual(utc(2024, 10, 5, 15, minute),
+                                 dt.astimezone(timeparse.UTC))
+        dt = datetime.datetime(2024, 10, 6, 3, tzinfo=timeparse.SYDNEY)
+        self.assertEqual('AEDT', dt.tzname())
+
+    def test_brisbane(self):
+        dt = utc(2024, 1, 1).astimezone(timeparse.BRISBANE)
+        self.assertEqual((2024, 1, 1, 10), dt.timetuple()[:4])
+
+
+class ParseTests(testtools.TestCase):
+
+    def test_iso8601(self):
+        aest = timeparse.fixed_offset(600)
+        for value, expected in (
+                ('2024-01-01', datetime.datetime(2024, 1, 1)),
+                ('2024-01-01T06:00', datetime.datetime(2024, 1, 1, 6)),
+                ('2024-01-01 06:00:30', datetime.datetime(2024, 1, 1, 6, 0,
+                                                          30)),
+                ('2024-01-01T06:00:00.5Z', utc(2024, 1, 1, 6, 0, 0, 500000)),
+                ('2024-01-01T06:00:00.1234567Z',
+                 utc(2024, 1, 1, 6, 0, 0, 123456)),
+                ('2024-01-01T06:00:00+10:00', utc(2023, 12, 31, 20)),
+                ('2024-01-01T06:00+1000', utc(2023, 12, 31, 20)),
+                ('2024-01-01T06:00:00-05', utc(2024, 1, 1, 11))):
+            dt = timeparse.parse_iso8601(value)
+            self.assertEqual(expected, dt)
+            self.assertEqual(expected.tzinfo is None, dt.tzinfo is None)
+        self.assertIs(aest, timeparse.parse_iso8601(
+            '2024-01-01T06:00:00+10:00').tzinfo)
+
+    def test_iso8601_default_tz(self):
+        dt = timeparse.parse_iso8601('2024-01-01T06:00:00',
+                                     tz=timeparse.SYDNEY)
+        self.assertEqual(utc(2023, 12, 31, 19), dt)
+
+    def test_iso8601_invalid(self):
+        for value in ('', '2024/01/01', '2024-13-01', '2024-01-01T06',
+                      '2024-01-01T06:00:00.', '2024-01-01T06:00:00+25:00',
+                      '2024-01-01T06:00:00 junk'):
+            self.assertRaises(ValueError, timeparse.parse_iso8601, value)
+
+    def test_rfc2822(self):
+        for value, expected in (
+                ('Mon, 01 Jan 2024 06:00:00 +1000', utc(2023, 12, 31, 20)),
+                ('1 Jan 2024 06:00 GMT', utc(2024, 1, 1, 6)),
+                ('Mon, 01 January 24 06:00:00 AEDT', utc(2023, 12, 31, 19)),
+                ('Mon, 1 Jan 2024 06:00:00 EST', utc(2024, 1, 1, 11)),
+                ('Mon, 1 Jul 2024 06:00:00 PDT', utc(2024, 7, 1, 13)),
+                ('Mon, 1 Jan 2024 06:00:00 UT', utc(2024, 1, 1, 6)),
+                ('Mon, 01 Jan 2024 06:00:00',
+                 datetime.datetime(2024, 1, 1, 6))):
+            self.assertEqual(expected, timeparse.parse_rfc2822(value))
+
+    def test_rfc2822_invalid(self):
+        for value in ('', 'Mon, 01 Foo 2024 06:00:00 +1000',
+                      'Mon, 01 Jan 2024', 'Mon, 01 Jan 2024 06 +1000',
+                      'Mon, 01 Jan 2024 06:00:00 XYZ'):
+            self.assertRaises(ValueError, timeparse.parse_rfc2822, value)
+
+    def test_xmltv(self):
+        for value, expected in (
+                ('20240101060000 +1000', utc(2023, 12, 31, 20)),
+                ('20240101060000+1000', utc(2023, 12, 31, 20)),
+                ('202401010600', datetime.datetime(2024, 1, 1, 6)),
+                ('20240101', datetime.datetime(2024, 1, 1))):
+            self.assertEqual(expected, timeparse.parse_xmltv(value))
+
+    def test_xmltv_invalid(self):
+        for value in ('', '202401', '202401010600000', '20241301',
+                      '20240101060000 +10000'):
+            self.assertRaises(ValueError, timeparse.parse_xmltv, value)
+
+
+class StrptimeTests(testtools.TestCase):
+
+    def test_matches_datetime(self):
+        for value, fmt in (
+                ('2024-01-01 06:00:00', '%Y-%m-%d %H:%M:%S'),
+                ('01/02/24 6:05 PM', '%d/%m/%y %I:%M %p'),
+                ('Monday 1 January 2024', '%A %d %B %Y'),
+                ('Mon, 01 Jan 2024 06:00:00.25', '%a, %d %b %Y %H:%M:%S.%f'),
+                ('12am 100%', '%I%p 100%%'),
+                ('2024-01-01T06:00:00+1000', '%Y-%m-%dT%H:%M:%S%z')):
+            self.assertEqual(datetime.datetime.strptime(value, fmt),
+                             timeparse.strptime(value, fmt))
+
+    def test_zone_names(self):
+        self.assertEqual(utc(2023, 12, 31, 20), timeparse.strptime(
+            '2024-01-01 06:00 AEST', '%Y-%m-%d %H:%M %Z'))
+
+    def test_default_tz(self):
+        self.assertEqual(utc(2024, 1, 1, 6), timeparse.strptime(
+            '2024-01-01 06:00', '%Y-%m-%d %H:%M', tz=timeparse.UTC))
+
+    def test_errors(self):
+        self.assertRaises(ValueError, timeparse.strptime, '2024-01-01',
+                          '%Y-%m-%d %H')
+        self.assertRaises(ValueError, timeparse.strptime, '2024-01-01x',
+                          '%Y-%m-%d')
+        self.assertRaises(ValueError, timeparse.strptime, '2024-02-30',
+                          '%Y-%m-%d')
+        self.assertRaises(ValueError, timeparse.strptime, '2024', '%Q')
+
+    def test_threads(self):
+        errors = []
+
+        def parse():
+            try:
+                for i in range(200):
+                    fmt = '%Y-%m-%d %H:%M:{0}'.format(i % 7)
+                    value = '2024-01-01 06:{0:02d}:{1}'.format(i % 60, i % 7)
+                    assert timeparse.strptime(value, fmt).minute == i % 60
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=parse) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+
+
+class BatchTests(testtools.TestCase):
+
+    def test_parse_many(self):
+        values = ['2024-01-01T06:00:00Z', '2024-01-01T07:00:00Z',
+                  '2024-01-01T06:00:00Z']
+        results = timeparse.parse_many(values)
+        self.assertEqual([utc(2024, 1, 1, 6), utc(2024, 1, 1, 7),
+                          utc(2024, 1, 1, 6)], results)
+        self.assertIs(results[0], results[2])
+
+    def test_parse_many_format(self):
+        self.assertEqual([utc(2024, 1, 1, 6)], timeparse.parse_many(
+            ['01/01/2024 06:00'], '%d/%m/%Y %H:%M', tz=timeparse.UTC))
+
+    def test_parse_schedule(self):
+        programmes = list(timeparse.parse_schedule(
+            feeds.parse_xmltv(test_feeds.XMLTV)))
+        self.assertEqual([utc(2023, 12, 31, 20), utc(2023, 12, 31, 20, 30)],
+                         [programmes[0]['start'], programmes[0]['stop']])
+        self.assertIs(programmes[0]['stop'], programmes[1]['start'])
+        self.assertEqual('Weather', programmes[1]['title'])
+
+    def test_parse_schedule_missing(self):
+        programme = {'start': '20240101060000 +1000', 'stop': None}
+        parsed, = timeparse.parse_schedule([programme])
+        self.assertIsNone(parsed['stop'])
+        self.assertEqual('20240101060000 +1000', programme['start'])
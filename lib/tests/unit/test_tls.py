@@ -0,0 +1,105 @@
+from __future__ import absolute_import, unicode_literals
+
+import os
+import ssl
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import testtools
+
+from aussieaddonscommon import tls
+from aussieaddonscommon.exceptions import AussieAddonsException
+from aussieaddonscommon.session import Session
+from tests.unit import fakes
+
+CERT_FILE = os.path.join(os.path.dirname(__file__), 'data', 'localhost.pem')
+
+
+def make_server(max_version=None):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(CERT_FILE)
+    if max_version is not None:
+        context.maximum_version = max_version
+    server = fakes.FakeServer(lambda path: (200, {}, 'ok'), context)
+    return server.start()
+
+
+class CreateContextTests(testtools.TestCase):
+
+    def test_version_range(self):
+        context = tls.create_ssl_context('TLSv1.2', 'TLSv1.3')
+        self.assertEqual(ssl.TLSVersion.TLSv1_2, context.minimum_version)
+        self.assertEqual(ssl.TLSVersion.TLSv1_3, context.maximum_version)
+        context = tls.create_ssl_context(
+            min_version=ssl.TLSVersion.TLSv1_3)
+        self.assertEqual(ssl.TLSVersion.TLSv1_3, context.minimum_version)
+
+    def test_ciphers(self):
+        context = tls.create_ssl_context(ciphers='ECDHE+AESGCM')
+        names = [c['name'] for c in context.get_ciphers()
+                 if c['protocol'] == 'TLSv1.2']
+        self.assertTrue(names)
+        self.assertTrue(all('GCM' in name for name in names))
+
+    def test_protocol(self):
+        for protocol in (None, ssl.PROTOCOL_SSLv23, tls.DEFAULT_PROTOCOL):
+            context = tls.ResumingSSLContext(protocol)
+            self.assertEqual(protocol or tls.DEFAULT_PROTOCOL,
+                             context.protocol)
+            self.assertEqual({}, context._sessions)
+        self.assertEqual(tls.DEFAULT_PROTOCOL,
+                         tls.ResumingSSLContext().protocol)
+
+    def test_legacy_adapter(self):
+        context = tls.TLSv1Adapter().ssl_context
+        self.assertEqual(ssl.TLSVersion.TLSv1, context.minimum_version)
+        self.assertEqual(ssl.TLSVersion.TLSv1, context.maximum_version)
+
+
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class TLSAdapterTests(testtools.TestCase):
+
+    def setUp(self):
+        super(TLSAdapterTests, self).setUp()
+        fakes.unset_ca_bundle(self)
+
+    def check_resumption(self, server, **tls_options):
+        self.addCleanup(server.stop)
+        s = Session(tls_options=tls_options)
+        context = s.get_adapter('https://').ssl_context
+        # The test server closes the connection after every response
+        for _ in range(3):
+            self.assertEqual('ok', s.get(server.url()).text)
+        self.assertEqual(3, context.handshakes)
+        self.assertEqual(2, context.resumed)
+
+    def test_resumption_tls12(self):
+        self.check_resumption(make_server(ssl.TLSVersion.TLSv1_2),
+                              max_version='TLSv1.2')
+
+    def test_resumption_tls13(self):
+        self.check_resumption(make_server(), min_version='TLSv1.3')
+
+    def test_no_resumption_across_hosts(self):
+        server = make_server()
+        self.addCleanup(server.stop)
+        s = Session()
+        context = s.get_adapter('https://').ssl_context
+        s.get(server.url())
+        s.get(server.url().replace('127.0.0.1', 'localhost'))
+        self.assertEqual(0, context.resumed)
+
+    def test_verify(self):
+        server = make_server()
+        self.addCleanup(server.stop)
+        s = Session()
+        self.assertEqual('ok', s.get(server.url(), verify=CERT_FILE).text)
+
+    def test_version_mismatch(self):
+        server = make_server(ssl.TLSVersion.TLSv1_2)
+        self.addCleanup(server.stop)
+        s = Session(max_retries=0, tls_options={'min_version': 'TLSv1.3'})
+        self.assertRaises(AussieAddonsException, s.get, server.url())
@@ -13,7 +13,7 @@ import xbmc
 
 from future.moves.urllib.parse import parse_qsl
 from tests.unit import fakes
-from aussieaddonscommon import utils
+from aussieaddonscommon import ledger, paths, settings, utils
 
 
 def get_xbmc_cond_visibility(cond):
@@ -59,12 +59,16 @@ class UtilsTests(testtools.TestCase):
         self.assertIsInstance(utils.ensure_ascii(string), string_types)
 
     @mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
-    @mock.patch('os.mkdir')
+    @mock.patch('os.makedirs')
     @mock.patch('xbmc.translatePath')
-    def test_get_file_dir(self, mock_translate_path, make_dir):
+    def test_get_file_dir(self, mock_translate_path, make_dirs):
         mock_translate_path.return_value = '/home/kodi/.kodi/temp'
+        self.addCleanup(paths.reset)
+        paths.reset()
         observed = utils.get_file_dir().replace('\\', '/')
         self.assertEqual('/home/kodi/.kodi/temp/test.addon', observed)
+        utils.get_file_dir()
+        self.assertEqual(1, make_dirs.call_count)
 
     @mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
     @mock.patch('xbmc.log')
@@ -200,9 +204,21 @@ class UtilsTests(testtools.TestCase):
 
     @mock.patch('xbmc.executeJSONRPC')
     def test_is_debug(self, mock_execute_json_rpc):
+        settings.reset()
+        self.addCleanup(settings.reset)
         mock_execute_json_rpc.return_value = json.dumps(
             {'result': {'value': True}})
         self.assertEqual(True, utils.is_debug())
+        calls = mock_execute_json_rpc.call_count
+        self.assertEqual(True, utils.is_debug())
+        self.assertEqual(calls, mock_execute_json_rpc.call_count)
+
+    @mock.patch('xbmc.executeJSONRPC')
+    def test_is_debug_no_jsonrpc(self, mock_execute_json_rpc):
+        settings.reset()
+        self.addCleanup(settings.reset)
+        mock_execute_json_rpc.side_effect = RuntimeError()
+        self.assertEqual(True, utils.is_debug())
 
     @mock.patch('sys.argv', ['plugin://plugin.foo.bar/', '5',
                              '?action=foo&addon_version=1.0.1',
@@ -234,6 +250,7 @@ class UtilsTests(testtools.TestCase):
                              '?action=foo&addon_version=0.0.1',
                              'resume:false'])
     @mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+    @mock.patch('aussieaddonscommon.issue_reporter.record_error')
     @mock.patch('aussieaddonscommon.issue_reporter.save_last_error_report')
     @mock.patch('aussieaddonscommon.utils.send_report')
     @mock.patch('xbmcgui.Dialog.yesno')
@@ -247,7 +264,7 @@ class UtilsTests(testtools.TestCase):
                           mock_format_dialog_error, mock_connection_info,
                           mock_not_already_reported, mock_get_latest_version,
                           mock_yesno_dialog, mock_send_report,
-                          mock_save_last_report):
+                          mock_save_last_report, mock_record_error):
         mock_exc_info.return_value = (
             fakes.FakeException, fakes.EXC_VALUE, fakes.TB)
         mock_traceback.return_value = ''.join(
@@ -265,5 +282,9 @@ class UtilsTests(testtools.TestCase):
                 traceback.format_exception(fakes.FakeException,
                                            fakes.EXC_VALUE, fakes.TB)),
             connection_info=fakes.VALID_CONNECTION_INFO[0])
+        fingerprint = ledger.fingerprint(
+            fakes.FakeException, fakes.EXC_VALUE, fakes.TB)
+        mock_record_error.assert_called_once_with(
+            fingerprint, fakes.EXC_VALUE_FORMATTED)
         mock_save_last_report.assert_called_once_with(
-            fakes.EXC_VALUE_FORMATTED)
+            fingerprint, fakes.EXC_VALUE_FORMATTED)
@@ -0,0 +1,127 @@
+from __future__ import absolute_import, unicode_literals
+
+import io
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import testtools
+
+from aussieaddonscommon import issue_reporter
+from aussieaddonscommon import utils
+from aussieaddonscommon import windowcache
+from tests.unit import fakes
+
+
+@mock.patch('xbmcgui.Window', fakes.FakeWindow)
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class WindowCacheTests(testtools.TestCase):
+
+    def setUp(self):
+        super(WindowCacheTests, self).setUp()
+        fakes.FakeWindow.properties.clear()
+
+    def test_get_set(self):
+        window_cache = windowcache.WindowCache()
+        self.assertIsNone(window_cache.get('foo'))
+        self.assertTrue(window_cache.set('foo', {'bar': [1, 2]}))
+        self.assertEqual({'bar': [1, 2]}, window_cache.get('foo'))
+        # Seen by later invocations through their own Window objects
+        self.assertEqual({'bar': [1, 2]},
+                         windowcache.WindowCache().get('foo'))
+
+    def test_namespace(self):
+        windowcache.WindowCache().set('foo', 'addon')
+        windowcache.WindowCache('other.addon').set('foo', 'other')
+        self.assertEqual('addon', windowcache.WindowCache().get('foo'))
+        window = fakes.FakeWindow(windowcache.HOME_WINDOW)
+        self.assertIn('"addon"',
+                      window.getProperty('aussieaddonscommon.cache.'
+                                         'test.addon.foo'))
+
+    def test_ttl(self):
+        window_cache = windowcache.WindowCache()
+        window_cache.set('foo', 'bar', ttl=60, now=1000)
+        window_cache.set('forever', 'bar', ttl=None, now=1000)
+        self.assertEqual('bar', window_cache.get('foo', now=1059))
+        self.assertIsNone(window_cache.get('foo', now=1060))
+        self.assertEqual('bar', window_cache.get('forever', now=10 ** 10))
+
+    def test_max_value_size(self):
+        window_cache = windowcache.WindowCache(max_value_size=100)
+        self.assertFalse(window_cache.set('foo', 'x' * 100))
+        self.assertIsNone(window_cache.get('foo'))
+
+    def test_max_total_size(self):
+        window_cache = windowcache.WindowCache(max_total_size=100)
+        for i in range(5):
+            window_cache.set('key%d' % i, 'x' * 20, ttl=None, now=1000 + i)
+        self.assertIsNone(window_cache.get('key0'))
+        self.assertIsNone(window_cache.get('key1'))
+        self.assertEqual('x' * 20, window_cache.get('key4'))
+
+    def test_clear(self):
+        window_cache = windowcache.WindowCache()
+        window_cache.set('foo', 'bar')
+        window_cache.delete('foo')
+        self.assertIsNone(window_cache.get('foo'))
+        window_cache.set('foo', 'bar')
+        window_cache.set('baz', 'bar')
+        window_cache.clear()
+        self.assertEqual({}, fakes.FakeWindow.properties[
+            windowcache.HOME_WINDOW])
+
+    def test_memoize(self):
+        window_cache = windowcache.WindowCache()
+        func = mock.Mock(side_effect=[None, 'result', 'other'])
+        memoized = window_cache.memoize(key_prefix='func')(func)
+        self.assertIsNone(memoized(1))
+        self.assertEqual('result', memoized(1))
+        self.assertEqual('result', memoized(1))
+        self.assertEqual('other', memoized(2))
+        self.assertEqual(3, func.call_count)
+
+
+@mock.patch('xbmcgui.Window', fakes.FakeWindow)
+@mock.patch('xbmcaddon.Addon', fakes.FakeAddon)
+class CachedInfoTests(testtools.TestCase):
+
+    def setUp(self):
+        super(CachedInfoTests, self).setUp()
+        fakes.FakeWindow.properties.clear()
+
+    @mock.patch('xbmc.getCondVisibility')
+    def test_get_platform(self, mock_cond_visibility):
+        mock_cond_visibility.side_effect = lambda cond: cond.endswith('OSX')
+        self.assertEqual('OSX', utils.get_platform())
+        calls = mock_cond_visibility.call_count
+        self.assertEqual('OSX', utils.get_platform())
+        self.assertEqual(calls, mock_cond_visibility.call_count)
+
+    @mock.patch('xbmc.getInfoLabel')
+    def test_get_kodi_version(self, mock_info_label):
+        mock_info_label.return_value = fakes.BUILD_VERSION
+        utils.get_kodi_version()
+        self.assertEqual(fakes.BUILD_VERSION, utils.get_kodi_build())
+        mock_info_label.assert_called_once_with('System.BuildVersion')
+
+    @mock.patch('aussieaddonscommon.settings.get_snapshot')
+    def test_is_debug(self, mock_snapshot):
+        mock_snapshot.return_value = {'debug.showloginfo': False}
+        self.assertFalse(utils.is_debug())
+        self.assertFalse(utils.is_debug())
+        mock_snapshot.assert_called_once_with()
+
+    @mock.patch('aussieaddonscommon.issue_reporter.urlopen')
+    def test_connection_info(self, mock_urlopen):
+        mock_urlopen.side_effect = [
+            ValueError('Offline'),
+            io.StringIO('{"country": "AU"}')]
+        self.assertIsNone(issue_reporter.get_connection_info())
+        self.assertEqual({'country': 'AU'},
+                         issue_reporter.get_connection_info())
+        self.assertEqual({'country': 'AU'},
+                         issue_reporter.get_connection_info())
+        self.assertEqual(2, mock_urlopen.call_count)